@@ -3,95 +3,183 @@ import streamlit as st
 import pandas as pd
 import os
 import sys
-import plotly.graph_objects as go 
 import datetime
+import tempfile
+import hashlib
 
 script_dir = os.path.dirname(os.path.abspath(__file__))
 if script_dir not in sys.path: sys.path.append(script_dir)
 
 try:
     from test_loader import resolve_to_ticker, load_company_info, get_company_df, normalize_dataframe
-    from modules.analyzer import calculate_financial_ratios
+    from modules.analyzer import calculate_financial_ratios, flatten_ratios
+    from modules.ttm import company_ttm
     from modules.report_generator import create_pdf_bytes
     from modules.languages import get_text
+    from modules.memo import ARTIFACTS, digest
+    from modules.history import HistoryStore
+    from modules.benchmark import get_benchmarks, SCORE_METRICS
+    from modules.screener import RatioTable
+    from modules.valuation import valuation_inputs, sensitivity_grid, monte_carlo
+    from modules import telemetry
+    from modules.lazy import lazy_import, warm_up
+    from modules.jobs import get_jobs
 except ImportError as e: st.error(f"System Error: {e}"); st.stop()
 
 st.set_page_config(page_title="ValuePy Pro", page_icon="💎", layout="wide")
+go = lazy_import('plotly.graph_objects') # first chart only
+warm_up() # once per process: heavy imports in a background thread while the first page renders
 st.markdown("<style>.metric-card { background-color: white; border-left: 4px solid #3498db; border-radius: 5px; padding: 15px; box-shadow: 0 2px 4px rgba(0,0,0,0.05); margin-bottom: 10px; } .metric-label { font-size: 12px; color: #7f8c8d; font-weight: 600; } .metric-value { font-size: 20px; font-weight: 800; color: #2c3e50; } div[data-testid='stRadio'] > label { display: none; }</style>", unsafe_allow_html=True)
 
-if 'history' not in st.session_state: st.session_state.history = [] 
-if 'current_group' not in st.session_state: st.session_state.current_group = None
+if not isinstance(st.session_state.get('history'), HistoryStore): st.session_state.history = HistoryStore()
+if 'current_id' not in st.session_state: st.session_state.current_id = None
+if 'jobs' not in st.session_state: st.session_state.jobs = [] # ids of this session's background analyses
 
 lang_choice = st.sidebar.selectbox("Language / Γλώσσα", ["English", "Ελληνικά"])
+debug = st.sidebar.toggle("🛠 Debug", key='debug') # this session's trace view; process metrics: VALUEPY_TELEMETRY=1
 T = get_text('GR' if lang_choice == "Ελληνικά" else 'EN')
 
 st.sidebar.title(T['sidebar_title'])
-if st.sidebar.button(T['clear_history']): st.session_state.history = []; st.session_state.current_group = None; st.rerun()
-for i, group in enumerate(reversed(st.session_state.history)):
-    if st.sidebar.button(f"{group.get('title')} ({group.get('time')})", key=f"hist_{i}"): st.session_state.current_group = group; st.rerun()
+if st.sidebar.button(T['clear_history']): st.session_state.history.clear(); st.session_state.current_id = None; st.rerun()
+for entry_id, title, ts in st.session_state.history.titles(limit=20):
+    if st.sidebar.button(f"{title} ({ts})", key=f"hist_{entry_id}"): st.session_state.current_id = entry_id; st.rerun()
+mem = st.session_state.history.memory_usage()
+st.sidebar.caption(f"{mem['entries']} saved · {(mem['results_bytes'] + mem['frames_bytes']) / 1024:.0f} KB in memory · {mem['disk_bytes'] / 1024:.0f} KB on disk")
 
 st.markdown('<div style="font-size:32px; font-weight:700; text-align:center; color:#2c3e50;">💎 ValuePy <span style="color:#3498db">Pro</span></div>', unsafe_allow_html=True)
 col_space_1, col_center, col_space_2 = st.columns([1, 2, 1])
-trigger_analysis = False; input_mode = "Yahoo"; ticker_in = None
+trigger_analysis = False; input_mode = "Yahoo"; ticker_in = None; period = "Annual"
 
 with col_center:
     tab_search, tab_upload = st.tabs([T['search_tab'], T['upload_tab']])
     with tab_search:
         ticker_in = st.text_input("Ticker:", placeholder=T['ticker_placeholder'])
+        period = st.radio("Period", ["Annual", "TTM"], horizontal=True) # TTM: last four quarters, rolled every quarter
         if st.button(T['btn_run'], type="primary", use_container_width=True): trigger_analysis = True
     with tab_upload:
         file_in = st.file_uploader("Report:", type=['pdf', 'xlsx'])
         if file_in and st.button(T['btn_upload'], type="primary", use_container_width=True): trigger_analysis = True; input_mode = "File"
 
+    # Screener over every company analyzed so far (and batch_runner --benchmarks runs)
+    with st.expander("🔎 Screener"):
+        peers = get_benchmarks()
+        if not len(peers): st.caption("Analyze companies (or run batch_runner.py --benchmarks) to build the screening universe.")
+        else:
+            key = ('screener', id(peers), peers.version)
+            table = ARTIFACTS.get(key)
+            if table is None: # explicit size: pickling the table just to weigh it costs more than building it
+                table = RatioTable.from_benchmarks(peers).build_indexes(); ARTIFACTS.put(key, table, size=table.nbytes)
+            screen_expr = st.text_input("Filter", placeholder="Z_Score > 2.99 and ROIC > 12 and CCC < 60")
+            c1, c2, c3 = st.columns([2, 1, 1])
+            metrics = sorted(table.columns)
+            sort_by = c1.selectbox("Sort by", metrics, index=metrics.index('ROIC') if 'ROIC' in metrics else 0)
+            top_k = c2.number_input("Top", 1, 500, 25)
+            ascending = c3.toggle("Lowest first")
+            try:
+                hits = table.screen(screen_expr, by=sort_by, k=int(top_k), ascending=ascending, columns=SCORE_METRICS)
+                st.caption(f"{table.count(screen_expr)} of {len(table)} companies match")
+                st.dataframe(hits, hide_index=True, use_container_width=True)
+            except ValueError as e: st.warning(str(e))
+
+# === ANALYSIS JOBS (worker threads; nothing here may touch st.*) ===
+def analyze_yahoo(job, main_ticker, ttm):
+    group = {'time': datetime.datetime.now().strftime("%H:%M"), 'title': f"{main_ticker} (TTM)" if ttm else main_ticker, 'main_ticker': main_ticker, 'reports': {}, 'benchmark': {}}
+    job.report(0.05, "fetch")
+    data = get_company_df(main_ticker, "yahoo", freq='quarterly' if ttm else 'annual')
+    if not data: raise ValueError(f"No data found for {main_ticker}. Try 'TSLA'.")
+    job.report(0.5, "company info")
+    info_df, sector = load_company_info(main_ticker)
+    job.report(0.6, "normalize")
+    df = normalize_dataframe(data[0]['table'], "yahoo")
+    if ttm: df = company_ttm(df) # needs four consecutive quarters
+    if df.empty: raise ValueError("Dataframe is empty.")
+    df['Market Cap'] = info_df['Κεφαλαιοποίηση'].iloc[0] if not info_df.empty else 0
+    job.report(0.75, "analyze")
+    key = digest(df)
+    forensics = ARTIFACTS.get_or_compute(('analysis', key), lambda: calculate_financial_ratios(df, sector, 'ttm' if ttm else 'annual'))
+    group['reports'][main_ticker] = {'data': forensics, 'df': df, 'key': key}
+    # Peer percentiles: the company joins its sector's universe (annual figures), then is ranked against it
+    job.report(0.95, "benchmarks")
+    peers = get_benchmarks(); flat = flatten_ratios(forensics)
+    if not ttm:
+        with job.commit(): peers.add(main_ticker, sector, flat) # a cancel just before this keeps the universe untouched
+    group['benchmark'] = peers.rank(sector, flat, exclude=main_ticker)
+    return group
+
+def analyze_file(job, content, name, file_type):
+    job.report(0.05, "extract")
+    with tempfile.NamedTemporaryFile(suffix='.' + file_type, delete=False) as tmp: tmp.write(content)
+    try: data = get_company_df(tmp.name, file_type)
+    finally: os.remove(tmp.name)
+    if not data: raise ValueError(f"No financial statements found in {name}.{file_type}.")
+    job.report(0.6, "normalize")
+    df = normalize_dataframe(data[0]['table'], file_type)
+    if df.empty: raise ValueError("Dataframe is empty.")
+    df['Market Cap'] = 0
+    job.report(0.75, "analyze")
+    key = digest(df)
+    forensics = ARTIFACTS.get_or_compute(('analysis', key), lambda: calculate_financial_ratios(df))
+    return {'time': datetime.datetime.now().strftime("%H:%M"), 'title': name, 'main_ticker': name, 'reports': {name: {'data': forensics, 'df': df, 'key': key}},
+            'benchmark': get_benchmarks().rank("General", flatten_ratios(forensics))}
+
+jobs = get_jobs(); owner = st.session_state.history.session_id
 if trigger_analysis:
-    timestamp = datetime.datetime.now().strftime("%H:%M")
-    analysis_group = {'time': timestamp, 'title': ticker_in or "Report", 'main_ticker': "", 'reports': {}, 'benchmark': {}}
-    
-    with st.spinner(T['processing']):
-        try:
-            if input_mode == "Yahoo" and ticker_in:
-                main_ticker = resolve_to_ticker(ticker_in)
-                analysis_group['main_ticker'] = main_ticker
-                
-                # Fetch Data
-                data = get_company_df(main_ticker, "yahoo")
-                
-                # Check list emptiness explicitly
-                if data and len(data) > 0:
-                    info_df, _ = load_company_info(main_ticker)
-                    df = normalize_dataframe(data[0]['table'], "yahoo")
-                    
-                    # Ensure DF is not empty
-                    if not df.empty:
-                        df['Market Cap'] = info_df['Κεφαλαιοποίηση'].iloc[0] if not info_df.empty else 0
-                        forensics = calculate_financial_ratios(df)
-                        analysis_group['reports'][main_ticker] = {'data': forensics, 'df': df}
-                        st.session_state.history.append(analysis_group)
-                        st.session_state.current_group = analysis_group
-                        st.rerun()
-                    else:
-                        st.error("❌ Dataframe is empty.")
-                else:
-                    st.error(f"❌ No data found for {main_ticker}. Try 'TSLA'.")
-
-            elif input_mode == "File" and file_in:
-                # File logic simplified
-                pass 
-
-        except Exception as e: st.error(f"Error: {e}")
-
-if st.session_state.current_group:
-    group = st.session_state.current_group
+    try:
+        if input_mode == "Yahoo" and ticker_in:
+            ttm = period == "TTM"
+            ticker = resolve_to_ticker(ticker_in)
+            job = jobs.submit(('yahoo', ticker, ttm), analyze_yahoo, ticker, ttm, label=ticker + (" (TTM)" if ttm else ""), owner=owner, traced=debug)
+        elif input_mode == "File" and file_in:
+            name, suffix = os.path.splitext(file_in.name)
+            content = file_in.getvalue() # same bytes uploaded twice share one job
+            job = jobs.submit(('file', hashlib.blake2b(content, digest_size=16).hexdigest()), analyze_file, content, name, suffix.lower().lstrip('.'), label=file_in.name, owner=owner, traced=debug)
+        else: job = None
+        if job is not None and job.id not in st.session_state.jobs: st.session_state.jobs.append(job.id)
+    except Exception as e: st.error(f"Error: {e}")
+
+# Collect this session's finished jobs into its history (script thread only)
+for job_id in list(st.session_state.jobs):
+    job = jobs.get(job_id)
+    if job is not None and not job.done: continue
+    st.session_state.jobs.remove(job_id)
+    if job is None or job.status == 'cancelled': continue
+    if job.status == 'failed': st.error(f"❌ {job.label}: {job.error}"); continue
+    st.session_state.current_id = st.session_state.history.add(job.result)
+    st.session_state.last_analysis = job.trace
+
+@st.fragment(run_every=0.5)
+def job_panel():
+    """Progress of this session's jobs, polled without rerunning the whole page."""
+    st.caption(T['processing'])
+    for job_id in list(st.session_state.jobs):
+        job = jobs.get(job_id)
+        if job is None or job.done: st.rerun() # full run collects it
+        c1, c2 = st.columns([6, 1])
+        c1.progress(job.progress, text=f"{job.label} · {job.stage}" + (f" · shared by {len(job.owners)} sessions" if len(job.owners) > 1 else ""))
+        if c2.button("✖", key=f"cancel_{job_id}", help="Cancel"):
+            jobs.cancel(job_id, owner); st.session_state.jobs.remove(job_id); st.rerun()
+
+if st.session_state.jobs:
+    with col_center: job_panel()
+
+render_trace = telemetry.trace('render').start() if debug else None
+group = st.session_state.history.get(st.session_state.current_id) if st.session_state.current_id else None
+if group:
     reports = group['reports']
     selected_company = list(reports.keys())[0]
     
     active = reports[selected_company]['data']
     df_raw = reports[selected_company]['df']
+    art_key = reports[selected_company].get('key') or digest(selected_company, active)
+    def cached_fig(name, build):
+        with telemetry.span('app.plotly', fig=name if isinstance(name, str) else '/'.join(name[1:])): return ARTIFACTS.get_or_compute(('fig', art_key, name), build)
     an = active.get('Analysis', {}); for_ = active.get('Forensics', {}); val = active.get('Valuation', {})
     
     col_h1, col_h2 = st.columns([3, 1])
-    with col_h1: st.markdown(f"### 📑 {selected_company}")
-    with col_h2: st.download_button(T['download_pdf'], create_pdf_bytes(selected_company, active), f"{selected_company}.pdf", "application/pdf")
+    with col_h1: st.markdown(f"### 📑 {selected_company}" + (f" · {active['Period']}" if active.get('Period') else ""))
+    generated_on = datetime.datetime.now().strftime('%Y-%m-%d %H:%M') # printed in the report: part of the key, or the stamp goes stale
+    with telemetry.span('app.pdf'): pdf_bytes = ARTIFACTS.get_or_compute(('pdf', art_key, selected_company, generated_on), lambda: create_pdf_bytes(selected_company, active, generated_on))
+    with col_h2: st.download_button(T['download_pdf'], pdf_bytes, f"{selected_company}.pdf", "application/pdf")
 
     def ui_card(label, value, subtext=None, color="#2c3e50"):
         border_c = "#3498db"
@@ -99,17 +187,35 @@ if st.session_state.current_group:
         elif "OK" in str(subtext) or "SOLVENT" in str(subtext): border_c = "#27ae60"
         st.markdown(f"""<div class="metric-card" style="border-left: 4px solid {border_c};"><div class="metric-label">{label}</div><div class="metric-value" style="color:{color}">{value}</div><div style="font-size:11px; color:#95a5a6;">{subtext if subtext else ''}</div></div>""", unsafe_allow_html=True)
 
+    trends = active.get('Trends', {})
+    def trend_chart(keys, title):
+        years = trends.get('Period') or trends.get('Year', []) # TTM: one point per quarter
+        if len(years) < 2: return
+        def build():
+            fig = go.Figure([go.Scatter(x=years, y=trends.get(k, []), mode="lines+markers", name=k.replace('_', ' ')) for k in keys])
+            fig.update_layout(title=title, height=280, margin=dict(t=40, b=20), xaxis=dict(dtick=1) if 'Period' not in trends else {}); return fig
+        st.plotly_chart(cached_fig(('trend', *keys), build), use_container_width=True)
+
     t1, t2, t3, t4 = st.tabs(["🏥 HEALTH", "💰 PROFIT", "⚙️ EFFICIENCY", "⚖️ VALUATION"])
 
     with t1:
         col_g, col_info = st.columns([1, 2])
         with col_g:
-            fig_g = go.Figure(go.Indicator(mode="gauge+number", value=for_.get('Health_Score', 0), title={'text': "Health Score"}, gauge={'axis': {'range': [0, 100]}, 'bar': {'color': "#2c3e50"}, 'steps': [{'range': [0, 40], 'color': "#e74c3c"}, {'range': [40, 70], 'color': "#f1c40f"}, {'range': [70, 100], 'color': "#27ae60"}]}))
-            fig_g.update_layout(height=220, margin=dict(t=30, b=20)); st.plotly_chart(fig_g, use_container_width=True)
+            def build_gauge():
+                fig_g = go.Figure(go.Indicator(mode="gauge+number", value=for_.get('Health_Score', 0), title={'text': "Health Score"}, gauge={'axis': {'range': [0, 100]}, 'bar': {'color': "#2c3e50"}, 'steps': [{'range': [0, 40], 'color': "#e74c3c"}, {'range': [40, 70], 'color': "#f1c40f"}, {'range': [70, 100], 'color': "#27ae60"}]}))
+                fig_g.update_layout(height=220, margin=dict(t=30, b=20)); return fig_g
+            st.plotly_chart(cached_fig('gauge', build_gauge), use_container_width=True)
         with col_info:
             c1, c2 = st.columns(2)
             with c1: ui_card("Debt / Equity", f"{an.get('3_Solvency',{}).get('Debt_to_Equity',0)}x"); ui_card("Z-Score", f"{for_.get('Z_Score',0)}")
-            with c2: ui_card("Current Ratio", f"{an.get('1_Liquidity',{}).get('Current_Ratio',0)}x"); ui_card("M-Score", f"{for_.get('M_Score',0)}")
+            with c2: ui_card("Current Ratio", f"{an.get('1_Liquidity',{}).get('Current_Ratio',0)}x"); ui_card("M-Score", f"{for_.get('M_Score',0)}", "RED FLAG" if for_.get('M_Score', -2.5) > -1.78 else "OK")
+        trend_chart(['Z_Score', 'M_Score', 'Health_Score'], "Z / M / Health Score")
+        bench = group.get('benchmark') or {}
+        if bench.get('metrics'):
+            st.caption(f"Peer percentiles: {bench['peer_group']} ({bench['peers']} companies) · Relative Score {bench.get('Relative_Score')}/100")
+            rows = [{'Metric': m.replace('_', ' '), 'Value': b['value'], 'Peer median': b['median'], 'Percentile': b['percentile'], 'Score': b['score']}
+                    for m, b in bench['metrics'].items() if m in SCORE_METRICS]
+            st.dataframe(pd.DataFrame(rows), hide_index=True, use_container_width=True)
 
     with t2:
         col_L, col_R = st.columns([1, 2])
@@ -119,8 +225,11 @@ if st.session_state.current_group:
         with col_R:
             st.subheader("Cash Flow")
             net_inc = for_.get('Net_Income', 0); cfo = for_.get('CFO', 0); gap = cfo - net_inc
-            fig_wf = go.Figure(go.Waterfall(measure=["relative", "relative", "total"], x=["Net Income", "Gap", "CFO"], y=[net_inc, gap, cfo], text=[f"{net_inc/1e6:.1f}M", "", f"{cfo/1e6:.1f}M"], connector={"line":{"color":"gray"}}, decreasing={"marker":{"color":"#e74c3c"}}, increasing={"marker":{"color":"#2ecc71"}}, totals={"marker":{"color":"#3498db"}}))
-            fig_wf.update_layout(height=400, margin=dict(t=20, b=20)); st.plotly_chart(fig_wf, use_container_width=True)
+            def build_waterfall():
+                fig_wf = go.Figure(go.Waterfall(measure=["relative", "relative", "total"], x=["Net Income", "Gap", "CFO"], y=[net_inc, gap, cfo], text=[f"{net_inc/1e6:.1f}M", "", f"{cfo/1e6:.1f}M"], connector={"line":{"color":"gray"}}, decreasing={"marker":{"color":"#e74c3c"}}, increasing={"marker":{"color":"#2ecc71"}}, totals={"marker":{"color":"#3498db"}}))
+                fig_wf.update_layout(height=400, margin=dict(t=20, b=20)); return fig_wf
+            st.plotly_chart(cached_fig('waterfall', build_waterfall), use_container_width=True)
+        trend_chart(['Gross_Margin', 'Operating_Margin', 'Net_Margin', 'Revenue_Growth'], "Margins & Growth (%)")
 
     with t3:
         act = an.get('2_Activity', {})
@@ -129,11 +238,48 @@ if st.session_state.current_group:
         with c2: ui_card("DSI", f"{act.get('DSI',0):.0f} d"); 
         with c3: ui_card("DPO", f"{act.get('DPO',0):.0f} d"); 
         with c4: ui_card("CCC", f"{act.get('CCC',0):.0f} d")
+        trend_chart(['DSO', 'DSI', 'DPO', 'CCC'], "Working Capital Days")
 
     with t4:
         wacc = st.slider("WACC", 0.04, 0.20, 0.10, 0.005)
         ic = val.get('Invested_Capital', 0); nopat = val.get('NOPAT', 0); eva = nopat - (ic * wacc)
         c1, c2 = st.columns(2)
         c1.metric("NOPAT", f"€{nopat/1e6:,.1f}M"); c2.metric("EVA", f"€{eva/1e6:,.1f}M")
+        trend_chart(['ROE', 'ROA', 'ROIC'], "Management Returns (%)")
+
+        # Whole sensitivity surface + Monte Carlo, computed once per analysis (not per slider tick)
+        v_in = valuation_inputs(active)
+        if v_in:
+            surf = ARTIFACTS.get_or_compute(('valuation', art_key), lambda: {'grid': sensitivity_grid(v_in), 'mc': monte_carlo(v_in, n=200_000, seed=0, keep_samples=False, bins=60)})
+            grid, mc = surf['grid'], surf['mc']
+            col_hm, col_mc = st.columns(2)
+            with col_hm:
+                def build_heatmap():
+                    fig = go.Figure(go.Heatmap(z=grid['dcf'][:, :, 1] / 1e6, x=[f"{g:.0%}" for g in grid['growth']], y=[f"{w:.1%}" for w in grid['wacc']], colorscale="RdYlGn", colorbar={'title': "EV (M)"}))
+                    fig.update_layout(title=f"DCF Enterprise Value (margin {grid['margin'][1]:.1%})", xaxis_title="Growth", yaxis_title="WACC", height=380, margin=dict(t=40, b=20)); return fig
+                st.plotly_chart(cached_fig('dcf_heatmap', build_heatmap), use_container_width=True)
+            with col_mc:
+                d = mc['dcf']
+                def build_mc():
+                    h = d['hist']; mids = (h['edges'][:-1] + h['edges'][1:]) / 2
+                    fig = go.Figure(go.Bar(x=mids / 1e6, y=h['counts'], marker_color="#3498db"))
+                    for p in ('p5', 'p50', 'p95'): fig.add_vline(x=d[p] / 1e6, line_dash="dash", annotation_text=p.upper())
+                    fig.update_layout(title=f"Monte Carlo EV ({mc['n']:,} draws)", xaxis_title="EV (M)", height=380, margin=dict(t=40, b=20), bargap=0); return fig
+                st.plotly_chart(cached_fig('dcf_mc', build_mc), use_container_width=True)
+                st.caption(f"P5 €{d['p5']/1e6:,.0f}M · P50 €{d['p50']/1e6:,.0f}M · P95 €{d['p95']/1e6:,.0f}M · P(EVA < 0) {mc['eva']['prob_negative']:.0%}")
+
+else: st.info("Start by searching for a company (e.g. TSLA) or uploading a file.")
+if render_trace is not None: render_trace.stop()
 
-else: st.info("Start by searching for a company (e.g. TSLA) or uploading a file.")
\ No newline at end of file
+if debug:
+    with st.sidebar.expander("🛠 Last run", expanded=True):
+        for tr in (st.session_state.get('last_analysis'), render_trace):
+            if not tr: continue
+            st.caption(f"{tr.name}: {tr.seconds * 1000:,.1f} ms · RSS high-water {tr.rss_max / 2**20:,.0f} MB")
+            st.dataframe(pd.DataFrame([{'Stage': '· ' * s['depth'] + s['span'], 'ms': round(s['seconds'] * 1000, 2)} for s in tr.stages()]), hide_index=True, use_container_width=True)
+        st.caption(f"artifact cache: {ARTIFACTS.stats['hits']} hits / {ARTIFACTS.stats['misses']} misses")
+        if telemetry.enabled():
+            snap = telemetry.snapshot()
+            if snap['counters']: st.json(snap['counters'], expanded=False)
+            st.download_button("metrics.prom", telemetry.to_prometheus(), "metrics.prom", "text/plain")
+        else: st.caption("process metrics off (start with VALUEPY_TELEMETRY=1)")
\ No newline at end of file
@@ -0,0 +1,275 @@
+# batch_runner.py (v1.0 - Headless Screening Runner)
+# Ο ίδιος αγωγός με το app.py (fetch -> normalize -> analyze -> PDF), χωρίς Streamlit.
+#
+#   python batch_runner.py --tickers TSLA MSFT AAPL --out runs/today --pdf
+#   python batch_runner.py --tickers-file universe.txt --out runs/nightly --resume
+#   python batch_runner.py --input-dir uploads/ --out runs/files --format csv
+#   python batch_runner.py --tickers-file universe.txt --out runs/daily --incremental
+#   python batch_runner.py --out runs/daily --screen "Z_Score > 2.99 and ROIC > 12" --sort-by ROIC --top 20
+#   python batch_runner.py --out runs/forensics --forensic-scan          # every company in the local store
+import os
+import sys
+import json
+import time
+import argparse
+import datetime
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+if script_dir not in sys.path: sys.path.append(script_dir)
+
+import pandas as pd
+from test_loader import resolve_to_ticker, load_company_info, get_company_df, normalize_dataframe, refresh_companies, stored_ratios, stored_ratio_panel, get_cache
+from modules.analyzer import calculate_financial_ratios, flatten_ratios, ratio_row_to_dict
+from modules.refresh import summarize_changes
+from modules.report_generator import create_pdf_bytes, safe_filename
+from modules.benchmark import get_benchmarks
+from modules.screener import RatioTable
+from modules.forensics import scan_universe, INPUT_COLUMNS
+
+FILE_TYPES = {'.pdf': 'pdf', '.xlsx': 'xlsx'}
+STAGES = ['fetch', 'normalize', 'analyze', 'pdf']
+
+# === STAGE 1: FETCH (threads, I/O bound) ===
+def fetch_item(item):
+    """item = (id, source, source_type) -> (id, raw table or None, (market cap, sector), seconds, error)."""
+    item_id, source, source_type = item
+    t0 = time.perf_counter()
+    try:
+        data = get_company_df(source, source_type)
+        if not data: return item_id, None, (0, None), time.perf_counter() - t0, "no data"
+        cap, sector = 0, "General"
+        if source_type == "yahoo":
+            info_df, sector = load_company_info(source)
+            cap = info_df['Κεφαλαιοποίηση'].iloc[0] if not info_df.empty else 0
+        return item_id, data[0]['table'], (cap, sector), time.perf_counter() - t0, None
+    except Exception as e:
+        return item_id, None, (0, None), time.perf_counter() - t0, str(e)
+
+# === STAGES 2-4: NORMALIZE / ANALYZE / PDF (worker processes, CPU bound) ===
+def analyze_item(item_id, table, market_cap, source_type, pdf_dir=None, sector="General"):
+    timings = {}
+    t0 = time.perf_counter()
+    df = normalize_dataframe(table, source_type)
+    timings['normalize'] = time.perf_counter() - t0
+    if df.empty: raise ValueError("Dataframe is empty")
+    df['Market Cap'] = market_cap
+
+    t0 = time.perf_counter()
+    res = calculate_financial_ratios(df, sector)
+    timings['analyze'] = time.perf_counter() - t0
+
+    if pdf_dir:
+        t0 = time.perf_counter()
+        with open(os.path.join(pdf_dir, f"{safe_filename(item_id)}.pdf"), 'wb') as fh: fh.write(create_pdf_bytes(item_id, res)) # ids come from the input list
+        timings['pdf'] = time.perf_counter() - t0
+
+    row = {'Id': item_id, 'Sector': sector, 'Year': int(df['Year'].max()) if 'Year' in df.columns else None, **flatten_ratios(res)}
+    return row, timings
+
+# === CHECKPOINT ===
+class Checkpoint:
+    """Append-only JSON lines: one record per finished item, so a killed run can resume. resume=False starts it over."""
+    def __init__(self, path, resume=True):
+        self.path = path
+        self.done = {}
+        if resume and os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as fh:
+                for line in fh:
+                    try: rec = json.loads(line)
+                    except ValueError: continue # torn last line from a crash
+                    self.done[rec['id']] = rec
+        self._fh = open(path, 'a' if resume else 'w', encoding='utf-8')
+
+    def record(self, item_id, status, row=None, error=None):
+        rec = {'id': item_id, 'status': status, 'row': row, 'error': error}
+        self._fh.write(json.dumps(rec, default=str) + '\n'); self._fh.flush()
+        self.done[item_id] = rec
+
+    def close(self): self._fh.close()
+
+# === PIPELINE ===
+def build_items(args):
+    items = []
+    tickers = list(args.tickers or [])
+    if args.tickers_file:
+        with open(args.tickers_file, 'r', encoding='utf-8') as fh:
+            tickers += [t for line in fh for t in line.replace(',', ' ').split()]
+    items += [(resolve_to_ticker(t), resolve_to_ticker(t), "yahoo") for t in tickers]
+    if args.input_dir:
+        for name in sorted(os.listdir(args.input_dir)):
+            stem, ext = os.path.splitext(name)
+            if ext.lower() in FILE_TYPES: items.append((stem, os.path.join(args.input_dir, name), FILE_TYPES[ext.lower()]))
+    return list({i[0]: i for i in items}.values())
+
+def run(args):
+    os.makedirs(args.out, exist_ok=True)
+    pdf_dir = os.path.join(args.out, 'pdf') if args.pdf else None
+    if pdf_dir: os.makedirs(pdf_dir, exist_ok=True)
+
+    ckpt = Checkpoint(os.path.join(args.out, 'checkpoint.jsonl'), resume=args.resume)
+    items = build_items(args)
+    skip = {k for k, r in ckpt.done.items() if r['status'] == 'ok' or not args.retry_failed} if args.resume else set()
+    todo = [i for i in items if i[0] not in skip]
+    print(f"▶ {len(items)} items, {len(items) - len(todo)} already done, {len(todo)} to run")
+
+    timings = {s: 0.0 for s in STAGES}
+    counts = {'ok': 0, 'failed': 0}
+    wall = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.fetch_workers) as fetch_pool, ProcessPoolExecutor(max_workers=args.workers) as cpu_pool:
+        # Fetches feed the process pool as they land, so analysis overlaps with I/O
+        types = {i[0]: i[2] for i in todo}
+        pending = {fetch_pool.submit(fetch_item, i): ('fetch', i[0]) for i in todo}
+        while pending:
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                stage, item_id = pending.pop(fut)
+                try:
+                    if stage == 'fetch':
+                        item_id, table, (cap, sector), secs, err = fut.result()
+                        timings['fetch'] += secs
+                        if err: raise RuntimeError(err)
+                        pending[cpu_pool.submit(analyze_item, item_id, table, cap, types[item_id], pdf_dir, sector)] = ('analyze', item_id)
+                    else:
+                        row, t = fut.result()
+                        for k, v in t.items(): timings[k] += v
+                        ckpt.record(item_id, 'ok', row=row); counts['ok'] += 1
+                except Exception as e:
+                    ckpt.record(item_id, 'failed', error=str(e)); counts['failed'] += 1
+    wall = time.perf_counter() - wall
+    ckpt.close()
+
+    done = [ckpt.done[i[0]] for i in items if i[0] in ckpt.done] # a resumed checkpoint may hold items from other lists
+    rows = [r['row'] for r in done if r['status'] == 'ok']
+    out_path = write_results(rows, args.out, args.format)
+    if args.benchmarks: print(f"benchmarks: {get_benchmarks().add_many(rows)} companies added -> {get_benchmarks().info()['sectors']}")
+    failed = {r['id']: r['error'] for r in done if r['status'] == 'failed'}
+    report(timings, counts, wall, out_path, failed)
+    return rows
+
+# === INCREMENTAL (daily refresh of a tracked universe) ===
+def read_results(out_dir, fmt):
+    path = os.path.join(out_dir, f"results.{fmt}")
+    if not os.path.exists(path): return {}
+    df = pd.read_parquet(path) if fmt == 'parquet' else pd.read_csv(path)
+    return {r['Id']: r for r in df.to_dict('records')}
+
+def stored_row(ticker, freq='annual'):
+    """Results row from the stored ratio history (newest year, or newest TTM window); None if nothing is stored."""
+    cache = get_cache()
+    ratios = stored_ratios(ticker, freq)
+    if ratios.empty: return None
+    info = cache.peek(ticker, 'info')
+    sector = info['sector'].iloc[0] if info is not None and 'sector' in info.columns else None
+    return {'Id': ticker, 'Sector': sector if pd.notna(sector) and sector else "General",
+            'Year': int(ratios['Year'].iloc[0]), **({'Period': ratios['Period'].iloc[0]} if 'Period' in ratios.columns else {}),
+            **flatten_ratios(ratio_row_to_dict(ratios.iloc[0]))}
+
+def run_incremental(args):
+    """Refresh only due tickers; rebuild result rows only for the ones whose statements changed."""
+    os.makedirs(args.out, exist_ok=True)
+    tickers = [i[0] for i in build_items(args) if i[2] == "yahoo"]
+    freq = 'quarterly' if args.ttm else 'annual'
+    previous = read_results(args.out, args.format)
+    wall = time.perf_counter()
+    res = refresh_companies(tickers, only_due=not args.full_refresh, max_workers=args.fetch_workers,
+                            change_log=os.path.join(args.out, 'changes.jsonl'), freq=freq)
+    rebuild = set(res['changed']) | {t for t in tickers if t not in previous}
+    rows = []
+    for t in tickers:
+        row = stored_row(t, freq) if t in rebuild else previous.get(t)
+        if row is not None: rows.append(row)
+    out_path = write_results(rows, args.out, args.format)
+    if args.benchmarks: print(f"benchmarks: {get_benchmarks().add_many(rows)} companies added -> {get_benchmarks().info()['sectors']}")
+    summary = summarize_changes(res['changes'])
+    print(f"\n=== Incremental refresh {datetime.datetime.now():%Y-%m-%d %H:%M} ===")
+    print(f"tickers: {len(tickers)}, checked {len(tickers) - len(res['skipped'])}, changed {len(res['changed'])}, "
+          f"rows rebuilt {len(rebuild)}, failed {len(res['failed'])} in {time.perf_counter() - wall:.2f}s")
+    print(f"changes: {summary['new_period']} new periods, {summary['restated']} restated values, {summary['new_field']} new fields")
+    for k, err in list(res['failed'].items())[:20]: print(f"  ❌ {k}: {err}")
+    print(f"results -> {out_path}")
+    return rows
+
+# === SCREEN (filter / rank the result rows) ===
+def screen_results(rows, args):
+    table = RatioTable.from_rows(rows)
+    hits = table.screen(args.screen, by=args.sort_by, k=args.top, ascending=args.ascending)
+    path = os.path.join(args.out, f"screen.{args.format}")
+    if args.format == 'parquet': hits.to_parquet(path, index=False)
+    else: hits.to_csv(path, index=False)
+    show = [c for c in ['Id', 'Sector', 'Year', 'Period'] if c in hits.columns]
+    show += [table.resolve(c) for c in [args.sort_by] if c and table.resolve(c) not in show]
+    print(f"\n=== Screen: {args.screen or '(all)'} -> {table.count(args.screen)} of {len(table)} rows ===")
+    print(hits[show].to_string(index=False) if len(hits) else "(no matches)")
+    print(f"screen -> {path}")
+    return hits
+
+# === FORENSIC SCAN (sector / year outliers over the stored statements) ===
+def forensic_scan(args):
+    os.makedirs(args.out, exist_ok=True)
+    tickers = None if args.stored_only else [i[0] for i in build_items(args) if i[2] == "yahoo"]
+    t0 = time.perf_counter(); panel = stored_ratio_panel(tickers, columns=INPUT_COLUMNS); loaded = time.perf_counter() - t0
+    t0 = time.perf_counter(); alerts = scan_universe(panel, latest=not args.all_years); scanned = time.perf_counter() - t0
+    path = os.path.join(args.out, f"alerts.{args.format}")
+    if args.format == 'parquet': alerts.to_parquet(path, index=False)
+    else: alerts.to_csv(path, index=False)
+    print(f"\n=== Forensic scan: {panel['Ticker'].nunique()} companies, {len(panel)} company-years "
+          f"(load {loaded:.2f}s, scan {scanned:.2f}s) -> {len(alerts)} alerts ===")
+    if len(alerts): print(alerts.head(20)[['Ticker', 'Sector', 'Year', 'Alert_Score', 'Flags']].to_string(index=False))
+    print(f"alerts -> {path}")
+    return alerts
+
+def write_results(rows, out_dir, fmt):
+    df = pd.DataFrame(rows)
+    path = os.path.join(out_dir, f"results.{fmt}")
+    if fmt == 'parquet': df.to_parquet(path, index=False)
+    else: df.to_csv(path, index=False)
+    return path
+
+def report(timings, counts, wall, out_path, failed):
+    done = counts['ok'] + counts['failed']
+    print(f"\n=== Batch finished {datetime.datetime.now():%Y-%m-%d %H:%M} ===")
+    print(f"items: {counts['ok']} ok, {counts['failed']} failed in {wall:.2f}s ({done / wall if wall else 0:.1f} items/s)")
+    for stage in STAGES:
+        if timings[stage]:
+            per = timings[stage] / max(counts['ok'] if stage != 'fetch' else done, 1)
+            print(f"  {stage:<10} total {timings[stage]:8.2f}s   avg {per * 1000:8.1f} ms/item")
+    for k, err in list(failed.items())[:20]: print(f"  ❌ {k}: {err}")
+    print(f"results -> {out_path}")
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="ValuePy headless batch screening")
+    src = ap.add_argument_group('sources')
+    src.add_argument('--tickers', nargs='*', help="tickers to analyze")
+    src.add_argument('--tickers-file', help="text file with tickers (whitespace or comma separated)")
+    src.add_argument('--input-dir', help="directory of .pdf / .xlsx reports")
+    ap.add_argument('--out', required=True, help="output directory (results, checkpoint, pdf/)")
+    ap.add_argument('--format', choices=['parquet', 'csv'], default='parquet')
+    ap.add_argument('--pdf', action='store_true', help="also write one PDF report per company")
+    ap.add_argument('--workers', type=int, default=os.cpu_count() or 2, help="analysis / PDF processes")
+    ap.add_argument('--fetch-workers', type=int, default=8, help="concurrent fetch threads")
+    ap.add_argument('--benchmarks', action='store_true', help="add the results to the local sector benchmark universe")
+    ap.add_argument('--incremental', action='store_true', help="tickers only: merge newly filed periods into the local store, recompute changed companies")
+    ap.add_argument('--full-refresh', action='store_true', help="with --incremental, re-check every ticker, not only those due")
+    ap.add_argument('--ttm', action='store_true', help="with --incremental, quarterly statements and trailing-twelve-month ratios")
+    ap.add_argument('--screen', metavar='EXPR', help='filter the results, e.g. "Z_Score > 2.99 and ROIC > 12"; without sources, screens the existing results')
+    ap.add_argument('--sort-by', metavar='RATIO', help="with --screen, rank by this ratio (best = highest)")
+    ap.add_argument('--ascending', action='store_true', help="with --sort-by, lowest first")
+    ap.add_argument('--top', type=int, help="with --screen, keep only the first N rows")
+    ap.add_argument('--forensic-scan', action='store_true', help="rank accrual / working-capital / cash-flow outliers vs sector-year peers; without sources, scans the whole local store")
+    ap.add_argument('--all-years', action='store_true', help="with --forensic-scan, alert on every stored year, not only each company's latest")
+    ap.add_argument('--resume', action='store_true', help="skip items already in the checkpoint")
+    ap.add_argument('--retry-failed', action='store_true', help="with --resume, run failed items again")
+    args = ap.parse_args(argv)
+    args.stored_only = not (args.tickers or args.tickers_file or args.input_dir) # screen / scan what is already stored
+    if args.stored_only and args.screen is None and not args.forensic_scan: ap.error("give --tickers, --tickers-file or --input-dir")
+    return args
+
+if __name__ == '__main__':
+    args = parse_args()
+    if not args.stored_only: rows = run_incremental(args) if args.incremental else run(args)
+    elif args.screen is not None: rows = list(read_results(args.out, args.format).values())
+    if args.forensic_scan: forensic_scan(args)
+    if args.screen is not None:
+        try: screen_results(rows, args)
+        except ValueError as e: sys.exit(f"screen: {e}")
@@ -0,0 +1,67 @@
+# benchmarks/bench_app_rerun.py
+# Rerun latency of app.py when only the WACC slider moves, with and without the artifact cache.
+# Drives the real script through Streamlit's testing harness (no browser, no network).
+# The harness polls the script thread with sleeps, so CPU time per rerun is the sharper number.
+# Usage: python benchmarks/bench_app_rerun.py [--reruns 20]
+import os
+import sys
+import time
+import argparse
+import statistics
+import logging
+
+script_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if script_dir not in sys.path: sys.path.append(script_dir)
+
+import numpy as np
+import pandas as pd
+from streamlit.testing.v1 import AppTest
+from modules.analyzer import calculate_financial_ratios
+from modules.memo import ARTIFACTS, digest
+from modules.history import HistoryStore
+
+APP = os.path.join(script_dir, 'app.py')
+
+def sample_group(years=5, seed=0):
+    rng = np.random.default_rng(seed)
+    base = {'Revenue': 5e9, 'CostOfGoodsSold': 3e9, 'OperatingIncome': 9e8, 'NetIncome': 6e8, 'InterestExpense': 4e7,
+            'Cash': 8e8, 'Receivables': 6e8, 'Inventory': 4.5e8, 'Payables': 5e8, 'CurrentAssets': 2.2e9,
+            'CurrentLiabilities': 1.5e9, 'TotalAssets': 7.4e9, 'TotalEquity': 3.3e9, 'TotalDebt': 2.1e9, 'NetPPE': 3.1e9,
+            'RetainedEarnings': 1.9e9, 'OperatingCashFlow': 8.8e8, 'CapitalExpenditures': -4e8, 'ShareIssued': 2.6e8,
+            'SellingGeneralAndAdministration': 7e8, 'ReconciledDepreciation': 2e8}
+    df = pd.DataFrame({k: v * rng.uniform(0.7, 1.1, years) for k, v in base.items()})
+    df['Year'] = list(range(2024, 2024 - years, -1)); df['Market Cap'] = 1.2e10
+    res = calculate_financial_ratios(df)
+    report = {'data': res, 'df': df, 'key': digest(df)}
+    return {'time': '00:00', 'title': 'BENCH', 'main_ticker': 'BENCH', 'reports': {'BENCH': report}, 'benchmark': {}}
+
+def time_reruns(reruns, memo):
+    ARTIFACTS.clear(); ARTIFACTS.enabled = memo
+    at = AppTest.from_file(APP, default_timeout=120)
+    group = sample_group()
+    history = HistoryStore()
+    at.session_state.history = history; at.session_state.current_id = history.add(group)
+    c0 = time.process_time(); at.run(); first = time.process_time() - c0
+    assert not at.exception, at.exception
+    wall, cpu = [], []
+    for i in range(reruns):
+        t0, c0 = time.perf_counter(), time.process_time()
+        at.slider[0].set_value(round(0.05 + 0.005 * (i % 20), 3)).run()
+        wall.append(time.perf_counter() - t0); cpu.append(time.process_time() - c0)
+    return first, wall, cpu
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--reruns', type=int, default=20)
+    args = ap.parse_args()
+    logging.getLogger('streamlit').setLevel(logging.ERROR)
+
+    for memo in (False, True):
+        first, wall, cpu = time_reruns(args.reruns, memo)
+        label = 'memo on ' if memo else 'memo off'
+        print(f"{label}: first run cpu {first * 1000:7.1f} ms | slider rerun cpu median {statistics.median(cpu) * 1000:6.1f} ms "
+              f"p90 {sorted(cpu)[int(len(cpu) * 0.9) - 1] * 1000:6.1f} ms | wall median {statistics.median(wall) * 1000:6.1f} ms")
+    print(f"artifact cache: {ARTIFACTS.info()}")
+    ARTIFACTS.enabled = True
+
+if __name__ == '__main__': main()
@@ -0,0 +1,83 @@
+# benchmarks/bench_jobs.py
+# Script-thread latency while analyses run in the background job queue, vs running them inline,
+# and how many fetches identical requests from many sessions cost.
+# Usage: python benchmarks/bench_jobs.py [--latency 0.5] [--in-flight 0 8 64 256] [--workers 4] [--sessions 32]
+import os
+import sys
+import io
+import time
+import argparse
+import contextlib
+
+script_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if script_dir not in sys.path: sys.path.append(script_dir)
+
+import numpy as np
+import pandas as pd
+from test_loader import get_yahoo_data, normalize_dataframe, set_cache
+from modules.analyzer import calculate_financial_ratios
+from modules.jobs import JobQueue
+from modules import telemetry
+from synthetic import SyntheticUniverse
+
+def analyze(job, ticker, backend):
+    """What app.analyze_yahoo does, minus the cache / benchmarks side effects."""
+    job.report(0.05, "fetch")
+    raw = get_yahoo_data(ticker, backend=backend)
+    job.report(0.6, "normalize")
+    df = normalize_dataframe(raw, 'yahoo'); df['Market Cap'] = 5e9
+    job.report(0.75, "analyze")
+    return calculate_financial_ratios(df)
+
+def say(*args): print(*args, file=sys.__stdout__, flush=True) # stdout itself is muted: the loader prints from every worker
+
+def ui_tick(queue, ids):
+    """One poll of the progress panel: every job's state into a small frame."""
+    return pd.DataFrame([queue.get(i).info() for i in ids if queue.get(i) is not None])
+
+def percentiles(samples):
+    ms = np.array(samples) * 1000
+    return f"p50 {np.percentile(ms, 50):6.2f} ms  p95 {np.percentile(ms, 95):6.2f} ms  max {ms.max():7.2f} ms"
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--latency', type=float, default=0.5, help="seconds per simulated Yahoo response")
+    ap.add_argument('--in-flight', type=int, nargs='+', default=[0, 8, 64, 256])
+    ap.add_argument('--workers', type=int, default=4)
+    ap.add_argument('--sessions', type=int, default=32, help="sessions asking for the same tickers at once")
+    ap.add_argument('--ticks', type=int, default=200)
+    args = ap.parse_args()
+    with contextlib.redirect_stdout(io.StringIO()): run(args)
+
+def run(args):
+    set_cache(False); telemetry.enable(False)
+    uni = SyntheticUniverse(max(args.in_flight) + 4, years=4)
+    backend = uni.backend(latency=args.latency)
+
+    t0 = time.perf_counter(); analyze(type('Inline', (), {'report': lambda *a: None})(), uni.tickers[0], backend)
+    say(f"inline analysis blocks the script for {(time.perf_counter() - t0) * 1000:8.1f} ms per request")
+
+    for n in args.in_flight:
+        queue = JobQueue(max_workers=args.workers)
+        ids = [queue.submit(('yahoo', t), analyze, t, backend, owner=t).id for t in uni.tickers[:n]]
+        samples = []
+        for _ in range(args.ticks):
+            t0 = time.perf_counter(); ui_tick(queue, ids[:8]); samples.append(time.perf_counter() - t0)
+            time.sleep(0.005)
+        info = queue.info(); queue.shutdown(wait=True)
+        say(f"{n:4d} in flight ({info['running']} running, {info['queued']} queued): UI tick {percentiles(samples)}")
+
+    # Dedup: every session asks for the same 4 tickers while they are in flight
+    calls = {'n': 0}
+    class Counting(backend.Ticker):
+        def __init__(self, ticker): calls['n'] += 1; super().__init__(ticker)
+    counting = type('CountingYF', (), {'Ticker': Counting})
+    queue = JobQueue(max_workers=args.workers); wanted = uni.tickers[:4]
+    t0 = time.perf_counter()
+    jobs = [queue.submit(('yahoo', t), analyze, t, counting, owner=s) for s in range(args.sessions) for t in wanted]
+    for job in jobs: job.wait()
+    say(f"{args.sessions} sessions x {len(wanted)} tickers: {len(jobs)} requests -> {calls['n']} fetches, "
+        f"{len({j.id for j in jobs})} jobs in {time.perf_counter() - t0:.2f}s")
+    queue.shutdown()
+
+if __name__ == '__main__': main()
@@ -0,0 +1,56 @@
+# benchmarks/bench_pdf_batch.py
+# Month-end style report run: one-by-one create_pdf_bytes vs create_pdf_batch (files and book mode).
+# Usage: python benchmarks/bench_pdf_batch.py [--companies 200] [--workers 1 4]
+import os
+import sys
+import time
+import argparse
+import resource
+import tempfile
+
+script_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if script_dir not in sys.path: sys.path.append(script_dir)
+
+import fitz
+from modules.report_generator import create_pdf_bytes, create_pdf_batch, safe_filename
+from bench_app_rerun import sample_group
+
+def sample_results(n):
+    return {f"CO{i:04d}": sample_group(seed=i)['reports']['BENCH']['data'] for i in range(n)}
+
+def peak_rss_mb():
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    kids = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return max(own, kids) / 1024 # Linux reports KiB
+
+def count_pages(paths): return sum(fitz.open(p).page_count for p in paths)
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--companies', type=int, default=200)
+    ap.add_argument('--workers', type=int, nargs='+', default=[1, 4])
+    args = ap.parse_args()
+    results = sample_results(args.companies)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Baseline: what the month-end job did, one report at a time with every buffer kept
+        t0 = time.perf_counter()
+        buffers = {name: create_pdf_bytes(name, res) for name, res in results.items()}
+        for name, blob in buffers.items():
+            with open(os.path.join(tmp, f"{safe_filename(name)}.pdf"), 'wb') as fh: fh.write(blob)
+        dt = time.perf_counter() - t0
+        pages = count_pages([os.path.join(tmp, f"{safe_filename(n)}.pdf") for n in results])
+        print(f"serial bytes   companies={len(results)} time={dt:6.2f}s pages/sec={pages / dt:7.1f} peak_rss={peak_rss_mb():.0f}MB")
+        del buffers
+
+        for mode in ("files", "book"):
+            for workers in args.workers:
+                out_dir = os.path.join(tmp, f"{mode}_{workers}")
+                t0 = time.perf_counter()
+                out = create_pdf_batch(results, out_dir, mode=mode, workers=workers)
+                dt = time.perf_counter() - t0
+                total = count_pages(out['files']) if mode == "files" else fitz.open(out['book']).page_count
+                print(f"batch {mode:<5}    workers={workers} time={dt:6.2f}s pages/sec={out['pages'] / dt:7.1f} "
+                      f"pages_on_disk={total} peak_rss={peak_rss_mb():.0f}MB")
+
+if __name__ == '__main__': main()
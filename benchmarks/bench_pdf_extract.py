@@ -0,0 +1,76 @@
+# benchmarks/bench_pdf_extract.py
+# Throughput of the PDF statement extractor on generated annual reports.
+# Usage: python benchmarks/bench_pdf_extract.py [--pages 300] [--workers 1 4]
+import os
+import sys
+import time
+import argparse
+import resource
+import tempfile
+
+script_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if script_dir not in sys.path: sys.path.append(script_dir)
+
+from fpdf import FPDF
+from modules.pdf_extractor import extract_statements
+
+STATEMENTS = {
+    'Consolidated Income Statement': [('Total revenue', 5120.4), ('Cost of revenue', 3011.9), ('Gross profit', 2108.5),
+                                      ('Operating income', 903.2), ('Interest expense', 41.0), ('Net income', 611.7), ('Basic EPS', 2.31)],
+    'Consolidated Balance Sheet': [('Cash and cash equivalents', 812.3), ('Inventory', 455.0), ('Total current assets', 2220.8),
+                                   ('Net PPE', 3100.1), ('Total assets', 7420.6), ('Total current liabilities', 1510.2),
+                                   ('Total debt', 2100.0), ('Retained earnings', 1890.4), ('Total equity', 3305.9)],
+    'Consolidated Statement of Cash Flows': [('Operating cash flow', 880.5), ('Capital expenditure', -402.3),
+                                             ('Investing cash flow', -515.0), ('Financing cash flow', -210.8),
+                                             ('Cash dividends paid', -120.0)],
+}
+LOREM = ("The Group continued to execute its strategy during the year, investing in capacity and "
+         "digital channels while keeping a disciplined approach to capital allocation. ") * 6
+
+def build_report(path, pages):
+    pdf = FPDF(); pdf.set_auto_page_break(False)
+    at = max(1, int(pages * 0.6))
+    for i in range(pages):
+        pdf.add_page()
+        idx = i - at
+        if 0 <= idx < len(STATEMENTS):
+            title, rows = list(STATEMENTS.items())[idx]
+            pdf.set_font('Helvetica', 'B', 13); pdf.cell(0, 10, title, new_x="LMARGIN", new_y="NEXT")
+            pdf.set_font('Helvetica', '', 9); pdf.cell(0, 6, '(in millions)', new_x="LMARGIN", new_y="NEXT")
+            pdf.set_font('Helvetica', 'B', 10)
+            pdf.cell(90, 7, ''); pdf.cell(20, 7, 'Note'); pdf.cell(35, 7, '2024', align='R'); pdf.cell(35, 7, '2023', align='R', new_x="LMARGIN", new_y="NEXT")
+            pdf.set_font('Helvetica', '', 10)
+            for n, (label, val) in enumerate(rows):
+                prev = val * 0.9
+                fmt = lambda v: f"({abs(v):,.1f})" if v < 0 else f"{v:,.1f}"
+                pdf.cell(90, 7, label); pdf.cell(20, 7, str(n + 3)); pdf.cell(35, 7, fmt(val), align='R')
+                pdf.cell(35, 7, fmt(prev), align='R', new_x="LMARGIN", new_y="NEXT")
+        else:
+            pdf.set_font('Helvetica', '', 10)
+            pdf.multi_cell(0, 5, f"Section {i + 1}. " + LOREM * 3)
+    pdf.output(path)
+
+def peak_rss_mb():
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    kids = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return max(own, kids) / 1024 # Linux reports KiB
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--pages', type=int, nargs='+', default=[50, 300])
+    ap.add_argument('--workers', type=int, nargs='+', default=[1, 4])
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for pages in args.pages:
+            path = os.path.join(tmp, f"report_{pages}.pdf")
+            build_report(path, pages)
+            for workers in args.workers:
+                t0 = time.perf_counter()
+                items, meta = extract_statements(path, workers=workers)
+                dt = time.perf_counter() - t0
+                ok = abs(items.get('Total revenue', {}).get(2024, 0) - 5120.4e6) < 1
+                print(f"pages={pages:4d} workers={workers} time={dt:6.2f}s pages/sec={pages / dt:8.1f} "
+                      f"items={len(items):3d} found={meta['statement_pages']} revenue_ok={ok} peak_rss={peak_rss_mb():.0f}MB")
+
+if __name__ == '__main__': main()
@@ -0,0 +1,68 @@
+# benchmarks/bench_screener.py
+# Screens over ~50k company-years: indexed RatioTable vs looping over the nested result dicts.
+# Usage: python benchmarks/bench_screener.py [--companies 12500] [--years 4] [--repeat 50]
+import os
+import sys
+import io
+import time
+import argparse
+import contextlib
+
+script_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if script_dir not in sys.path: sys.path.append(script_dir)
+
+import numpy as np
+from test_loader import get_yahoo_data, normalize_dataframe, set_cache
+from modules.analyzer import frames_to_panel, calculate_ratios_panel, ratio_row_to_dict
+from modules.screener import RatioTable
+from modules import telemetry
+from synthetic import SyntheticUniverse
+
+SCREENS = [
+    "Z_Score > 2.99 and ROIC > 12 and CCC < 60",
+    "Debt_to_Equity < 0.5 and Total_Asset_Turnover > 0.5 and not Is_Paper_Profits",
+    "(ROE > 20 or Net_Margin > 15) and 0 < Net_Debt_to_EBITDA < 2 and M_Score < -1.78",
+]
+
+def loop_screen(results):
+    """The dict-walking baseline for SCREENS[0]."""
+    return [k for k, r in results if r['Forensics']['Z_Score'] > 2.99 and r['Analysis']['5_Management']['ROIC'] > 12
+            and r['Analysis']['2_Activity']['CCC'] < 60]
+
+def ms(fn, repeat):
+    t0 = time.perf_counter()
+    for _ in range(repeat): out = fn()
+    return out, (time.perf_counter() - t0) / repeat * 1000
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--companies', type=int, default=12_500)
+    ap.add_argument('--years', type=int, default=4)
+    ap.add_argument('--repeat', type=int, default=50)
+    args = ap.parse_args()
+
+    set_cache(False); telemetry.enable(False)
+    uni = SyntheticUniverse(args.companies, years=args.years, missing=0.05)
+    backend = uni.backend()
+    with contextlib.redirect_stdout(io.StringIO()):
+        frames = {t: normalize_dataframe(get_yahoo_data(t, backend=backend), 'yahoo') for t in uni.tickers}
+    for t, df in frames.items(): df['Market Cap'] = uni.info(t)['marketCap']
+    panel = calculate_ratios_panel(frames_to_panel(frames, compact=True)).rename(columns={'Ticker': 'Id'})
+    print(f"{len(panel):,d} company-years")
+
+    table, build = ms(lambda: RatioTable(panel), 1)
+    _, index_ms = ms(lambda: RatioTable(panel).build_indexes(), 1)
+    print(f"table build {build:8.1f} ms   all indexes {index_ms:8.1f} ms ({len(table.columns)} metrics)")
+    table.build_indexes()
+    for expr in SCREENS:
+        n, q = ms(lambda: table.count(expr), args.repeat)
+        rows, k = ms(lambda: table.screen(expr, by='ROIC', k=25), args.repeat)
+        print(f"{q:7.3f} ms count / {k:7.3f} ms top-25 -> {n:6d} rows | {expr}")
+
+    results = [(f"{r['Id']}/{r['Year']}", ratio_row_to_dict(r)) for r in panel.to_dict('records')]
+    hits, loop = ms(lambda: loop_screen(results), 3)
+    n, q = ms(lambda: table.count(SCREENS[0]), args.repeat)
+    assert n == len(hits), (n, len(hits))
+    print(f"dict loop {loop:8.1f} ms vs indexed {q:6.3f} ms ({loop / q:,.0f}x) for: {SCREENS[0]}")
+
+if __name__ == '__main__': main()
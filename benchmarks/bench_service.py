@@ -0,0 +1,103 @@
+# benchmarks/bench_service.py
+# Load test of service.py on one machine: in-process server, stubbed Yahoo (synthetic universe),
+# concurrent keep-alive clients. Batched vs one-request-per-analysis, cached, 304 and PDF scenarios.
+# Usage: python benchmarks/bench_service.py [--companies 400] [--clients 32] [--batch-ms 5] [--latency 0]
+import os
+import sys
+import io
+import time
+import argparse
+import tempfile
+import threading
+import contextlib
+import http.client
+
+script_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if script_dir not in sys.path: sys.path.append(script_dir)
+
+import numpy as np
+from test_loader import set_cache, get_company_df, load_company_info
+from modules.cache import FundamentalsCache
+from modules.memo import ArtifactCache
+from modules import telemetry
+from service import AnalysisService, make_server
+from synthetic import SyntheticUniverse
+
+def say(*args): print(*args, file=sys.__stdout__, flush=True) # stdout itself is muted: the loader prints per fetch
+
+def load(port, paths, clients, headers=None):
+    """GET every path from `clients` keep-alive connections; (latencies, statuses, seconds, etags)."""
+    latencies = np.zeros(len(paths)); statuses = [0] * len(paths); etags = [None] * len(paths)
+    cursor = iter(range(len(paths))); lock = threading.Lock()
+    def client():
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=120)
+        while True:
+            with lock: i = next(cursor, None)
+            if i is None: break
+            t0 = time.perf_counter()
+            conn.request('GET', paths[i], headers=(headers or {}).get(paths[i], {}))
+            resp = conn.getresponse(); resp.read()
+            latencies[i] = time.perf_counter() - t0; statuses[i] = resp.status; etags[i] = resp.getheader('ETag')
+        conn.close()
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    t0 = time.perf_counter()
+    for t in threads: t.start()
+    for t in threads: t.join()
+    return latencies, statuses, time.perf_counter() - t0, etags
+
+def report(name, result):
+    latencies, statuses, seconds, _ = result
+    ms = latencies * 1000; codes = {s: statuses.count(s) for s in sorted(set(statuses))}
+    say(f"{name:<28} {len(ms):6d} req {len(ms) / seconds:8.0f} req/s  p50 {np.percentile(ms, 50):7.2f} ms  p99 {np.percentile(ms, 99):8.2f} ms  {codes}")
+
+def serve(backend, **kwargs):
+    service = AnalysisService(backend=backend, responses=ArtifactCache(max_bytes=512 * 1024 * 1024, max_entries=100_000), **kwargs)
+    server = make_server(service, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return service, server
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--companies', type=int, default=400)
+    ap.add_argument('--years', type=int, default=5)
+    ap.add_argument('--clients', type=int, default=32, help="concurrent keep-alive connections")
+    ap.add_argument('--batch-ms', type=float, default=5.0)
+    ap.add_argument('--latency', type=float, default=0.0, help="seconds per simulated Yahoo response (cold cache only)")
+    ap.add_argument('--pdfs', type=int, default=40)
+    ap.add_argument('--pdf-workers', type=int, default=2)
+    args = ap.parse_args()
+    with contextlib.redirect_stdout(io.StringIO()): run(args)
+
+def run(args):
+    telemetry.enable(False)
+    set_cache(FundamentalsCache(tempfile.mkdtemp(prefix='valuepy-bench-')))
+    uni = SyntheticUniverse(args.companies, years=args.years, quarters=8)
+    backend = uni.backend(latency=args.latency)
+    t0 = time.perf_counter()
+    for t in uni.tickers: # warm the fundamentals cache: the scenarios measure the service, not the stub
+        get_company_df(t, 'yahoo', backend=backend); get_company_df(t, 'yahoo', backend=backend, freq='quarterly'); load_company_info(t, backend=backend)
+    say(f"{args.companies} companies, {args.clients} clients, batch window {args.batch_ms} ms; cache warmed in {time.perf_counter() - t0:.1f}s")
+
+    annual = [f"/v1/ratios/{t}" for t in uni.tickers]
+    ttm = [f"/v1/ratios/{t}?period=ttm" for t in uni.tickers]
+    for name, kwargs in [("unbatched", {'batch_ms': 0, 'max_batch': 1}), ("batched", {'batch_ms': args.batch_ms})]:
+        service, server = serve(backend, pdf_workers=0, **kwargs)
+        port = server.server_address[1]
+        report(f"{name} analyze (annual)", load(port, annual, args.clients))
+        report(f"{name} analyze (ttm)", load(port, ttm, args.clients))
+        say(f"{'':<28} {service.info()['batches']} batches for {service.info()['analyzed']} analyses")
+        server.shutdown(); server.server_close(); service.close()
+
+    service, server = serve(backend, batch_ms=args.batch_ms, pdf_workers=args.pdf_workers)
+    port = server.server_address[1]
+    first = load(port, annual, args.clients)
+    report("cached (200)", load(port, annual * 5, args.clients))
+    validators = {p: {'If-None-Match': tag} for p, tag in zip(annual, first[3])}
+    report("conditional (304)", load(port, annual * 5, args.clients, validators))
+    report("multi-ticker x20 (cached)", load(port, [f"/v1/ratios?tickers={','.join(uni.tickers[i:i + 20])}" for i in range(0, len(uni.tickers), 20)] * 5, args.clients))
+    pdfs = [f"/v1/report/{t}.pdf" for t in uni.tickers[:args.pdfs]]
+    report(f"pdf render ({args.pdf_workers} workers)", load(port, pdfs, args.clients))
+    report("pdf cached", load(port, pdfs * 5, args.clients))
+    server.shutdown(); server.server_close(); service.close()
+
+if __name__ == '__main__': main()
@@ -0,0 +1,55 @@
+# benchmarks/bench_startup.py
+# Cold-start import cost of the app / loader, eager (heavy deps at module level, as before)
+# vs lazy (heavy deps on first use). Each run is a fresh interpreter with -X importtime.
+# Usage: python benchmarks/bench_startup.py [--runs 5] [--top 8]
+import os
+import sys
+import re
+import argparse
+import statistics
+import subprocess
+
+script_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY = "import yfinance, fitz, fpdf, openpyxl, plotly.graph_objects"
+TARGETS = {
+    'loader': "import test_loader",
+    'app': ("import streamlit, test_loader, modules.analyzer, modules.report_generator, modules.memo, "
+            "modules.history, modules.benchmark, modules.valuation, modules.telemetry, modules.lazy"),
+}
+LINE_RE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+def importtime(code):
+    """Run code in a fresh interpreter -> (total seconds, {top-level module: cumulative seconds})."""
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=script_dir,
+                          capture_output=True, text=True, env={**os.environ, 'PYTHONDONTWRITEBYTECODE': '1'})
+    if proc.returncode: raise RuntimeError(proc.stderr[-2000:])
+    top = {}
+    for m in LINE_RE.finditer(proc.stderr):
+        if len(m.group(3)) == 1: top[m.group(4)] = top.get(m.group(4), 0) + int(m.group(2)) / 1e6 # depth-0 entries
+    return sum(top.values()), top
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--runs', type=int, default=5)
+    ap.add_argument('--top', type=int, default=8)
+    args = ap.parse_args()
+
+    for target, code in TARGETS.items():
+        for label, stmt in (('eager', f"{HEAVY}; {code}"), ('lazy', code)):
+            runs = [importtime(stmt) for _ in range(args.runs)]
+            totals = [t for t, _ in runs]
+            print(f"{target:<7} {label:<6} median {statistics.median(totals) * 1000:8.1f} ms  min {min(totals) * 1000:8.1f} ms")
+            if args.top == 0: continue
+            mods = {}
+            for _, top in runs:
+                for k, v in top.items(): mods.setdefault(k, []).append(v)
+            heaviest = sorted(((statistics.median(v), k) for k, v in mods.items()), reverse=True)[:args.top]
+            print("        heaviest:", ", ".join(f"{k} {v * 1000:.0f}ms" for v, k in heaviest))
+
+    # What the warm-up thread pays later, off the request path
+    code = "from modules.lazy import warm_up; import json; print(json.dumps(warm_up(background=False)))"
+    out = subprocess.run([sys.executable, '-c', code], cwd=script_dir, capture_output=True, text=True).stdout.strip().splitlines()
+    print(f"warm_up (background after start): {out[-1] if out else 'n/a'}")
+
+if __name__ == '__main__': main()
@@ -0,0 +1,61 @@
+# benchmarks/bench_ttm.py
+# Quarterly -> TTM -> ratios for a whole universe: time and memory of float32 vs float64 storage,
+# and the per-company loop it replaces.
+# Usage: python benchmarks/bench_ttm.py [--tickers 3000] [--quarters 40] [--width 20] [--loop 200]
+import os
+import sys
+import io
+import time
+import argparse
+import contextlib
+import tracemalloc
+
+script_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if script_dir not in sys.path: sys.path.append(script_dir)
+
+import numpy as np
+from test_loader import get_yahoo_data, normalize_dataframe, set_cache
+from modules.analyzer import calculate_ratios_wide, calculate_ratio_history, frames_to_panel
+from modules.ttm import stack_quarters, ttm_panel, company_ttm, memory_mb
+from modules import telemetry
+from synthetic import SyntheticUniverse
+
+def timed(fn):
+    """(result, seconds untraced, peak MB from a second traced run); tracemalloc would inflate the timing."""
+    t0 = time.perf_counter(); out = fn(); dt = time.perf_counter() - t0
+    tracemalloc.start(); fn(); peak = tracemalloc.get_traced_memory()[1]; tracemalloc.stop()
+    return out, dt, peak / 1024 / 1024
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--tickers', type=int, default=3000)
+    ap.add_argument('--quarters', type=int, default=40)
+    ap.add_argument('--width', type=int, default=20, help="extra unmapped line items per company")
+    ap.add_argument('--loop', type=int, default=200, help="companies timed through the per-company path")
+    args = ap.parse_args()
+
+    set_cache(False); telemetry.enable(False)
+    uni = SyntheticUniverse(args.tickers, quarters=args.quarters, width=args.width, missing=0.05)
+    backend = uni.backend()
+    with contextlib.redirect_stdout(io.StringIO()):
+        frames = {t: normalize_dataframe(get_yahoo_data(t, backend=backend, freq='quarterly'), 'yahoo') for t in uni.tickers}
+    print(f"{args.tickers} tickers x {args.quarters} quarters x ~{len(next(iter(frames.values())).columns)} fields")
+
+    for dtype in (np.float64, np.float32):
+        label = np.dtype(dtype).name
+        wide, dt_s, peak_s = timed(lambda: stack_quarters(frames, dtype=dtype))
+        ttm, dt_t, peak_t = timed(lambda: ttm_panel(wide, dtype=dtype))
+        ratios, dt_r, peak_r = timed(lambda: calculate_ratios_wide(ttm, period='ttm'))
+        print(f"{label:<8} stack {dt_s:6.2f}s ttm {dt_t:6.2f}s ratios {dt_r:6.2f}s | "
+              f"quarters {memory_mb(wide):7.1f}MB ttm {memory_mb(ttm):7.1f}MB | peak ttm {peak_t:6.1f}MB ratios {peak_r:6.1f}MB | {len(ratios):,d} rows")
+    panel = frames_to_panel({t: frames[t] for t in uni.tickers[:args.loop]})
+    compact = frames_to_panel({t: frames[t] for t in uni.tickers[:args.loop]}, compact=True)
+    print(f"long panel ({args.loop} tickers): {memory_mb(panel):.1f}MB object/float64 -> {memory_mb(compact):.1f}MB categorical/float32")
+
+    sample = uni.tickers[:args.loop]
+    t0 = time.perf_counter()
+    for t in sample: calculate_ratio_history(company_ttm(frames[t]), 'ttm')
+    per = (time.perf_counter() - t0) / len(sample)
+    print(f"per-company loop: {per * 1000:.2f} ms/company -> ~{per * args.tickers:.1f}s for the universe")
+
+if __name__ == '__main__': main()
@@ -0,0 +1,39 @@
+# benchmarks/bench_valuation.py
+# Time of the DCF/EVA sensitivity grid and Monte Carlo at UI and batch sizes, and peak memory.
+# Usage: python benchmarks/bench_valuation.py [--draws 200000 1000000] [--chunk 65536]
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+
+script_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if script_dir not in sys.path: sys.path.append(script_dir)
+
+import numpy as np
+from modules.valuation import valuation_inputs, sensitivity_grid, dcf_value, monte_carlo, DEFAULT_CHUNK
+from bench_app_rerun import sample_group
+
+def timed(fn):
+    tracemalloc.start(); t0 = time.perf_counter()
+    out = fn()
+    dt = time.perf_counter() - t0; peak = tracemalloc.get_traced_memory()[1]; tracemalloc.stop()
+    return out, dt, peak / 1024 / 1024
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--draws', type=int, nargs='+', default=[200_000, 1_000_000])
+    ap.add_argument('--chunk', type=int, default=DEFAULT_CHUNK)
+    args = ap.parse_args()
+    inputs = valuation_inputs(sample_group()['reports']['BENCH']['data'])
+
+    grid, dt, peak = timed(lambda: sensitivity_grid(inputs, chunk=args.chunk))
+    print(f"grid  {grid['dcf'].size:9,d} cells time={dt * 1000:7.1f}ms peak={peak:6.1f}MB")
+    axes = (np.linspace(0.05, 0.15, 100)[:, None, None], np.linspace(-0.05, 0.20, 100)[None, :, None], np.linspace(0.05, 0.30, 50)[None, None, :])
+    big, dt, peak = timed(lambda: dcf_value(inputs, *axes, chunk=args.chunk))
+    print(f"grid  {big.size:9,d} cells time={dt * 1000:7.1f}ms peak={peak:6.1f}MB")
+    for n in args.draws:
+        mc, dt, peak = timed(lambda: monte_carlo(inputs, n=n, seed=0, chunk=args.chunk, keep_samples=False, bins=60))
+        print(f"mc    {n:9,d} draws time={dt * 1000:7.1f}ms peak={peak:6.1f}MB  EV p50={mc['dcf']['p50'] / 1e6:,.0f}M")
+
+if __name__ == '__main__': main()
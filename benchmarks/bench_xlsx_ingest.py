@@ -0,0 +1,97 @@
+# benchmarks/bench_xlsx_ingest.py
+# Time and memory of get_xlsx_data on large generated workbooks,
+# against pandas.read_excel(sheet_name=None) which materializes every sheet.
+# Usage: python benchmarks/bench_xlsx_ingest.py [--rows 20000 50000] [--sheets 6] [--baseline]
+import os
+import sys
+import time
+import random
+import argparse
+import datetime
+import zipfile
+import tempfile
+import tracemalloc
+
+script_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if script_dir not in sys.path: sys.path.append(script_dir)
+
+import openpyxl
+import pandas as pd
+from test_loader import get_xlsx_data
+
+STATEMENT_SHEETS = {
+    'Income Statement': [('Total Revenue', 5120.4), ('Cost Of Revenue', 3011.9), ('Operating Income', 903.2),
+                         ('Net Income', 611.7), ('Basic EPS', 2.31)],
+    'Balance Sheet': [('Cash And Cash Equivalents', 812.3), ('Total Current Assets', 2220.8), ('Total Assets', 7420.6),
+                      ('Total Current Liabilities', 1510.2), ('Total Debt', 2100.0), ('Stockholders Equity', 3305.9)],
+    'Cash Flow': [('Operating Cash Flow', 880.5), ('Capital Expenditure', -402.3), ('Cash Dividends Paid', -120.0)],
+}
+YEARS = [2024, 2023, 2022, 2021]
+
+def build_workbook(path, rows, data_sheets):
+    wb = openpyxl.Workbook(write_only=True)
+    rnd = random.Random(0)
+    for s in range(data_sheets): # ledgers / pivots that must be skipped
+        ws = wb.create_sheet(f"Ledger {s + 1}")
+        ws.append(['Entry', 'Account', 'Posted', 'Amount', 'Memo'])
+        base = datetime.date(2024, 1, 1)
+        for r in range(rows):
+            ws.append([r, f"ACC-{rnd.randint(1000, 9999)}", base + datetime.timedelta(days=r % 365),
+                       round(rnd.uniform(-1e5, 1e5), 2), 'journal line'])
+        if s == 0: # statements sit between the ledgers
+            for title, items in STATEMENT_SHEETS.items():
+                st = wb.create_sheet(title)
+                st.append(['ACME Group plc']); st.append(['(in millions)']); st.append([])
+                st.append(['', *[f"FY{y}" for y in YEARS]])
+                for label, val in items:
+                    st.append([label, *[round(val * (0.92 ** k), 1) for k in range(len(YEARS))]])
+    wb.save(path)
+    stamp_dimensions(path)
+
+def stamp_dimensions(path, last_col='E'):
+    """
+    Excel writes <dimension ref="A1:E20001"/> in every sheet; openpyxl's write-only mode does not,
+    which forces read-only loads to scan each sheet for its size. Add it so the files look like
+    the workbooks analysts actually upload.
+    """
+    tmp = path + '.tmp'
+    with zipfile.ZipFile(path) as src, zipfile.ZipFile(tmp, 'w', zipfile.ZIP_DEFLATED) as dst:
+        for item in src.infolist():
+            data = src.read(item.filename)
+            if item.filename.startswith('xl/worksheets/sheet'):
+                xml = data.decode('utf-8')
+                start = xml.rfind('<row r="')
+                last_row = xml[start + 8:xml.index('"', start + 8)] if start >= 0 else '1'
+                data = xml.replace('</sheetPr>', f'</sheetPr><dimension ref="A1:{last_col}{last_row}"/>', 1).encode('utf-8')
+            dst.writestr(item, data)
+    os.replace(tmp, path)
+
+def measure(fn):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    out = fn()
+    dt = time.perf_counter() - t0
+    peak = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+    return out, dt, peak
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--rows', type=int, nargs='+', default=[20000, 50000])
+    ap.add_argument('--sheets', type=int, default=6)
+    ap.add_argument('--baseline', action='store_true', help='also time pandas.read_excel on every sheet')
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            path = os.path.join(tmp, f"book_{rows}.xlsx")
+            build_workbook(path, rows, args.sheets)
+            size = os.path.getsize(path) / 2**20
+            df, dt, peak = measure(lambda: get_xlsx_data(path))
+            ok = not df.empty and abs(df.loc[df['Year'] == 2024, 'Total Revenue'].iloc[0] - 5120.4e6) < 1
+            print(f"rows/sheet={rows:6d} sheets={args.sheets + 3} file={size:5.1f}MB  get_xlsx_data: {dt:6.2f}s peak={peak:6.1f}MB shape={df.shape} ok={ok}")
+            if args.baseline:
+                _, dt, peak = measure(lambda: pd.read_excel(path, sheet_name=None, engine='openpyxl'))
+                print(f"{'':40s}read_excel:    {dt:6.2f}s peak={peak:6.1f}MB")
+
+if __name__ == '__main__': main()
@@ -0,0 +1,152 @@
+# benchmarks/run_suite.py
+# Offline benchmark suite on synthetic yfinance-shaped data, with JSON baselines and regression gates.
+#
+#   python benchmarks/run_suite.py --save-baseline benchmarks/baselines/local.json
+#   python benchmarks/run_suite.py --baseline benchmarks/baselines/local.json   # exit 1 on regression
+#   python benchmarks/run_suite.py --sizes 1 100 --cases normalize analyze --width 60 --missing 0.2
+import os
+import sys
+import io
+import json
+import time
+import math
+import argparse
+import platform
+import datetime
+import tracemalloc
+import contextlib
+
+script_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if script_dir not in sys.path: sys.path.append(script_dir)
+
+import numpy as np
+import pandas as pd
+from test_loader import get_yahoo_data, normalize_dataframe, set_cache
+from modules.analyzer import calculate_financial_ratios
+from modules.report_generator import create_pdf_bytes
+from modules import telemetry
+from synthetic import SyntheticUniverse
+
+SIZES = [1, 100, 10_000]
+CASES = ['merge', 'normalize', 'analyze', 'pdf']
+TOLERANCE = 0.25 # allowed throughput drop / memory growth vs baseline
+MEM_SAMPLE = 100 # items traced per case for memory (tracemalloc slows everything down)
+MIN_SAMPLE_SECONDS = 0.2 # each timing sample repeats the pass until it lasts this long (timeit autorange)
+REPEAT = 7 # samples per case, fastest kept
+
+# === CASES: inputs are built once per size (untimed), RUN[case](item) is what gets timed ===
+class Inputs:
+    """Lazily chained stage outputs for one synthetic universe: raw -> normalized -> analyzed."""
+    def __init__(self, uni):
+        self.uni = uni; self.backend = uni.backend(preload=True); self._raw = self._frames = None
+
+    def raw(self):
+        if self._raw is None: self._raw = [get_yahoo_data(t, backend=self.backend) for t in self.uni.tickers]
+        return self._raw
+
+    def frames(self):
+        if self._frames is None:
+            self._frames = [normalize_dataframe(df, 'yahoo') for df in self.raw()]
+            for df in self._frames: df['Market Cap'] = 5e9
+        return self._frames
+
+    def for_case(self, case):
+        if case == 'merge': return [(t, self.backend) for t in self.uni.tickers]
+        if case == 'normalize': return self.raw()
+        if case == 'analyze': return self.frames()
+        return [(t, calculate_financial_ratios(df)) for t, df in zip(self.uni.tickers, self.frames())]
+
+RUN = {
+    'merge': lambda item: get_yahoo_data(item[0], backend=item[1]), # statement access + transpose + merge_statements
+    'normalize': lambda df: normalize_dataframe(df, 'yahoo'),
+    'analyze': lambda df: calculate_financial_ratios(df),
+    'pdf': lambda item: create_pdf_bytes(*item, generated_on='2024-12-31 00:00'),
+}
+
+def _timed_pass(fn, inputs, loops=1):
+    t0 = time.perf_counter()
+    for _ in range(loops):
+        for x in inputs: fn(x)
+    return time.perf_counter() - t0
+
+def measure(case, inputs, repeat, min_seconds=MIN_SAMPLE_SECONDS):
+    """
+    Seconds per pass over `inputs`: the fastest of `repeat` samples, each sample looping the pass
+    enough times to last `min_seconds`, so microsecond-scale cases are not timer / scheduler noise.
+    """
+    fn = RUN[case]
+    fn(inputs[0]) # warm-up: imports, lazy caches, first-call allocations
+    first = _timed_pass(fn, inputs) # also calibrates the loop count
+    loops = max(1, math.ceil(min_seconds / first)) if first > 0 else 1
+    best = first if loops == 1 else float('inf')
+    for _ in range(repeat): best = min(best, _timed_pass(fn, inputs, loops) / loops)
+    sample = inputs[:MEM_SAMPLE]
+    tracemalloc.start()
+    out = [fn(x) for x in sample]
+    peak = tracemalloc.get_traced_memory()[1]; tracemalloc.stop()
+    del out
+    return {'items': len(inputs), 'seconds': round(best, 6), 'items_per_s': round(len(inputs) / best, 2),
+            'peak_kb_per_item': round(peak / 1024 / len(sample), 2), 'loops': loops, 'repeat': repeat}
+
+# === BASELINES ===
+def environment():
+    return {'python': platform.python_version(), 'numpy': np.__version__, 'pandas': pd.__version__,
+            'machine': platform.machine(), 'cpus': os.cpu_count(), 'date': datetime.datetime.now().isoformat(timespec='seconds')}
+
+def compare(results, baseline, tolerance, mem_tolerance):
+    """[(key, metric, base, now, change)] for every result worse than the baseline beyond tolerance."""
+    regressions = []
+    for key, now in results.items():
+        base = baseline.get('results', {}).get(key)
+        if not base: continue
+        speed = now['items_per_s'] / base['items_per_s'] - 1
+        if speed < -tolerance: regressions.append((key, 'items_per_s', base['items_per_s'], now['items_per_s'], speed))
+        if base['peak_kb_per_item'] > 0:
+            mem = now['peak_kb_per_item'] / base['peak_kb_per_item'] - 1
+            if mem > mem_tolerance: regressions.append((key, 'peak_kb_per_item', base['peak_kb_per_item'], now['peak_kb_per_item'], mem))
+    return regressions
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="ValuePy offline benchmark suite")
+    ap.add_argument('--sizes', type=int, nargs='+', default=SIZES, help="companies per run")
+    ap.add_argument('--cases', nargs='+', choices=CASES, default=CASES)
+    ap.add_argument('--years', type=int, default=4)
+    ap.add_argument('--width', type=int, default=40, help="extra unmapped line items per company")
+    ap.add_argument('--missing', type=float, default=0.1, help="share of line items / cells missing")
+    ap.add_argument('--repeat', type=int, default=REPEAT, help="timing samples (fastest kept) for sizes up to 100")
+    ap.add_argument('--min-sample', type=float, default=MIN_SAMPLE_SECONDS, help="seconds each timing sample lasts at least (passes are looped)")
+    ap.add_argument('--out', help="write this run's results as JSON")
+    ap.add_argument('--save-baseline', help="write this run as the baseline JSON")
+    ap.add_argument('--baseline', help="compare against this baseline; exit 1 on regression")
+    ap.add_argument('--tolerance', type=float, default=TOLERANCE, help="allowed throughput drop (0.25 = 25%%)")
+    ap.add_argument('--mem-tolerance', type=float, default=TOLERANCE, help="allowed memory growth per item")
+    args = ap.parse_args(argv)
+
+    set_cache(False); telemetry.enable(False) # offline and uninstrumented
+    config = {'years': args.years, 'width': args.width, 'missing': args.missing}
+    results = {}
+    for n in args.sizes:
+        data = Inputs(SyntheticUniverse(n, **config))
+        for case in args.cases:
+            with contextlib.redirect_stdout(io.StringIO()): # the loader prints per company
+                res = measure(case, data.for_case(case), args.repeat if n <= 100 else 1, args.min_sample)
+            results[f"{case}@{n}"] = res
+            print(f"{case:<10} n={n:6d} {res['seconds']:9.3f}s {res['items_per_s']:10.1f} items/s {res['peak_kb_per_item']:9.1f} KB/item peak")
+
+    doc = {'environment': environment(), 'config': config, 'results': results}
+    for path in (args.out, args.save_baseline):
+        if not path: continue
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as fh: json.dump(doc, fh, indent=2)
+        print(f"results -> {path}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as fh: baseline = json.load(fh)
+        if baseline.get('config') != config: print(f"⚠️ baseline config {baseline.get('config')} differs from {config}")
+        regressions = compare(results, baseline, args.tolerance, args.mem_tolerance)
+        for key, metric, base, now, change in regressions: print(f"❌ {key} {metric}: {base} -> {now} ({change:+.0%})")
+        if regressions: return 1
+        print(f"✅ no regressions vs {args.baseline} (tolerance {args.tolerance:.0%} / {args.mem_tolerance:.0%})")
+    return 0
+
+if __name__ == '__main__': sys.exit(main())
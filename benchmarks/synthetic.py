@@ -0,0 +1,104 @@
+# benchmarks/synthetic.py
+# Offline generator of yfinance-shaped statements (line items x period dates, newest first),
+# plus a drop-in `backend` for get_yahoo_data / get_companies_batch. Deterministic per seed.
+#
+#   uni = SyntheticUniverse(tickers=100, years=4, width=40, missing=0.1)
+#   get_yahoo_data(uni.tickers[0], backend=uni.backend())
+#   get_yahoo_data(uni.tickers[0], backend=uni.backend(), freq='quarterly')   # quarterly_* statements
+import zlib
+import time
+import numpy as np
+import pandas as pd
+
+# Yahoo label -> share of revenue (balance sheet and cash flow scale off revenue too)
+INCOME_ITEMS = {
+    'Total Revenue': 1.0, 'Cost Of Revenue': 0.6, 'Gross Profit': 0.4, 'Selling General And Administration': 0.14,
+    'Operating Income': 0.18, 'EBITDA': 0.22, 'Interest Expense': 0.01, 'Net Income': 0.12,
+    'Basic EPS': 2.5e-9, 'Reconciled Depreciation': 0.04,
+}
+BALANCE_ITEMS = {
+    'Total Assets': 1.5, 'Current Assets': 0.45, 'Cash And Cash Equivalents': 0.16, 'Accounts Receivable': 0.12,
+    'Inventory': 0.09, 'Net PPE': 0.6, 'Current Liabilities': 0.3, 'Accounts Payable': 0.1,
+    'Total Debt': 0.42, 'Long Term Debt': 0.35, 'Stockholders Equity': 0.66, 'Retained Earnings': 0.38, 'Share Issued': 0.05,
+}
+CASHFLOW_ITEMS = {
+    'Operating Cash Flow': 0.17, 'Capital Expenditure': -0.08, 'Free Cash Flow': 0.09, 'Investing Cash Flow': -0.1,
+    'Financing Cash Flow': -0.05, 'Cash Dividends Paid': -0.03, 'Net Income': 0.12, 'Depreciation And Amortization': 0.04,
+}
+# Always kept so every company stays analyzable whatever the missing rate
+CORE_ITEMS = {'Total Revenue', 'Net Income', 'Total Assets', 'Stockholders Equity', 'Operating Cash Flow'}
+
+class SyntheticUniverse:
+    """
+    tickers: count or list; years: periods per statement; width: extra unmapped line items
+    spread over the three statements; missing: share of non-core items dropped per company
+    (plus the same share of NaN cells); camel: 'TotalRevenue' style labels instead of spaced;
+    quarters: periods per quarterly statement (flows are per quarter, with seasonality).
+    """
+    def __init__(self, tickers=100, years=4, width=0, missing=0.0, camel=False, seed=0, last_year=2024, quarters=5):
+        self.tickers = [f"SYN{i:05d}" for i in range(tickers)] if isinstance(tickers, int) else list(tickers)
+        self.years = years; self.width = width; self.missing = missing; self.camel = camel; self.seed = seed
+        self.dates = pd.to_datetime([f"{y}-12-31" for y in range(last_year, last_year - years, -1)])
+        self.quarter_dates = pd.date_range(end=f"{last_year}-12-31", periods=quarters, freq='QE')[::-1]
+
+    def _rng(self, ticker):
+        return np.random.default_rng([self.seed, zlib.crc32(str(ticker).encode('utf-8'))])
+
+    def _label(self, name): return name.replace(' ', '') if self.camel else name
+
+    def _statement(self, rng, items, revenue, extra, dates):
+        names = [n for n in items if n in CORE_ITEMS or rng.random() >= self.missing]
+        values = np.array([items[n] for n in names])[:, None] * revenue[None, :] * rng.uniform(0.85, 1.15, (len(names), len(dates)))
+        extras = [f"Other Line Item {i}" for i in extra]
+        if extras: values = np.vstack([values, revenue[None, :] * rng.uniform(0, 0.05, (len(extras), len(dates)))])
+        if self.missing:
+            holes = rng.random(values.shape) < self.missing
+            holes[[i for i, n in enumerate(names) if n in CORE_ITEMS]] = False
+            values[holes] = np.nan
+        return pd.DataFrame(values, index=[self._label(n) for n in names + extras], columns=dates)
+
+    def statements(self, ticker, freq='annual'):
+        """(financials, balance_sheet, cashflow) exactly as yf.Ticker(t) exposes them (quarterly_* for freq='quarterly')."""
+        rng = self._rng(ticker)
+        base = rng.lognormal(np.log(2e9), 1.2)
+        split = np.array_split(np.arange(self.width), 3)
+        if freq == 'quarterly':
+            dates = self.quarter_dates
+            growth = rng.normal(0.0125, 0.03, len(dates))
+            season = 1 + 0.08 * np.sin(np.pi / 2 * dates.quarter.to_numpy() + rng.uniform(0, 2 * np.pi))
+            flow = base / 4 / np.cumprod(1 + growth) * season # per-quarter revenue, newest first
+            stock = flow * 4 # balance sheet scales off annualized revenue
+        else:
+            dates = self.dates
+            growth = rng.normal(0.05, 0.08, self.years)
+            flow = stock = base / np.cumprod(1 + growth) # newest first: older periods are smaller on average
+        return (self._statement(rng, INCOME_ITEMS, flow, split[0], dates),
+                self._statement(rng, BALANCE_ITEMS, stock, split[1], dates),
+                self._statement(rng, CASHFLOW_ITEMS, flow, split[2], dates))
+
+    def info(self, ticker):
+        rng = self._rng(ticker)
+        return {'marketCap': float(rng.lognormal(np.log(5e9), 1.0)), 'longName': f"{ticker} Holdings",
+                'sector': ['Technology', 'Industrials', 'Energy', 'Healthcare', 'Utilities'][int(rng.integers(5))], 'currency': 'USD'}
+
+    def backend(self, preload=False, latency=0.0):
+        """
+        Object with a yfinance-like `Ticker` attribute (pass as backend=...).
+        preload=True generates every ticker up front, so timings exclude the generator.
+        latency: seconds slept per Ticker() (a slow Yahoo response), releasing the GIL like real I/O.
+        """
+        universe = self
+        built = {t: self.statements(t) for t in self.tickers} if preload else {}
+        built_q = {t: self.statements(t, 'quarterly') for t in self.tickers} if preload else {}
+        class _Ticker:
+            def __init__(self, ticker):
+                if latency: time.sleep(latency)
+                self.ticker = ticker
+                self.financials, self.balance_sheet, self.cashflow = built.get(ticker) or universe.statements(ticker)
+            @property
+            def info(self): return universe.info(self.ticker)
+            def _quarterly(self, i): return (built_q.get(self.ticker) or universe.statements(self.ticker, 'quarterly'))[i]
+            quarterly_financials = property(lambda self: self._quarterly(0))
+            quarterly_balance_sheet = property(lambda self: self._quarterly(1))
+            quarterly_cashflow = property(lambda self: self._quarterly(2))
+        return type('SyntheticYF', (), {'Ticker': _Ticker})
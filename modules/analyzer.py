@@ -1,186 +1,445 @@
-# modules/analyzer.py (v8.0 - CFA Full Spec)
+# modules/analyzer.py (v10.0 - CFA Full Spec, vectorized multi-year panel engine)
 import pandas as pd
 import numpy as np
+from modules.telemetry import count, instrumented
 
-def calculate_financial_ratios(df: pd.DataFrame, sector: str = "General") -> dict:
-    if df.empty: return {}
+# === FIELD SOURCES ===
+# First non-NaN column wins (same fallback order as the old per-row get_val helper).
+FIELD_SOURCES = {
+    # Income Statement
+    'revenue': ['Revenue', 'TotalRevenue', 'Sales'],
+    'cogs': ['CostOfGoodsSold', 'CostOfRevenue'],
+    'ebit': ['OperatingIncome', 'EBIT'],
+    'net_income': ['NetIncome', 'NetIncomeCommonStockholders'],
+    'interest': ['InterestExpense', 'Interest'],
+    'ebitda': ['EBITDA'],
+    'depreciation': ['ReconciledDepreciation', 'DepreciationAndAmortization'],
+    'sga': ['SellingGeneralAndAdministration', 'SellingGeneralAndAdministrative'],
+    'eps': ['BasicEPS'],
+    # Balance Sheet
+    'cash': ['Cash', 'CashAndCashEquivalents'],
+    'receivables': ['Receivables', 'AccountsReceivable', 'NetReceivables'],
+    'inventory': ['Inventory'],
+    'payables': ['Payables', 'AccountsPayable'],
+    'ca_fallback': ['CurrentAssets'],
+    'cl_fallback': ['CurrentLiabilities'],
+    'current_assets': ['CurrentAssets', 'TotalCurrentAssets'],
+    'current_liabilities': ['CurrentLiabilities', 'TotalCurrentLiabilities'],
+    'total_assets': ['TotalAssets'],
+    'total_equity': ['TotalEquity', 'StockholdersEquity'],
+    'total_debt': ['TotalDebt', 'LongTermDebtAndCapitalLeaseObligation'],
+    'long_term_debt': ['LongTermDebt'],
+    'current_debt': ['CurrentDebt'],
+    'net_ppe': ['NetPPE', 'PropertyPlantEquipmentNet'],
+    'retained_earnings': ['RetainedEarnings'],
+    # Cash Flow
+    'cfo': ['OperatingCashFlow', 'TotalCashFromOperatingActivities'],
+    'cfi': ['InvestingCashFlow', 'TotalCashflowsFromInvestingActivities'],
+    'cff': ['FinancingCashFlow', 'TotalCashFromFinancingActivities'],
+    'capex': ['CapitalExpenditures', 'CapEx'],
+    'dividends': ['CashDividendsPaid', 'DividendsPaid'],
+    # Shares / Market
+    'shares': ['ShareIssued', 'CommonStockSharesOutstanding'],
+    'market_cap': ['Market Cap'],
+}
+
+# Output layout of calculate_financial_ratios (group -> metric names)
+RATIO_GROUPS = {
+    '1_Liquidity': ['Current_Ratio', 'Quick_Ratio', 'Cash_Ratio'],
+    '2_Activity': ['DSO', 'DSI', 'DPO', 'CCC', 'Total_Asset_Turnover', 'Fixed_Asset_Turnover'],
+    '3_Solvency': ['Debt_to_Equity', 'Net_Debt_to_EBITDA', 'Interest_Coverage', 'Fin_Lev_Multiplier'],
+    '4_Profitability': ['Gross_Margin', 'EBITDA_Margin', 'Operating_Margin', 'Net_Margin'],
+    '5_Management': ['ROE', 'ROA', 'ROIC'],
+    '6_Per_Share': ['EPS', 'Dividend_Payout', 'BVPS'],
+    '7_Cash_Flow': ['CFO', 'CFI', 'CFF', 'FCF', 'CAPEX_Sales'],
+}
+FORENSIC_FIELDS = ['Z_Score', 'M_Score', 'Health_Score', 'Is_Paper_Profits', 'Gap']
+VALUATION_FIELDS = ['Invested_Capital', 'NOPAT', 'EVA']
+# Beneish M-Score variables (year t vs t-1) and YoY growth rates (%)
+BENEISH_FIELDS = ['DSRI', 'GMI', 'AQI', 'SGI', 'DEPI', 'SGAI', 'LVGI', 'TATA']
+BENEISH_WEIGHTS = {'DSRI': 0.92, 'GMI': 0.528, 'AQI': 0.404, 'SGI': 0.892, 'DEPI': 0.115,
+                   'SGAI': -0.172, 'LVGI': -0.327, 'TATA': 4.679}
+BENEISH_INTERCEPT = -4.84
+M_SCORE_DEFAULT = -2.5 # no prior year -> Default Safe
+GROWTH_FIELDS = ['Revenue_Growth', 'EBIT_Growth', 'Net_Income_Growth', 'EPS_Growth', 'FCF_Growth', 'Equity_Growth']
+
+TAX_RATE = 0.25 # Assumption
+
+# --- Column helpers (NumPy, one call per field for the whole panel) ---
+SOURCE_COLUMNS = frozenset(c for cols in FIELD_SOURCES.values() for c in cols)
+
+def _source_columns(wide) -> dict:
+    """Every FIELD_SOURCES column of `wide` as float64 (numeric columns in one block conversion; duplicated labels -> first)."""
+    names = wide.columns.tolist(); first = {}
+    for i, c in enumerate(names):
+        if c in SOURCE_COLUMNS and c not in first: first[c] = i
+    dtypes = wide.dtypes.to_numpy()
+    numeric = sorted(i for i in first.values() if dtypes[i].kind in 'iufb') # monotonic take: the cheap path
+    block = wide.take(numeric, axis=1).to_numpy(dtype=np.float64, na_value=np.nan) if numeric else None
+    out = {names[i]: block[:, j] for j, i in enumerate(numeric)}
+    for c, i in first.items():
+        if c not in out: out[c] = pd.to_numeric(wide.iloc[:, i], errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+    return out
+
+def _field(cols, n, name, default=0.0):
+    """First non-NaN source column per row (see FIELD_SOURCES), `default` when none has a value."""
+    out = None
+    for k in FIELD_SOURCES[name]:
+        v = cols.get(k)
+        if v is not None: out = v if out is None else np.where(np.isnan(out), v, out)
+    return np.full(n, default) if out is None else np.where(np.isnan(out), default, out)
+
+def _nan_to_num(x):
+    """np.nan_to_num without its fixed per-call cost when there is no infinity (the usual case)."""
+    x = np.where(np.isnan(x), 0.0, x)
+    return np.nan_to_num(x) if np.isinf(x).any() else x
+
+def _safe_div(a, b):
+    a, b = np.asarray(a, dtype=float), np.asarray(b, dtype=float)
+    if a.shape != b.shape: a, b = np.broadcast_arrays(a, b)
+    return np.divide(a, b, out=np.zeros(a.shape), where=b != 0)
+
+PERIODS = ('annual', 'ttm')
+PRIOR_TOLERANCE_DAYS = 45 # TTM: the comparison period ends one year earlier, give or take a fiscal calendar shift
+
+def _prior_index(groups, dates=None):
+    """
+    Row of the comparison period for every row (-1 = none), rows newest-first within each group.
+    Annual: the next row of the same company. With period-end `dates` (TTM): the row of the same
+    company ending one year earlier, so overlapping quarterly windows compare year over year.
+    """
+    n = len(groups)
+    idx = np.full(n, -1)
+    if dates is None:
+        same = np.zeros(n, dtype=bool)
+        same[:-1] = groups[:-1] == groups[1:]
+        idx[:-1] = np.where(same[:-1], np.arange(1, n), -1)
+        return idx
+    if n == 0: return idx
+    days = np.asarray(dates, dtype='datetime64[D]').astype(np.int64)
+    _, g = np.unique(groups, return_inverse=True)
+    key = g.astype(np.int64) * 1_000_000 + days # one sortable axis: company, then day
+    order = np.argsort(key, kind='stable'); sorted_key = key[order]
+    target = key - 365
+    pos = np.searchsorted(sorted_key, target)
+    lo, hi = np.clip(pos - 1, 0, n - 1), np.clip(pos, 0, n - 1) # nearest period on either side of the target day
+    nearest = np.where(np.abs(sorted_key[hi] - target) < np.abs(sorted_key[lo] - target), hi, lo)
+    found = order[nearest]
+    ok = (g[found] == g) & (np.abs(key[found] - target) <= PRIOR_TOLERANCE_DAYS)
+    return np.where(ok, found, -1)
 
-    # Sort (Newest first)
-    df = df.sort_values(by='Year', ascending=False).reset_index(drop=True)
-    t = df.iloc[0]
-    
-    # --- Helpers ---
-    def get_val(source, keys, default=0):
-        if isinstance(keys, str): keys = [keys]
-        for k in keys:
-            val = pd.to_numeric(source.get(k), errors='coerce')
-            if not pd.isna(val): return float(val)
-        return float(default)
-
-    def safe_div(a, b):
-        return a / b if b != 0 else 0
+def _prior(arr, idx):
+    """Value of the comparison period (see _prior_index); NaN where there is none."""
+    return np.where(idx >= 0, arr[np.maximum(idx, 0)], np.nan)
+
+def _index_ratio(cur, prev):
+    """Beneish index t / t-1; neutral 1.0 when either side is missing or zero."""
+    cur, prev = _nan_to_num(cur), _nan_to_num(prev)
+    return np.where((cur != 0) & (prev != 0), _safe_div(cur, prev), 1.0)
+
+def _growth(cur, prev):
+    """YoY change in %, 0 when there is no prior year."""
+    prev = _nan_to_num(prev)
+    return np.round(_safe_div(cur - prev, np.abs(prev)) * 100, 2)
+
+def _compute_ratio_frame(wide: pd.DataFrame, groups=None, dates=None) -> pd.DataFrame:
+    """
+    All seven ratio groups, Z/M-Score, growth and Health Score for every row of a wide frame.
+    Rows must be newest-first within each company; `groups` labels the company of each row
+    (None = a single company), so year t-1 is simply the next row of the same group.
+    With `dates` (TTM rows) t-1 is the row of the same group ending a year earlier instead.
+    """
+    return pd.DataFrame(_compute_ratios(_source_columns(wide), len(wide), groups, dates), index=wide.index)
+
+def _compute_ratios(cols: dict, n: int, groups=None, dates=None) -> dict:
+    """_compute_ratio_frame on {source column: float array} (see _source_columns); metric -> array."""
+    f = lambda name: _field(cols, n, name)
+    count('analyzer.rows', n)
+    groups = np.zeros(n, dtype=int) if groups is None else np.asarray(groups)
+    prior_idx = _prior_index(groups, dates)
+    prior = lambda arr: _prior(arr, prior_idx)
 
     # === 1. DATA EXTRACTION ===
-    # Income Statement
-    revenue = get_val(t, ['Revenue', 'TotalRevenue', 'Sales'])
-    cogs = get_val(t, ['CostOfGoodsSold', 'CostOfRevenue'])
-    ebit = get_val(t, ['OperatingIncome', 'EBIT'])
-    net_income = get_val(t, ['NetIncome', 'NetIncomeCommonStockholders'])
-    interest = abs(get_val(t, ['InterestExpense', 'Interest']))
-    
-    # EBITDA Calculation
-    ebitda = get_val(t, 'EBITDA')
-    if ebitda == 0: 
-        depreciation = get_val(t, ['ReconciledDepreciation', 'DepreciationAndAmortization'])
-        ebitda = ebit + depreciation
+    revenue = f('revenue'); cogs = f('cogs'); ebit = f('ebit'); net_income = f('net_income')
+    interest = np.abs(f('interest'))
+    ebitda = f('ebitda')
+    ebitda = np.where(ebitda == 0, ebit + f('depreciation'), ebitda)
 
-    # Balance Sheet
-    cash = get_val(t, ['Cash', 'CashAndCashEquivalents'])
-    receivables = get_val(t, ['Receivables', 'AccountsReceivable', 'NetReceivables']) 
-    if receivables == 0: receivables = get_val(t, 'CurrentAssets') * 0.2 # Fallback
-    
-    inventory = get_val(t, 'Inventory')
-    payables = get_val(t, ['Payables', 'AccountsPayable'])
-    if payables == 0: payables = get_val(t, 'CurrentLiabilities') * 0.2 # Fallback
-
-    current_assets = get_val(t, ['CurrentAssets', 'TotalCurrentAssets'])
-    current_liabilities = get_val(t, ['CurrentLiabilities', 'TotalCurrentLiabilities'])
-    total_assets = get_val(t, 'TotalAssets')
-    total_equity = get_val(t, ['TotalEquity', 'StockholdersEquity'])
-    
-    # Debt
-    total_debt = get_val(t, ['TotalDebt', 'LongTermDebtAndCapitalLeaseObligation'])
-    if total_debt == 0: total_debt = get_val(t, 'LongTermDebt') + get_val(t, 'CurrentDebt')
-    net_debt = total_debt - cash
+    cash = f('cash')
+    receivables = f('receivables')
+    receivables = np.where(receivables == 0, f('ca_fallback') * 0.2, receivables) # Fallback
+    inventory = f('inventory')
+    payables = f('payables')
+    payables = np.where(payables == 0, f('cl_fallback') * 0.2, payables) # Fallback
 
-    # Fixed Assets (Net PPE)
-    net_ppe = get_val(t, ['NetPPE', 'PropertyPlantEquipmentNet'])
+    current_assets = f('current_assets'); current_liabilities = f('current_liabilities')
+    total_assets = f('total_assets'); total_equity = f('total_equity')
 
-    # Cash Flow
-    cfo = get_val(t, ['OperatingCashFlow', 'TotalCashFromOperatingActivities'])
-    cfi = get_val(t, ['InvestingCashFlow', 'TotalCashflowsFromInvestingActivities'])
-    cff = get_val(t, ['FinancingCashFlow', 'TotalCashFromFinancingActivities'])
-    capex = abs(get_val(t, ['CapitalExpenditures', 'CapEx']))
-    dividends = abs(get_val(t, ['CashDividendsPaid', 'DividendsPaid']))
+    total_debt = f('total_debt')
+    total_debt = np.where(total_debt == 0, f('long_term_debt') + f('current_debt'), total_debt)
+    net_debt = total_debt - cash
+    net_ppe = f('net_ppe')
 
-    # Shares
-    shares = get_val(t, ['ShareIssued', 'CommonStockSharesOutstanding'])
-    market_cap = get_val(t, 'Market Cap')
+    cfo = f('cfo'); cfi = f('cfi'); cff = f('cff')
+    capex = np.abs(f('capex')); dividends = np.abs(f('dividends'))
+    shares = f('shares'); market_cap = f('market_cap')
 
     # === 2. CALCULATIONS (THE 7 CATEGORIES) ===
+    out = {}
+    out['Current_Ratio'] = np.round(_safe_div(current_assets, current_liabilities), 2)
+    out['Quick_Ratio'] = np.round(_safe_div(current_assets - inventory, current_liabilities), 2)
+    out['Cash_Ratio'] = np.round(_safe_div(cash, current_liabilities), 2)
 
-    # 1. Ρευστότητα (Liquidity)
-    liq = {
-        'Current_Ratio': round(safe_div(current_assets, current_liabilities), 2),
-        'Quick_Ratio': round(safe_div(current_assets - inventory, current_liabilities), 2),
-        'Cash_Ratio': round(safe_div(cash, current_liabilities), 2)
-    }
-
-    # 2. Δραστηριότητα & Αποδοτικότητα (Activity & Efficiency)
-    dso = safe_div(receivables, revenue) * 365
-    dsi = safe_div(inventory, cogs) * 365
-    dpo = safe_div(payables, cogs) * 365
-    act = {
-        'DSO': round(dso, 0),
-        'DSI': round(dsi, 0),
-        'DPO': round(dpo, 0),
-        'CCC': round(dso + dsi - dpo, 0),
-        'Total_Asset_Turnover': round(safe_div(revenue, total_assets), 2),
-        'Fixed_Asset_Turnover': round(safe_div(revenue, net_ppe), 2)
-    }
+    dso = _safe_div(receivables, revenue) * 365
+    dsi = _safe_div(inventory, cogs) * 365
+    dpo = _safe_div(payables, cogs) * 365
+    out['DSO'] = np.round(dso, 0); out['DSI'] = np.round(dsi, 0); out['DPO'] = np.round(dpo, 0)
+    out['CCC'] = np.round(dso + dsi - dpo, 0)
+    out['Total_Asset_Turnover'] = np.round(_safe_div(revenue, total_assets), 2)
+    out['Fixed_Asset_Turnover'] = np.round(_safe_div(revenue, net_ppe), 2)
 
-    # 3. Μόχλευση & Κάλυψη (Solvency & Coverage)
-    sol = {
-        'Debt_to_Equity': round(safe_div(total_debt, total_equity), 2),
-        'Net_Debt_to_EBITDA': round(safe_div(net_debt, ebitda), 2),
-        'Interest_Coverage': round(safe_div(ebit, interest), 2),
-        'Fin_Lev_Multiplier': round(safe_div(total_assets, total_equity), 2)
-    }
+    out['Debt_to_Equity'] = np.round(_safe_div(total_debt, total_equity), 2)
+    out['Net_Debt_to_EBITDA'] = np.round(_safe_div(net_debt, ebitda), 2)
+    out['Interest_Coverage'] = np.round(_safe_div(ebit, interest), 2)
+    out['Fin_Lev_Multiplier'] = np.round(_safe_div(total_assets, total_equity), 2)
 
-    # 4. Κερδοφορία (Profitability Margins)
-    prof = {
-        'Gross_Margin': round(safe_div(revenue - cogs, revenue) * 100, 2),
-        'EBITDA_Margin': round(safe_div(ebitda, revenue) * 100, 2),
-        'Operating_Margin': round(safe_div(ebit, revenue) * 100, 2),
-        'Net_Margin': round(safe_div(net_income, revenue) * 100, 2)
-    }
+    out['Gross_Margin'] = np.round(_safe_div(revenue - cogs, revenue) * 100, 2)
+    out['EBITDA_Margin'] = np.round(_safe_div(ebitda, revenue) * 100, 2)
+    out['Operating_Margin'] = np.round(_safe_div(ebit, revenue) * 100, 2)
+    out['Net_Margin'] = np.round(_safe_div(net_income, revenue) * 100, 2)
 
-    # 5. Δείκτες Απόδοσης Διοίκησης (Management Return Ratios)
-    # ROIC Calculation: NOPAT / Invested Capital
-    tax_rate = 0.25 # Assumption
-    nopat = ebit * (1 - tax_rate)
+    nopat = ebit * (1 - TAX_RATE)
     invested_capital = total_equity + total_debt - cash
-    
-    mgmt = {
-        'ROE': round(safe_div(net_income, total_equity) * 100, 2),
-        'ROA': round(safe_div(net_income, total_assets) * 100, 2),
-        'ROIC': round(safe_div(nopat, invested_capital) * 100, 2)
-    }
+    out['ROE'] = np.round(_safe_div(net_income, total_equity) * 100, 2)
+    out['ROA'] = np.round(_safe_div(net_income, total_assets) * 100, 2)
+    out['ROIC'] = np.round(_safe_div(nopat, invested_capital) * 100, 2)
 
-    # 6. Δεδομένα Ανά Μετοχή (Per Share Data)
-    eps = get_val(t, 'BasicEPS') 
-    if eps == 0: eps = safe_div(net_income, shares)
-    
-    per_share = {
-        'EPS': round(eps, 2),
-        'Dividend_Payout': round(safe_div(dividends, net_income) * 100, 2),
-        'BVPS': round(safe_div(total_equity, shares), 2)
-    }
+    eps = f('eps')
+    eps = np.where(eps == 0, _safe_div(net_income, shares), eps)
+    out['EPS'] = np.round(eps, 2)
+    out['Dividend_Payout'] = np.round(_safe_div(dividends, net_income) * 100, 2)
+    out['BVPS'] = np.round(_safe_div(total_equity, shares), 2)
 
-    # 7. Ταμειακές Ροές (Cash Flows Fundamentals)
-    cf = {
-        'CFO': cfo,
-        'CFI': cfi,
-        'CFF': cff,
-        'FCF': cfo - capex,
-        'CAPEX_Sales': round(safe_div(capex, revenue) * 100, 2)
-    }
+    out['CFO'] = cfo; out['CFI'] = cfi; out['CFF'] = cff
+    out['FCF'] = cfo - capex
+    out['CAPEX_Sales'] = np.round(_safe_div(capex, revenue) * 100, 2)
 
     # === FORENSICS (Z-Score / M-Score) ===
-    # Altman Z-Score
     wc = current_assets - current_liabilities
-    re = get_val(t, 'RetainedEarnings')
-    A = safe_div(wc, total_assets)
-    B = safe_div(re, total_assets)
-    C = safe_div(ebit, total_assets)
-    D = safe_div(market_cap, total_debt) if total_debt > 0 else 0
-    E = safe_div(revenue, total_assets)
+    A = _safe_div(wc, total_assets)
+    B = _safe_div(f('retained_earnings'), total_assets)
+    C = _safe_div(ebit, total_assets)
+    D = np.where(total_debt > 0, _safe_div(market_cap, total_debt), 0)
+    E = _safe_div(revenue, total_assets)
     z_score = 1.2*A + 1.4*B + 3.3*C + 0.6*D + 1.0*E
 
-    # Beneish M-Score (Simplified Proxy due to limited historical data in single pass)
-    # Note: Full M-Score requires previous year data which might be complex in this structure, 
-    # so we keep a simplified version or placeholders.
-    m_score = -2.5 # Default Safe
+    # Health Score (thresholds on the rounded ratios, like the report shows them)
+    score = (np.where(cfo > net_income, 20, 0) + np.where(out['Interest_Coverage'] > 3, 15, 0)
+             + np.where(out['ROE'] > 15, 15, 0) + np.where(z_score > 2.99, 25, 0)
+             + np.where(out['Net_Margin'] > 10, 15, 0) + np.where(out['Debt_to_Equity'] < 1.0, 10, 0))
+
+    # Beneish M-Score (8 variables, year-over-year)
+    sga = f('sga'); dep = f('depreciation')
+    lt_debt = f('long_term_debt'); lt_debt = np.where(lt_debt == 0, total_debt, lt_debt)
+    gm = _safe_div(revenue - cogs, revenue)
+    aq = 1 - _safe_div(current_assets + net_ppe, total_assets)
+    dep_rate = _safe_div(dep, dep + net_ppe)
+    lev = _safe_div(current_liabilities + lt_debt, total_assets)
+    m = {
+        'DSRI': _index_ratio(_safe_div(receivables, revenue), prior(_safe_div(receivables, revenue))),
+        'GMI': _index_ratio(prior(gm), gm),
+        'AQI': _index_ratio(aq, prior(aq)),
+        'SGI': _index_ratio(revenue, prior(revenue)),
+        'DEPI': _index_ratio(prior(dep_rate), dep_rate),
+        'SGAI': _index_ratio(_safe_div(sga, revenue), prior(_safe_div(sga, revenue))),
+        'LVGI': _index_ratio(lev, prior(lev)),
+        'TATA': _safe_div(net_income - cfo, total_assets),
+    }
+    has_prior = ~np.isnan(prior(revenue)) & (prior(revenue) != 0)
+    m_score = BENEISH_INTERCEPT + sum(BENEISH_WEIGHTS[k] * m[k] for k in BENEISH_FIELDS)
+    for k in BENEISH_FIELDS: out[k] = np.round(m[k] if k == 'TATA' else np.where(has_prior, m[k], np.nan), 3) # TATA needs no t-1
 
-    # Health Score
-    score = 0
-    if cfo > net_income: score += 20
-    if sol['Interest_Coverage'] > 3: score += 15
-    if mgmt['ROE'] > 15: score += 15
-    if z_score > 2.99: score += 25
-    if prof['Net_Margin'] > 10: score += 15
-    if sol['Debt_to_Equity'] < 1.0: score += 10
+    # YoY growth (%)
+    out['Revenue_Growth'] = _growth(revenue, prior(revenue))
+    out['EBIT_Growth'] = _growth(ebit, prior(ebit))
+    out['Net_Income_Growth'] = _growth(net_income, prior(net_income))
+    out['EPS_Growth'] = _growth(eps, prior(eps))
+    out['FCF_Growth'] = _growth(cfo - capex, prior(cfo - capex))
+    out['Equity_Growth'] = _growth(total_equity, prior(total_equity))
 
+    out['Z_Score'] = np.round(z_score, 2)
+    out['M_Score'] = np.round(np.where(has_prior, m_score, M_SCORE_DEFAULT), 2)
+    out['Health_Score'] = score.astype(int)
+    out['Is_Paper_Profits'] = cfo < net_income
+    out['Gap'] = net_income - cfo
+    out['Invested_Capital'] = invested_capital
+    out['NOPAT'] = nopat
+    out['EVA'] = np.zeros(n) # Calculated in App
+    return out
+
+def ratio_row_to_dict(row) -> dict:
+    """Nest one row of a ratio frame back into the Analysis/Forensics/Valuation layout."""
+    num = lambda v: float(v)
     return {
-        'Analysis': {
-            '1_Liquidity': liq,
-            '2_Activity': act,
-            '3_Solvency': sol,
-            '4_Profitability': prof,
-            '5_Management': mgmt,
-            '6_Per_Share': per_share,
-            '7_Cash_Flow': cf
-        },
+        'Analysis': {g: {k: num(row[k]) for k in keys} for g, keys in RATIO_GROUPS.items()},
         'Forensics': {
-            'Z_Score': round(z_score, 2),
-            'M_Score': round(m_score, 2),
-            'Health_Score': score,
-            'Is_Paper_Profits': cfo < net_income,
-            'Gap': net_income - cfo
+            'Z_Score': num(row['Z_Score']),
+            'M_Score': num(row['M_Score']),
+            'Health_Score': int(row['Health_Score']),
+            'Is_Paper_Profits': bool(row['Is_Paper_Profits']),
+            'Gap': num(row['Gap']),
+            'M_Score_Components': {k: (None if pd.isna(row[k]) else num(row[k])) for k in BENEISH_FIELDS}
         },
-        'Valuation': {
-            'Invested_Capital': invested_capital,
-            'NOPAT': nopat,
-            'EVA': 0 # Calculated in App
-        }
-    }
\ No newline at end of file
+        'Growth': {k: num(row[k]) for k in GROWTH_FIELDS},
+        'Valuation': {k: num(row[k]) for k in VALUATION_FIELDS}
+    }
+
+def flatten_ratios(res: dict) -> dict:
+    """Nested result of calculate_financial_ratios -> one flat {metric: value} row."""
+    row = {}
+    for group in res.get('Analysis', {}).values(): row.update(group)
+    forensics = dict(res.get('Forensics', {}))
+    row.update(forensics.pop('M_Score_Components', {})); row.update(forensics)
+    row.update(res.get('Growth', {})); row.update(res.get('Valuation', {}))
+    return row
+
+TREND_FIELDS = [k for g in RATIO_GROUPS.values() for k in g] + ['Z_Score', 'M_Score', 'Health_Score'] + GROWTH_FIELDS
+
+def quarter_labels(dates) -> list:
+    """Period-end dates -> '2024Q3' style labels (calendar quarter of the period end)."""
+    d = pd.DatetimeIndex(dates)
+    return [f"{y}Q{q}" for y, q in zip(d.year, d.quarter)]
+
+def calculate_ratio_history(df: pd.DataFrame, period: str = 'annual') -> pd.DataFrame:
+    """
+    Every ratio for every period of one company, newest first.
+    annual: one row per Year. ttm: one row per trailing-twelve-month window (see modules.ttm),
+    with Date and Period columns too; growth and M-Score compare against the window a year earlier.
+    """
+    if df.empty: return pd.DataFrame()
+    if period not in PERIODS: raise ValueError(f"period must be one of {PERIODS}")
+    if period == 'ttm':
+        df = df.sort_values(by='Date', ascending=False).reset_index(drop=True)
+        ratios = _compute_ratio_frame(df, dates=df['Date'].to_numpy())
+        ratios.insert(0, 'Period', quarter_labels(df['Date']))
+        ratios.insert(0, 'Date', df['Date'].to_numpy())
+    else:
+        df = df.sort_values(by='Year', ascending=False).reset_index(drop=True)
+        ratios = _compute_ratio_frame(df)
+    ratios.insert(0, 'Year', df['Year'].to_numpy())
+    return ratios
+
+def _result(row, trends: dict, years, period: str = 'annual', periods=None) -> dict:
+    """Newest row + per-metric arrays (newest first) of one company -> the nested result with Trends (oldest first)."""
+    res = ratio_row_to_dict(row)
+    res['Trends'] = {'Year': [int(y) if pd.notna(y) else None for y in years[::-1]],
+                     **{k: np.asarray(trends[k], dtype=float)[::-1].tolist() for k in TREND_FIELDS}}
+    if period == 'ttm':
+        res['Period'] = f"TTM {periods[0]}"
+        res['Trends']['Period'] = list(periods[::-1])
+    return res
+
+def history_to_result(history: pd.DataFrame, period: str = 'annual') -> dict:
+    """One company's ratio history (newest first; TTM with a Period column) -> the nested result with Trends."""
+    trends = dict(zip(TREND_FIELDS, history[TREND_FIELDS].to_numpy(dtype=float).T))
+    return _result(history.iloc[0], trends, history['Year'].to_numpy(), period,
+                   history['Period'].to_numpy() if period == 'ttm' else None)
+
+@instrumented('analyzer.ratios')
+def calculate_financial_ratios(df: pd.DataFrame, sector: str = "General", period: str = 'annual') -> dict:
+    """
+    Nested result (Analysis / Forensics / Growth / Valuation / Trends) for one company, newest period as headline.
+    `sector` does not change any ratio or threshold here: sector context is applied only by
+    modules.benchmark (peer percentiles, Relative_Score). It is accepted so callers can pass it through.
+    """
+    if df.empty: return {}
+    if period not in PERIODS: raise ValueError(f"period must be one of {PERIODS}")
+
+    # All periods in one pass (Newest first); the newest row is the headline result.
+    # Straight on NumPy arrays: for one company the DataFrame plumbing costs more than the math.
+    years = df['Year'].to_numpy(); dates = df['Date'].to_numpy() if period == 'ttm' else None
+    key = dates.astype('datetime64[ns]').astype(np.int64) if period == 'ttm' else years.astype(float)
+    order = np.argsort(-key, kind='stable')
+    cols = _source_columns(df)
+    if (order != np.arange(len(order))).any():
+        cols = {k: v[order] for k, v in cols.items()}; years = years[order]
+        if dates is not None: dates = dates[order]
+    out = _compute_ratios(cols, len(df), dates=dates)
+    return _result({k: v[0] for k, v in out.items()}, out, years, period, quarter_labels(dates) if period == 'ttm' else None)
+
+# === PANEL API (many companies x many years in one pass) ===
+def frames_to_panel(frames: dict, compact: bool = False) -> pd.DataFrame:
+    """
+    {ticker: normalized df} -> long panel with Ticker / Year / Field / Value columns (numeric fields).
+    compact: categorical Ticker / Field and float32 Value (about a third of the memory for big universes).
+    Built from frames_to_wide in one reshape; for ratios, calculate_ratios_wide(frames_to_wide(frames)) skips the long form.
+    """
+    wide = frames_to_wide(frames)
+    if wide.empty or not len(wide.columns): return pd.DataFrame(columns=['Ticker', 'Year', 'Field', 'Value'])
+    n, m = wide.shape
+    tickers, years = wide.index.levels[0], wide.index.get_level_values(1).to_numpy()
+    codes = np.repeat(wide.index.codes[0], m); fields = np.tile(np.arange(m), n)
+    values = wide.to_numpy().ravel()
+    if compact:
+        return pd.DataFrame({'Ticker': pd.Categorical.from_codes(codes, categories=tickers), 'Year': np.repeat(years, m),
+                             'Field': pd.Categorical.from_codes(fields, categories=wide.columns), 'Value': values.astype(np.float32)})
+    return pd.DataFrame({'Ticker': tickers.to_numpy()[codes], 'Year': np.repeat(years, m),
+                         'Field': wide.columns.to_numpy()[fields], 'Value': values})
+
+def frames_to_wide(frames: dict) -> pd.DataFrame:
+    """
+    {ticker: normalized df} -> wide float64 frame indexed by (Ticker, Year) for calculate_ratios_wide,
+    (the panel entry point: frames_to_panel is a reshape of it; the first row of a repeated year wins).
+    """
+    cols, blocks = {}, []
+    for ticker, df in frames.items():
+        if df is None or df.empty or 'Year' not in df.columns: continue
+        names = df.columns.tolist(); dtypes = df.dtypes.to_numpy(); seen = set()
+        take = [i for i, c in enumerate(names) if dtypes[i].kind in 'iufb' and c != 'Year' and not (c in seen or seen.add(c))] # duplicated labels -> first
+        values = df.take(take, axis=1).to_numpy(dtype=np.float64, na_value=np.nan) # positional: label lookups crawl on Arrow-string columns
+        years = df['Year'].to_numpy()
+        _, first = np.unique(years, return_index=True)
+        if len(first) < len(years): rows = np.sort(first); years = years[rows]; values = values[rows]
+        pos = [cols.setdefault(names[i], len(cols)) for i in take]
+        blocks.append((ticker, years, pos, values))
+    if not blocks: return pd.DataFrame(index=pd.MultiIndex.from_arrays([[], []], names=['Ticker', 'Year']))
+    sizes = [len(b[1]) for b in blocks]
+    values = np.full((sum(sizes), len(cols)), np.nan)
+    row = 0
+    for (_, _, pos, vals), size in zip(blocks, sizes):
+        values[row:row + size, pos] = vals; row += size
+    index = pd.MultiIndex.from_arrays([np.repeat([b[0] for b in blocks], sizes), np.concatenate([b[1] for b in blocks])], names=['Ticker', 'Year'])
+    return pd.DataFrame(values, index=index, columns=list(cols))
+
+@instrumented('analyzer.wide')
+def calculate_ratios_wide(wide: pd.DataFrame, period: str = 'annual') -> pd.DataFrame:
+    """
+    Ratios for a wide frame indexed by (ticker, year), or (ticker, period end) for TTM,
+    with one column per normalized field (float32 is fine: fields are upcast per column).
+    Returns the metrics on the same index, newest period first within each ticker.
+    """
+    if period not in PERIODS: raise ValueError(f"period must be one of {PERIODS}")
+    wide = wide.sort_index(level=[0, 1], ascending=[True, False])
+    dates = wide.index.get_level_values(1).to_numpy() if period == 'ttm' else None
+    ratios = _compute_ratio_frame(wide, groups=wide.index.codes[0], dates=dates)
+    ratios.index = wide.index
+    return ratios
+
+@instrumented('analyzer.panel')
+def calculate_ratios_panel(panel: pd.DataFrame, ticker_col: str = 'Ticker', year_col: str = 'Year',
+                           field_col: str = 'Field', value_col: str = 'Value', period: str = 'annual') -> pd.DataFrame:
+    """
+    Vectorized calculate_financial_ratios over a long panel (ticker x fiscal year x field).
+    Returns one row per (ticker, year) with every metric as a flat column,
+    newest year first within each ticker; M-Score and growth use the prior row of the same ticker. Use ratio_row_to_dict() for the nested layout.
+    period='ttm': year_col holds period-end dates and the prior row is the window ending a year earlier.
+    """
+    cols = [ticker_col, year_col]
+    if panel.empty: return pd.DataFrame(columns=cols + [k for g in RATIO_GROUPS.values() for k in g] + BENEISH_FIELDS + GROWTH_FIELDS + FORENSIC_FIELDS + VALUATION_FIELDS)
+
+    long = panel[[ticker_col, year_col, field_col, value_col]].drop_duplicates(subset=[ticker_col, year_col, field_col], keep='first')
+    values = pd.to_numeric(long[value_col], errors='coerce')
+    wide = pd.Series(values.to_numpy(), index=pd.MultiIndex.from_frame(long[cols + [field_col]])).unstack(field_col)
+
+    ratios = calculate_ratios_wide(wide, period)
+    return ratios.reset_index().rename(columns={'level_0': ticker_col, 'level_1': year_col})
@@ -0,0 +1,213 @@
+# modules/benchmark.py (v1.0 - Sector Peer Benchmarks)
+# Κατανομές δεικτών ανά κλάδο πάνω σε ένα τοπικό "σύμπαν" εταιρειών:
+# ταξινομημένοι πίνακες ανά (κλάδος, δείκτης), εκατοστημόρια με bisect, σταδιακή ενημέρωση.
+import os
+import json
+import math
+import threading
+from bisect import bisect_left, bisect_right, insort
+from modules.analyzer import RATIO_GROUPS, GROWTH_FIELDS
+from modules.cache import default_cache_dir, file_lock
+
+BENCHMARK_METRICS = [k for g in RATIO_GROUPS.values() for k in g] + ['Z_Score', 'M_Score', 'Health_Score'] + GROWTH_FIELDS
+# Metrics where a low value is the good side of the distribution
+LOWER_IS_BETTER = {'DSO', 'DSI', 'CCC', 'Debt_to_Equity', 'Net_Debt_to_EBITDA', 'Fin_Lev_Multiplier', 'M_Score', 'CAPEX_Sales'}
+# Sector-relative counterpart of the Health Score (mean oriented percentile)
+SCORE_METRICS = ['Current_Ratio', 'Interest_Coverage', 'ROE', 'ROIC', 'Net_Margin', 'Debt_to_Equity', 'Z_Score', 'CCC']
+ALL_SECTORS = 'All'
+MIN_PEERS = 5 # fewer companies than this in a sector -> rank against the whole universe
+COMPACT_RATIO = 2 # rewrite the log once it holds this many lines per live company
+
+def default_benchmark_path():
+    return os.path.join(default_cache_dir(), 'benchmarks.jsonl')
+
+def _clean(ratios, metrics):
+    out = {}
+    for m in metrics:
+        v = ratios.get(m)
+        if isinstance(v, (int, float)) and not isinstance(v, bool) and math.isfinite(v): out[m] = float(v)
+    return out
+
+class SectorBenchmarks:
+    """
+    Per-sector sorted value arrays for every benchmark metric, plus an 'All' universe.
+    Lookups are two bisects (O(log n)); add() replaces a company's previous values in place,
+    so the distributions are never rebuilt. With a path, every add is appended to a JSON-lines log.
+    """
+    def __init__(self, path=None, metrics=BENCHMARK_METRICS, min_peers=MIN_PEERS):
+        self.path = path
+        self.metrics = list(metrics); self.min_peers = min_peers
+        self._members = {} # company -> (sector, {metric: value})
+        self._dist = {} # sector -> {metric: sorted list}
+        self._sizes = {} # sector -> companies
+        self._log_lines = 0
+        self.version = 0 # bumped on every change (cache key for derived views such as the screener table)
+        self._lock = threading.RLock()
+        if path and os.path.exists(path): self._load()
+
+    def __len__(self): return len(self._members)
+    def __contains__(self, company): return company in self._members
+
+    # --- Updates ---
+    def add(self, company, sector, ratios: dict):
+        """Insert or replace one company ({metric: value}, e.g. flatten_ratios(res))."""
+        sector = sector or "General"
+        vals = _clean(ratios, self.metrics)
+        with self._lock:
+            self._insert(company, sector, vals)
+            if self.path: self._append({'company': company, 'sector': sector, 'ratios': vals})
+
+    def add_many(self, rows, company_key='Id', sector_key='Sector'):
+        """Bulk add of flat rows (batch_runner results); one log write for the lot."""
+        with self._lock:
+            recs = []
+            for row in rows:
+                sector = row.get(sector_key) or "General"
+                vals = _clean(row, self.metrics)
+                self._insert(row[company_key], sector, vals)
+                recs.append({'company': row[company_key], 'sector': sector, 'ratios': vals})
+            if self.path and recs: self._append(*recs)
+        return len(recs)
+
+    def remove(self, company):
+        with self._lock:
+            if company not in self._members: return False
+            self._discard(company)
+            if self.path: self._append({'company': company, 'removed': True})
+            return True
+
+    def _insert(self, company, sector, vals):
+        if company in self._members: self._discard(company)
+        self._members[company] = (sector, vals); self.version += 1
+        for s in (sector, ALL_SECTORS):
+            dist = self._dist.setdefault(s, {})
+            for m, v in vals.items(): insort(dist.setdefault(m, []), v)
+            self._sizes[s] = self._sizes.get(s, 0) + 1
+
+    def _discard(self, company):
+        sector, vals = self._members.pop(company); self.version += 1
+        for s in (sector, ALL_SECTORS):
+            dist = self._dist[s]
+            for m, v in vals.items():
+                arr = dist[m]; del arr[bisect_left(arr, v)]
+            self._sizes[s] -= 1
+
+    # --- Lookups (exclude: a member company whose own entry must not count as its peer) ---
+    def _own(self, sector, exclude):
+        """exclude's stored values when it belongs to `sector`'s distributions, else None."""
+        member = self._members.get(exclude) if exclude is not None else None
+        return member[1] if member is not None and sector in (member[0], ALL_SECTORS) else None
+
+    def _size(self, sector, exclude=None):
+        return self._sizes.get(sector, 0) - (self._own(sector, exclude) is not None)
+
+    def peer_group(self, sector, exclude=None):
+        """The sector itself when it has enough members, otherwise the whole universe."""
+        return sector if self._size(sector, exclude) >= self.min_peers else ALL_SECTORS
+
+    def percentile(self, sector, metric, value, exclude=None):
+        """Mid-rank percentile (0-100) of value within the sector's distribution, or None."""
+        arr = self._dist.get(sector, {}).get(metric) or []
+        own = (self._own(sector, exclude) or {}).get(metric)
+        n = len(arr) - (own is not None)
+        if n <= 0 or value is None or not math.isfinite(value): return None
+        lo = bisect_left(arr, value); hi = bisect_right(arr, value)
+        if own is not None and own <= value: hi -= 1; lo -= own < value
+        return 100.0 * (lo + 0.5 * (hi - lo)) / n
+
+    def quantile(self, sector, metric, q, exclude=None):
+        arr = self._dist.get(sector, {}).get(metric) or []
+        own = (self._own(sector, exclude) or {}).get(metric)
+        n = len(arr) - (own is not None)
+        if n <= 0: return None
+        i = min(n - 1, int(q * n))
+        return arr[i + 1 if own is not None and i >= bisect_left(arr, own) else i]
+
+    def rank(self, sector, ratios: dict, exclude=None) -> dict:
+        """
+        Percentile of every metric against the sector peers (without `exclude`'s own entry,
+        e.g. the ranked company itself). 'score' flips LOWER_IS_BETTER metrics so 100 is
+        always the good end; 'Relative_Score' is the mean score over SCORE_METRICS.
+        """
+        with self._lock:
+            group = self.peer_group(sector or "General", exclude)
+            own = self._own(group, exclude) or {}
+            metrics = {}
+            for m, v in _clean(ratios, self.metrics).items():
+                pct = self.percentile(group, m, v, exclude)
+                if pct is None: continue
+                metrics[m] = {'value': v, 'percentile': round(pct, 1),
+                              'score': round(100 - pct if m in LOWER_IS_BETTER else pct, 1),
+                              'median': self.quantile(group, m, 0.5, exclude), 'peers': len(self._dist[group][m]) - (m in own)}
+            peers = self._size(group, exclude)
+        scores = [metrics[m]['score'] for m in SCORE_METRICS if m in metrics]
+        return {'sector': sector, 'peer_group': group, 'peers': peers, 'metrics': metrics,
+                'Relative_Score': round(sum(scores) / len(scores), 1) if scores else None}
+
+    def rows(self):
+        """Flat {'Id', 'Sector', metric: value} rows, one per company (e.g. for modules.screener)."""
+        with self._lock: return [{'Id': c, 'Sector': s, **vals} for c, (s, vals) in self._members.items()]
+
+    def info(self):
+        return {'companies': len(self._members), 'sectors': {s: n for s, n in self._sizes.items() if n and s != ALL_SECTORS},
+                'log_lines': self._log_lines, 'path': self.path}
+
+    # --- Persistence (append-only log, compacted when it grows stale) ---
+    # Other processes (batch_runner, the app) append to the same log: writes hold a file lock,
+    # and compaction rewrites what is in the file, not just this process's view of it.
+    def _append(self, *recs):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with file_lock(self.path + '.lock'), open(self.path, 'a', encoding='utf-8') as fh:
+            for rec in recs: fh.write(json.dumps(rec) + '\n')
+        self._log_lines += len(recs)
+        if self._log_lines > COMPACT_RATIO * max(len(self._members), 100): self.compact()
+
+    def _read_log(self):
+        """(latest {company: (sector, ratios)}, lines read) from the log on disk."""
+        latest, lines = {}, 0
+        with open(self.path, 'r', encoding='utf-8') as fh:
+            for line in fh:
+                try: rec = json.loads(line)
+                except ValueError: continue # torn last line from a crash
+                lines += 1
+                if rec.get('removed'): latest.pop(rec['company'], None)
+                else: latest[rec['company']] = (rec['sector'], rec['ratios'])
+        return latest, lines
+
+    def _load(self):
+        latest, self._log_lines = self._read_log()
+        # Fresh load: fill the arrays unsorted, then sort each once
+        for company, (sector, vals) in latest.items():
+            vals = _clean(vals, self.metrics)
+            self._members[company] = (sector, vals)
+            for s in (sector, ALL_SECTORS):
+                dist = self._dist.setdefault(s, {})
+                for m, v in vals.items(): dist.setdefault(m, []).append(v)
+                self._sizes[s] = self._sizes.get(s, 0) + 1
+        for dist in self._dist.values():
+            for arr in dist.values(): arr.sort()
+
+    def compact(self):
+        with self._lock, file_lock(self.path + '.lock'):
+            latest, _ = self._read_log() if os.path.exists(self.path) else ({}, 0)
+            tmp = self.path + f'.{os.getpid()}.tmp'
+            with open(tmp, 'w', encoding='utf-8') as fh:
+                for company, (sector, vals) in latest.items():
+                    fh.write(json.dumps({'company': company, 'sector': sector, 'ratios': vals}) + '\n')
+            os.replace(tmp, self.path)
+            self._log_lines = len(latest)
+
+_BENCHMARKS = None
+_BENCHMARKS_LOCK = threading.Lock()
+
+def get_benchmarks():
+    global _BENCHMARKS
+    if _BENCHMARKS is None:
+        with _BENCHMARKS_LOCK: # first callers are job worker threads: one store, one log reader
+            if _BENCHMARKS is None: _BENCHMARKS = SectorBenchmarks(default_benchmark_path())
+    return _BENCHMARKS
+
+def set_benchmarks(store):
+    """Swap the process store (tests, custom universes)."""
+    global _BENCHMARKS
+    _BENCHMARKS = store
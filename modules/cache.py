@@ -0,0 +1,247 @@
+# modules/cache.py (v1.0 - Fundamentals Disk Cache)
+# Τοπική cache θεμελιωδών μεγεθών: Parquet ανά (ticker, dataset), TTL + LRU.
+import os
+import json
+import time
+import threading
+import contextlib
+import pandas as pd
+from modules.lazy import lazy_import
+
+try: import fcntl
+except ImportError: fcntl = None; import msvcrt # Windows
+
+pq = lazy_import('pyarrow.parquet') # pandas imports it on the first read anyway
+
+DAY = 24 * 3600
+DEFAULT_TTLS = {'statements': 7 * DAY, 'quarterly': 7 * DAY, 'info': 1 * DAY, 'history': 7 * DAY, 'history_quarterly': 7 * DAY,
+                'ratios': 365 * DAY, 'ratios_ttm': 365 * DAY} # ratios are replaced whenever the history changes
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+FILING_LAG_DAYS = 365 + 60 # fiscal year end -> next annual report is usually out by then
+FILING_LAGS = {'statements': FILING_LAG_DAYS, 'quarterly': 91 + 45, # quarter end -> next 10-Q within ~45 days
+               'history': FILING_LAG_DAYS, 'history_quarterly': 91 + 45}
+# Statement history accumulated by incremental refreshes: no refetch can bring it back, so never evicted
+PINNED_DATASETS = {'history', 'history_quarterly'}
+OVERDUE_TTL = 1 * DAY # next filing is due: re-check daily instead of weekly
+ACCESS_SAVE_INTERVAL = 30 # sec: cache hits persist their last_access at most this often
+
+@contextlib.contextmanager
+def file_lock(path):
+    """Exclusive advisory lock on `path` (created if missing), shared by every process using it."""
+    with open(path, 'a+b') as fh:
+        if fcntl: fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+        else: fh.seek(0); msvcrt.locking(fh.fileno(), msvcrt.LK_LOCK, 1)
+        try: yield
+        finally:
+            if fcntl: fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+            else: fh.seek(0); msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+
+def default_cache_dir():
+    return os.environ.get('VALUEPY_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'valuepy'))
+
+class FundamentalsCache:
+    """
+    On-disk cache of merged statement frames and company info.
+    Entries are Parquet files keyed by (ticker, dataset), tracked in index.json with
+    fetch time, expiry, size and last access (for LRU eviction past max_bytes).
+    Several processes may share a root: each save re-reads index.json under a file lock
+    and merges in only the entries this process wrote, touched or dropped; lookups reload
+    the index whenever another process has replaced index.json since (one stat per call).
+    """
+    def __init__(self, root=None, ttls=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = root or default_cache_dir()
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.max_bytes = max_bytes
+        self.stats = {'hits': 0, 'misses': 0, 'expired': 0, 'evictions': 0, 'writes': 0}
+        self._lock = threading.RLock()
+        os.makedirs(self.root, exist_ok=True)
+        self._index_path = os.path.join(self.root, 'index.json')
+        self._disk_stamp = self._stamp()
+        self._index = self._load_index()
+        self._dirty, self._dropped = set(), {} # since the last save: keys written/touched, keys dropped -> their fetched_at
+        self._saved_at = time.time()
+
+    # --- Index ---
+    def _load_index(self):
+        try:
+            with open(self._index_path, 'r', encoding='utf-8') as fh: return json.load(fh)
+        except (OSError, ValueError): return {}
+
+    def _stamp(self):
+        try: st = os.stat(self._index_path)
+        except OSError: return None
+        return st.st_mtime_ns, st.st_size, st.st_ino # os.replace gives a new inode even within one mtime tick
+
+    def _sync(self):
+        """Reload index.json if another process saved it since, keeping this process's unsaved changes."""
+        stamp = self._stamp()
+        if stamp == self._disk_stamp: return
+        with self._lock:
+            self._index = self._merge_index(self._load_index()) # loaded after the stat: at least as new as `stamp`
+            self._disk_stamp = stamp
+
+    def _merge_index(self, disk):
+        """Fold this process's changes into the index on disk; the newer fetch of a key wins."""
+        for key, fetched in self._dropped.items():
+            if key in disk and disk[key]['fetched_at'] <= fetched: del disk[key] # not rewritten elsewhere since
+        for key in self._dirty:
+            mine, theirs = self._index.get(key), disk.get(key)
+            if mine is None: continue
+            if theirs is None or mine['fetched_at'] >= theirs['fetched_at']: disk[key] = {**mine, 'last_access': max(mine['last_access'], theirs['last_access'] if theirs else 0)}
+            else: theirs['last_access'] = max(theirs['last_access'], mine['last_access'])
+        return disk
+
+    def _save_index(self):
+        with file_lock(self._index_path + '.lock'):
+            self._index = self._merge_index(self._load_index())
+            self._evict() # other processes' entries count towards max_bytes too
+            tmp = self._index_path + f'.{os.getpid()}.tmp'
+            with open(tmp, 'w', encoding='utf-8') as fh: json.dump(self._index, fh)
+            os.replace(tmp, self._index_path)
+            self._disk_stamp = self._stamp()
+            self._dirty.clear(); self._dropped.clear()
+            self._saved_at = time.time()
+
+    @staticmethod
+    def _key(ticker, dataset): return f"{str(ticker).upper()}__{dataset}"
+
+    def _path(self, key): return os.path.join(self.root, key.replace('/', '_') + '.parquet')
+
+    def _read(self, key, columns=None):
+        # ParquetFile skips the dataset discovery of pd.read_parquet: about half the cost for small files
+        with pq.ParquetFile(self._path(key)) as fh: return fh.read(columns=columns).to_pandas()
+
+    # --- Freshness ---
+    @staticmethod
+    def _last_period(df):
+        if 'Date' not in df.columns or not df['Date'].notna().any(): return None
+        return pd.Timestamp(df['Date'].max()).timestamp()
+
+    def _expiry(self, dataset, last_period, now):
+        expires = now + self.ttls.get(dataset, DEFAULT_TTLS['statements'])
+        if dataset in FILING_LAGS and last_period is not None:
+            next_filing = last_period + FILING_LAGS[dataset] * DAY
+            # Overdue filing -> short TTL; otherwise never hold past the expected filing date
+            expires = now + OVERDUE_TTL if next_filing <= now else min(expires, max(next_filing, now + OVERDUE_TTL))
+        return expires
+
+    # --- Public API ---
+    def get(self, ticker, dataset):
+        key = self._key(ticker, dataset)
+        self._sync()
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is None:
+                self.stats['misses'] += 1; return None
+            now = time.time()
+            if entry['expires_at'] <= now:
+                self.stats['expired'] += 1; self.stats['misses'] += 1; return None
+            try: df = self._read(key)
+            except Exception:
+                self._drop(key); self.stats['misses'] += 1; return None
+            entry['last_access'] = now; self._dirty.add(key)
+            if now - self._saved_at > ACCESS_SAVE_INTERVAL: self._save_index()
+            self.stats['hits'] += 1
+            return df
+
+    def put(self, ticker, dataset, df: pd.DataFrame, save=True):
+        if df is None or df.empty: return
+        key = self._key(ticker, dataset)
+        out = df.loc[:, ~df.columns.duplicated()].copy()
+        out.columns = [str(c) for c in out.columns]
+        with self._lock:
+            path = self._path(key); tmp = path + f'.{os.getpid()}.{threading.get_ident()}.tmp' # writers sharing the root never share a tmp file
+            out.to_parquet(tmp, index=False)
+            os.replace(tmp, path)
+            now = time.time(); last_period = self._last_period(out)
+            self._index[key] = {'ticker': str(ticker).upper(), 'dataset': dataset, 'fetched_at': now, 'last_access': now,
+                                'last_period': last_period, 'expires_at': self._expiry(dataset, last_period, now), 'written_at': now,
+                                'bytes': os.path.getsize(path)}
+            self._dirty.add(key); self._dropped.pop(key, None)
+            self.stats['writes'] += 1
+            self._evict()
+            if save: self._save_index() # batch writers pass save=False and flush() once
+
+    def get_or_fetch(self, ticker, dataset, fetch, force_refresh=False):
+        """Cached frame if fresh, else fetch() and store. force_refresh skips the lookup."""
+        if not force_refresh:
+            df = self.get(ticker, dataset)
+            if df is not None: return df
+        else:
+            with self._lock: self.stats['misses'] += 1
+        df = fetch()
+        self.put(ticker, dataset, df)
+        return df
+
+    def peek(self, ticker, dataset, columns=None):
+        """Stored frame even if expired (None when absent, or lacking a requested column); not a hit or miss."""
+        key = self._key(ticker, dataset)
+        self._sync()
+        if key not in self._index: return None
+        try: return self._read(key, columns)
+        except Exception: return None
+
+    def is_fresh(self, ticker, dataset):
+        self._sync()
+        entry = self._index.get(self._key(ticker, dataset))
+        return entry is not None and entry['expires_at'] > time.time()
+
+    def renew(self, ticker, dataset, save=True):
+        """Re-checked and unchanged: restart the TTL without rewriting the file."""
+        key = self._key(ticker, dataset)
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is None: return False
+            now = time.time()
+            entry['fetched_at'] = now
+            entry['expires_at'] = self._expiry(dataset, entry.get('last_period'), now)
+            self._dirty.add(key)
+            if save: self._save_index()
+            return True
+
+    def flush(self):
+        with self._lock: self._save_index()
+
+    def invalidate(self, ticker=None, dataset=None):
+        with self._lock:
+            for key, e in list(self._index.items()):
+                if (ticker is None or e['ticker'] == str(ticker).upper()) and (dataset is None or e['dataset'] == dataset):
+                    self._drop(key)
+            self._save_index()
+
+    def tickers(self, dataset):
+        """Every ticker with a stored `dataset` entry (expired ones included), sorted."""
+        self._sync()
+        return sorted({e['ticker'] for e in self._index.values() if e['dataset'] == dataset})
+
+    def version(self, ticker, dataset):
+        """Time the stored content last changed (a renew() keeps it); None when absent."""
+        self._sync()
+        entry = self._index.get(self._key(ticker, dataset))
+        return entry.get('written_at', entry['fetched_at']) if entry else None
+
+    def fetched_at(self, ticker, dataset):
+        self._sync()
+        entry = self._index.get(self._key(ticker, dataset))
+        return entry['fetched_at'] if entry else None
+
+    def size_bytes(self): return sum(e['bytes'] for e in self._index.values())
+
+    def info(self):
+        return {**self.stats, 'entries': len(self._index), 'bytes': self.size_bytes(), 'root': self.root}
+
+    # --- Eviction ---
+    def _drop(self, key):
+        entry = self._index.pop(key, None)
+        self._dirty.discard(key)
+        if entry is not None: self._dropped[key] = entry['fetched_at']
+        try: os.remove(self._path(key))
+        except OSError: pass
+
+    def _evict(self):
+        """LRU over the refetchable entries: max_bytes bounds them, PINNED_DATASETS are kept whatever their size."""
+        evictable = [(k, e) for k, e in self._index.items() if e['dataset'] not in PINNED_DATASETS]
+        total = sum(e['bytes'] for _, e in evictable)
+        for key, e in sorted(evictable, key=lambda kv: kv[1]['last_access']):
+            if total <= self.max_bytes: break
+            total -= e['bytes']; self._drop(key); self.stats['evictions'] += 1
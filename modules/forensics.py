@@ -0,0 +1,130 @@
+# modules/forensics.py (v1.0 - Universe Forensic Scan)
+# Σήματα λογιστικού κινδύνου (accruals, απότομες μεταβολές κεφαλαίου κίνησης, απόκλιση CFO / καθαρών κερδών)
+# για όλο το τοπικό σύμπαν, ως robust z-scores (διάμεσος / MAD) έναντι εταιρειών του ίδιου κλάδου και έτους.
+#
+#   ratios = calculate_ratios_panel(panel)                 # or stored_ratio_panel()
+#   alerts = scan_universe(ratios, sectors={'TSLA': 'Consumer Cyclical', ...})
+import numpy as np
+import pandas as pd
+
+# Signal -> what it measures. Every signal is oriented so that HIGH is the suspicious side.
+SIGNALS = {
+    'Accruals': "(net income - CFO) / total assets (Beneish TATA)",
+    'Cash_Shortfall': "share of a positive net income not backed by operating cash flow",
+    'DSO_Swing': "days sales outstanding vs the prior year (receivables outgrowing sales)",
+    'DSI_Swing': "days inventory vs the prior year (inventory build-up)",
+    'DPO_Swing': "days payables vs the prior year (stretched suppliers flatter CFO)",
+}
+INPUT_COLUMNS = ['TATA', 'Gap', 'CFO', 'DSO', 'DSI', 'DPO'] # ratio columns the signals are built from
+MIN_PEERS = 8 # smaller sector-year groups are compared with the whole universe that year
+Z_THRESHOLD = 3.5 # Iglewicz & Hoaglin cut-off for modified z-scores
+SHORTFALL_CLIP = 5.0 # net income near zero would make the shortfall ratio explode
+
+def _group_median(x, groups, ok, n_groups):
+    """Median of x[ok] per integer group: sort by (group, value), then the middle element(s) of each run."""
+    idx = np.flatnonzero(ok)
+    order = idx[np.argsort(x[idx])]
+    order = order[np.argsort(groups[order], kind='stable')] # integer radix sort: ~2x faster than lexsort here
+    counts = np.bincount(groups[order], minlength=n_groups)
+    starts = np.cumsum(counts) - counts
+    has = counts > 0
+    lo = (starts + (counts - 1) // 2)[has]; hi = (starts + counts // 2)[has]
+    med = np.full(n_groups, np.nan)
+    med[has] = (x[order[lo]] + x[order[hi]]) / 2
+    return med, counts
+
+def robust_z(values, groups, min_peers: int = MIN_PEERS):
+    """
+    Modified z-score 0.6745 * (x - median) / MAD of every value within its group (integer codes, -1 = none).
+    A MAD of zero falls back to 1.2533 * mean absolute deviation; groups with fewer than
+    `min_peers` finite values give NaN. Returns (z, group median per row, finite peers per row).
+    """
+    x = np.asarray(values, dtype=np.float64); g = np.asarray(groups, dtype=np.int64)
+    nan = np.full(len(x), np.nan)
+    if not len(x) or g.max(initial=-1) < 0: return nan, nan.copy(), np.zeros(len(x), dtype=np.int64)
+    ok = np.isfinite(x) & (g >= 0)
+    n_groups = int(g.max()) + 1; gi = np.where(g >= 0, g, 0)
+    med, peers = _group_median(x, gi, ok, n_groups)
+    dev = np.abs(x - med[gi])
+    mad, _ = _group_median(dev, gi, ok, n_groups)
+    mean_ad = np.bincount(gi[ok], weights=dev[ok], minlength=n_groups) / np.maximum(peers, 1)
+    scale = np.where(mad > 0, mad / 0.6745, mean_ad * 1.2533)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z = np.where(scale[gi] > 0, (x - med[gi]) / scale[gi], 0.0)
+    valid = ok & (peers[gi] >= min_peers)
+    return np.where(valid, z, np.nan), np.where(g >= 0, med[gi], np.nan), np.where(g >= 0, peers[gi], 0)
+
+def forensic_signals(ratios: pd.DataFrame, ticker_col: str = 'Ticker', year_col: str = 'Year') -> pd.DataFrame:
+    """
+    SIGNALS for every row of a ratio panel (calculate_ratios_panel / stored_ratio_panel layout).
+    Swings compare with the same ticker's previous fiscal year (NaN when that year is missing).
+    """
+    tickers = pd.Categorical(ratios[ticker_col]).codes
+    years = pd.to_numeric(ratios[year_col], errors='coerce').to_numpy(dtype=np.float64)
+    col = lambda name: pd.to_numeric(ratios[name], errors='coerce').to_numpy(dtype=np.float64) if name in ratios.columns else np.full(len(ratios), np.nan)
+
+    # Previous year of the same ticker: sort by (ticker, year), a row's predecessor is one year older
+    order = np.lexsort((years, tickers))
+    prev = np.full(len(ratios), -1)
+    if len(order) > 1:
+        a, b = order[:-1], order[1:]
+        hit = (tickers[a] == tickers[b]) & (years[b] - years[a] == 1)
+        prev[b[hit]] = a[hit]
+    def swing(x):
+        return np.where(prev >= 0, x - x[np.maximum(prev, 0)], np.nan)
+
+    cfo = col('CFO'); gap = col('Gap'); net_income = cfo + gap # Gap = net income - CFO
+    with np.errstate(divide='ignore', invalid='ignore'):
+        shortfall = np.where(net_income > 0, np.clip(gap / net_income, -SHORTFALL_CLIP, SHORTFALL_CLIP), np.nan)
+    out = {'Accruals': col('TATA'), 'Cash_Shortfall': shortfall,
+           'DSO_Swing': swing(col('DSO')), 'DSI_Swing': swing(col('DSI')), 'DPO_Swing': swing(col('DPO'))}
+    return pd.DataFrame(out, index=ratios.index)
+
+def scan_universe(ratios: pd.DataFrame, sectors: dict = None, ticker_col: str = 'Ticker', year_col: str = 'Year',
+                  sector_col: str = 'Sector', min_peers: int = MIN_PEERS, threshold: float = Z_THRESHOLD,
+                  latest: bool = False, all_rows: bool = False) -> pd.DataFrame:
+    """
+    Ranked alert table: company-years with at least one signal `threshold` robust z above its peers.
+    Peers are the same sector and fiscal year (the whole universe that year when the sector has fewer
+    than `min_peers` companies). Sectors come from `sector_col`, else `sectors` {ticker: sector}, else "General".
+    Columns: Ticker, Sector, Year, Peer_Group, Alert_Score (sum of the flagged z-scores), Flags, then each
+    signal's value and _Z. latest=True keeps each ticker's newest year; all_rows=True skips the threshold.
+    """
+    cols = [ticker_col, 'Sector', year_col, 'Peer_Group', 'Alert_Score', 'Flags', *[c for s in SIGNALS for c in (s, f"{s}_Z")]]
+    if ratios.empty: return pd.DataFrame(columns=cols)
+    ratios = ratios.reset_index(drop=True)
+    sector = ratios[sector_col] if sector_col in ratios.columns else ratios[ticker_col].map(sectors or {})
+    sector_codes, sector_labels = pd.factorize(sector.where(sector.notna() & (sector != ''), "General"))
+    year_codes, year_labels = pd.factorize(ratios[year_col]) # -1: no fiscal year, so no peers either
+    dated = year_codes >= 0
+
+    # Peer group per row: (sector, year), or every company that year when the sector-year is too small
+    n_years = len(year_labels)
+    sy_codes = np.where(dated, sector_codes * n_years + year_codes, -1)
+    sizes = np.bincount(sy_codes[dated], minlength=max(1, len(sector_labels) * n_years))
+    small = dated & (sizes[np.maximum(sy_codes, 0)] < min_peers)
+
+    signals = forensic_signals(ratios, ticker_col, year_col)
+    def z(x):
+        by_sector = robust_z(x, sy_codes, min_peers)[0]
+        return np.where(small, robust_z(x, year_codes, min_peers)[0], by_sector) if small.any() else by_sector
+    z_block = np.column_stack([z(signals[name].to_numpy()) for name in SIGNALS])
+    flagged = np.nan_to_num(z_block, nan=-np.inf) >= threshold
+    keep = np.ones(len(ratios), dtype=bool) if all_rows else flagged.any(axis=1)
+    if latest:
+        newest = ratios.groupby(ticker_col, sort=False, observed=True)[year_col].transform('max')
+        keep &= (ratios[year_col] == newest).to_numpy()
+
+    # Labels only for the rows that are reported
+    rows = np.flatnonzero(keep)
+    sectors_out = np.asarray(sector_labels, dtype=object)[sector_codes[rows]]
+    years_out = ratios[year_col].to_numpy()[rows]
+    names = np.array(list(SIGNALS))
+    out = pd.DataFrame({ticker_col: ratios[ticker_col].to_numpy()[rows], 'Sector': sectors_out, year_col: years_out,
+                        'Peer_Group': [None if not d else f"All {y}" if sm else f"{s} {y}" for s, y, sm, d in zip(sectors_out, years_out, small[rows], dated[rows])],
+                        'Alert_Score': np.round(np.where(flagged[rows], z_block[rows], 0).sum(axis=1), 2),
+                        'Flags': [", ".join(names[f]) for f in flagged[rows]]})
+    for i, name in enumerate(SIGNALS):
+        out[name] = signals[name].to_numpy()[rows]; out[f"{name}_Z"] = np.round(z_block[rows, i], 2)
+    out = out.sort_values(['Alert_Score', ticker_col], ascending=[False, True], kind='stable')
+    return out[cols].reset_index(drop=True)
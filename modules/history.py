@@ -0,0 +1,175 @@
+# modules/history.py (v1.0 - Bounded Session History)
+# Ιστορικό αναλύσεων ανά session: λίγα "ζεστά" snapshots στη μνήμη, τα παλαιότερα
+# γράφονται στο δίσκο και ξαναφορτώνονται μόνο όταν ζητηθούν.
+import os
+import uuid
+import pickle
+import shutil
+import tempfile
+import threading
+import weakref
+from collections import OrderedDict, Counter
+import pandas as pd
+from modules.memo import frame_digest
+
+HOT_ENTRIES = int(os.environ.get('VALUEPY_HISTORY_HOT', 5))
+MAX_ENTRIES = int(os.environ.get('VALUEPY_HISTORY_MAX', 50))
+SPILL_ROOT = os.environ.get('VALUEPY_HISTORY_DIR', os.path.join(tempfile.gettempdir(), 'valuepy_history'))
+
+# === Shared, deduplicated fundamentals frames (one copy per content hash, process-wide) ===
+class FrameStore:
+    def __init__(self):
+        self._frames = {} # key -> [df, refcount, bytes]
+        self._lock = threading.Lock()
+
+    def put(self, df: pd.DataFrame, key: str = None) -> str:
+        key = key or frame_digest(df)
+        with self._lock:
+            if key in self._frames: self._frames[key][1] += 1
+            else: self._frames[key] = [df, 1, int(df.memory_usage(deep=True).sum())] # sized once, on the way in
+        return key
+
+    def get(self, key):
+        hit = self._frames.get(key)
+        return hit[0] if hit else None
+
+    def release(self, key):
+        with self._lock:
+            hit = self._frames.get(key)
+            if hit is None: return
+            hit[1] -= 1
+            if hit[1] <= 0: del self._frames[key]
+
+    def share_of(self, key):
+        """Bytes of a frame divided among the holders that reference it."""
+        hit = self._frames.get(key)
+        return hit[2] / hit[1] if hit else 0
+
+    def info(self):
+        with self._lock: frames = list(self._frames.values())
+        return {'frames': len(frames), 'refs': sum(r for _, r, _ in frames), 'bytes': sum(b for _, _, b in frames)}
+
+FRAMES = FrameStore()
+_SESSIONS = weakref.WeakSet()
+
+def _cleanup(spill_dir, frame_keys):
+    for k in frame_keys: FRAMES.release(k)
+    shutil.rmtree(spill_dir, ignore_errors=True)
+
+# === Per-session history ===
+class HistoryStore:
+    """
+    Compact analysis history for one Streamlit session.
+    An entry keeps the analysis results and a key into FRAMES instead of its own DataFrame.
+    The `hot` most recently used entries stay in memory, older ones are pickled to disk
+    (with their frames) and reloaded on get(); past `max_entries` the oldest are dropped.
+    """
+    def __init__(self, hot: int = HOT_ENTRIES, max_entries: int = MAX_ENTRIES, spill_root: str = SPILL_ROOT):
+        self.hot = max(1, hot); self.max_entries = max(self.hot, max_entries)
+        self.session_id = uuid.uuid4().hex[:12]
+        self.spill_dir = os.path.join(spill_root, self.session_id)
+        self._entries = OrderedDict() # id -> {'meta', 'snapshot' | None, 'path' | None, 'bytes', 'disk_bytes'}
+        self._frame_keys = [] # refs held in FRAMES, released when the session goes away
+        self.stats = {'spills': 0, 'reloads': 0, 'evictions': 0}
+        self._finalizer = weakref.finalize(self, _cleanup, self.spill_dir, self._frame_keys)
+        _SESSIONS.add(self)
+
+    def __len__(self): return len(self._entries)
+
+    # --- Add / get ---
+    def add(self, group: dict) -> str:
+        """Store an analysis group ({'title','time','reports': {name: {'data','df','key'}}, ...})."""
+        entry_id = uuid.uuid4().hex[:8]
+        snapshot = {k: v for k, v in group.items() if k != 'reports'}
+        snapshot['reports'] = {}
+        for name, rep in group.get('reports', {}).items():
+            frame_key = self._hold(rep['df']) if rep.get('df') is not None else None
+            snapshot['reports'][name] = {'data': rep['data'], 'frame': frame_key, 'key': rep.get('key') or frame_key}
+        meta = {'title': group.get('title'), 'time': group.get('time')}
+        size = len(pickle.dumps(snapshot, protocol=pickle.HIGHEST_PROTOCOL)) # once per entry, not per rerun
+        self._entries[entry_id] = {'meta': meta, 'snapshot': snapshot, 'path': None, 'bytes': size, 'disk_bytes': 0}
+        self._enforce()
+        return entry_id
+
+    def get(self, entry_id) -> dict:
+        """Materialize an entry back into the group layout app.py renders (reports carry 'df')."""
+        entry = self._entries.get(entry_id)
+        if entry is None: return None
+        if entry['snapshot'] is None: self._reload(entry_id, entry)
+        self._entries.move_to_end(entry_id)
+        self._enforce()
+        snap = entry['snapshot']
+        group = {k: v for k, v in snap.items() if k != 'reports'}
+        group['id'] = entry_id
+        group['reports'] = {name: {'data': r['data'], 'df': FRAMES.get(r['frame']), 'key': r['key']} for name, r in snap['reports'].items()}
+        return group
+
+    def titles(self, limit: int = None):
+        """[(id, title, time)] newest first, without touching spilled entries."""
+        items = [(i, e['meta']['title'], e['meta']['time']) for i, e in reversed(self._entries.items())]
+        return items[:limit] if limit else items
+
+    def clear(self):
+        for entry_id in list(self._entries): self._drop(entry_id)
+
+    # --- Memory policy ---
+    def _hold(self, df):
+        key = FRAMES.put(df)
+        self._frame_keys.append(key)
+        return key
+
+    def _unhold(self, key):
+        if key in self._frame_keys:
+            self._frame_keys.remove(key); FRAMES.release(key)
+
+    def _enforce(self):
+        while len(self._entries) > self.max_entries:
+            self._drop(next(iter(self._entries))); self.stats['evictions'] += 1
+        hot = [i for i, e in self._entries.items() if e['snapshot'] is not None]
+        for entry_id in hot[:max(0, len(hot) - self.hot)]: self._spill(entry_id, self._entries[entry_id])
+
+    def _spill(self, entry_id, entry):
+        os.makedirs(self.spill_dir, exist_ok=True)
+        snap = entry['snapshot']
+        refs = [r['frame'] for r in snap['reports'].values() if r['frame']] # one per report, even when two share a frame
+        frames = {key: FRAMES.get(key) for key in refs}
+        path = os.path.join(self.spill_dir, f"{entry_id}.pkl")
+        with open(path, 'wb') as fh: pickle.dump({'snapshot': snap, 'frames': frames}, fh, protocol=pickle.HIGHEST_PROTOCOL)
+        for key in refs: self._unhold(key)
+        entry['snapshot'] = None; entry['path'] = path; entry['disk_bytes'] = os.path.getsize(path)
+        self.stats['spills'] += 1
+
+    def _reload(self, entry_id, entry):
+        with open(entry['path'], 'rb') as fh: blob = pickle.load(fh)
+        for r in blob['snapshot']['reports'].values():
+            df = blob['frames'].get(r['frame']) if r['frame'] else None
+            if df is not None: self._frame_keys.append(FRAMES.put(df, r['frame']))
+        os.remove(entry['path'])
+        entry['snapshot'] = blob['snapshot']; entry['path'] = None; entry['disk_bytes'] = 0
+        self.stats['reloads'] += 1
+
+    def _drop(self, entry_id):
+        entry = self._entries.pop(entry_id)
+        if entry['snapshot'] is not None:
+            for r in entry['snapshot']['reports'].values():
+                if r['frame']: self._unhold(r['frame'])
+        elif entry['path']:
+            try: os.remove(entry['path'])
+            except OSError: pass
+
+    # --- Sizing ---
+    def memory_usage(self) -> dict:
+        """Bytes held by this session: result snapshots, its share of FRAMES and spilled files (sizes recorded on store)."""
+        hot = [e for e in self._entries.values() if e['snapshot'] is not None]
+        results = sum(e['bytes'] for e in hot)
+        frames = sum(FRAMES.share_of(k) * n for k, n in Counter(self._frame_keys).items())
+        disk = sum(e['disk_bytes'] for e in self._entries.values())
+        return {'entries': len(self._entries), 'hot': len(hot), 'results_bytes': results,
+                'frames_bytes': int(frames), 'disk_bytes': disk, **self.stats}
+
+def sessions_report() -> dict:
+    """Process-wide view for deployment sizing: live sessions and shared frame store."""
+    sessions = [s.memory_usage() for s in list(_SESSIONS)]
+    return {'sessions': len(sessions), 'entries': sum(s['entries'] for s in sessions),
+            'results_bytes': sum(s['results_bytes'] for s in sessions), 'disk_bytes': sum(s['disk_bytes'] for s in sessions),
+            'shared_frames': FRAMES.info()}
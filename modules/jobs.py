@@ -0,0 +1,163 @@
+# modules/jobs.py (v1.0 - Background Job Queue)
+# Οι αναλύσεις τρέχουν σε νήματα του process, όχι στο νήμα του Streamlit script: ίδιες αιτήσεις σε εξέλιξη
+# μοιράζονται μία εργασία, με πρόοδο, ακύρωση και όριο ταυτόχρονων εργασιών.
+#
+#   job = get_jobs().submit(('yahoo', 'TSLA', 'annual'), analyze, 'TSLA', owner=session_id)
+#   job.status, job.progress, job.stage  ->  job.result / job.error
+#   with job.commit(): peers.add(...)   # side effects: skipped once cancelled, never half-cancelled
+import os
+import time
+import uuid
+import threading
+import contextlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from modules import telemetry
+
+MAX_WORKERS = int(os.environ.get('VALUEPY_JOB_WORKERS', 4))
+KEEP_FINISHED = 256 # finished jobs kept for sessions that have not collected them yet
+FINAL_STATES = ('done', 'failed', 'cancelled')
+
+class JobCancelled(Exception):
+    """Raised inside a job function at its next report() once the job was cancelled."""
+
+class Job:
+    """One unit of background work; fn(job, *args) reports progress through job.report()."""
+    def __init__(self, key, label, owner=None, traced=False):
+        self.id = uuid.uuid4().hex[:8]; self.key = key; self.label = label; self.traced = traced
+        self.status = 'queued'; self.progress = 0.0; self.stage = "queued"
+        self.result = None; self.error = None; self.trace = None
+        self.created = time.time(); self.started = self.finished = None
+        self.owners = {owner} # sessions waiting for the result
+        self._cancel = threading.Event(); self._done = threading.Event(); self._future = None
+        self._commit = threading.Lock(); self._committed = False
+
+    @property
+    def done(self): return self.status in FINAL_STATES
+
+    @property
+    def cancelled(self): return self._cancel.is_set()
+
+    def report(self, progress: float, stage: str = None):
+        """Progress in [0, 1] plus a stage label; doubles as the cancellation checkpoint."""
+        if self._cancel.is_set(): raise JobCancelled()
+        self.progress = min(max(float(progress), 0.0), 1.0)
+        if stage: self.stage = stage
+
+    @contextlib.contextmanager
+    def commit(self):
+        """Wrap a job's side effects: JobCancelled if it was cancelled, else cancel() comes too late from here on."""
+        with self._commit:
+            if self._cancel.is_set(): raise JobCancelled()
+            self._committed = True
+            yield
+
+    def wait(self, timeout=None) -> bool: return self._done.wait(timeout)
+
+    def seconds(self) -> float:
+        if self.started is None: return 0.0
+        return (self.finished or time.time()) - self.started
+
+    def info(self) -> dict:
+        return {'id': self.id, 'label': self.label, 'status': self.status, 'progress': round(self.progress, 3), 'stage': self.stage,
+                'error': self.error, 'owners': len(self.owners), 'queued': round((self.started or time.time()) - self.created, 3), 'seconds': round(self.seconds(), 3)}
+
+class JobQueue:
+    """
+    Bounded thread pool for jobs. submit() with the key of a job still queued or running returns
+    that job (two sessions asking for TSLA share one fetch); cancel() drops one owner and stops the
+    job once nobody is waiting. Finished jobs stay (last `keep`) until their sessions collect them.
+    """
+    def __init__(self, max_workers: int = MAX_WORKERS, keep: int = KEEP_FINISHED):
+        self.max_workers = max(1, max_workers); self.keep = keep
+        self.stats = {'submitted': 0, 'deduplicated': 0, 'done': 0, 'failed': 0, 'cancelled': 0}
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='valuepy-job')
+        self._jobs = OrderedDict() # id -> Job, submission order
+        self._inflight = {} # key -> queued / running Job
+        self._lock = threading.Lock()
+
+    def submit(self, key, fn, *args, label: str = None, owner=None, traced: bool = False, **kwargs) -> Job:
+        """traced=True: keep a per-stage trace of the run in job.trace (a session's debug view)."""
+        with self._lock:
+            job = self._inflight.get(key)
+            if job is not None and not job.cancelled:
+                if owner not in job.owners: job.owners.add(owner); self.stats['deduplicated'] += 1
+                job.traced = job.traced or traced # only takes effect if it has not started yet
+                shared = True
+            else:
+                job = Job(key, label or str(key), owner, traced)
+                self._jobs[job.id] = job; self._inflight[key] = job
+                self.stats['submitted'] += 1
+                job._future = self._pool.submit(self._run, job, fn, args, kwargs)
+                shared = False
+        telemetry.count('jobs.submitted', shared=shared)
+        return job
+
+    def get(self, job_id) -> Job: return self._jobs.get(job_id)
+
+    def cancel(self, job_id, owner=None) -> bool:
+        """`owner` stops waiting; True if that cancelled the job (no owner left and not finished yet)."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.done: return False
+            if job.owners - {owner}: job.owners.discard(owner); return False
+            if not job._commit.acquire(blocking=False): return False # storing its results right now: let it finish, owner kept
+            try:
+                if job._committed: return False
+                job.owners.discard(owner); job._cancel.set()
+            finally: job._commit.release()
+            if self._inflight.get(job.key) is job: del self._inflight[job.key]
+            never_started = job._future.cancel()
+        if never_started: self._finish(job, 'cancelled')
+        return True
+
+    def jobs(self, status=None):
+        with self._lock: jobs = list(self._jobs.values())
+        return [j for j in jobs if status is None or j.status == status]
+
+    def info(self) -> dict:
+        jobs = self.jobs()
+        return {'workers': self.max_workers, 'queued': sum(j.status == 'queued' for j in jobs),
+                'running': sum(j.status == 'running' for j in jobs), **self.stats}
+
+    def shutdown(self, wait: bool = True):
+        for job in self.jobs():
+            if not job.done: job._cancel.set()
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+
+    def _run(self, job, fn, args, kwargs):
+        if job.cancelled: return self._finish(job, 'cancelled')
+        job.status = 'running'; job.started = time.time(); job.stage = "started"
+        job.trace = telemetry.trace(f"job.{job.label}") if job.traced else None # spans of this worker thread only
+        try:
+            with contextlib.nullcontext() if job.trace is None else job.trace, telemetry.span('jobs.run'): job.result = fn(job, *args, **kwargs)
+            status = 'cancelled' if job.cancelled else 'done' # cancelled after its last report(): result dropped
+        except JobCancelled: status = 'cancelled'
+        except Exception as e: job.error = str(e) or type(e).__name__; status = 'failed'
+        self._finish(job, status)
+
+    def _finish(self, job, status):
+        with self._lock:
+            job.status = status; job.stage = status; job.finished = time.time()
+            if status == 'done': job.progress = 1.0
+            if self._inflight.get(job.key) is job: del self._inflight[job.key]
+            self.stats[status] += 1
+            finished = [j for j in self._jobs.values() if j.done]
+            for old in finished[:max(0, len(finished) - self.keep)]: del self._jobs[old.id]
+        telemetry.count('jobs.finished', status=status)
+        job._done.set()
+
+_JOBS = None
+_JOBS_LOCK = threading.Lock()
+
+def get_jobs():
+    global _JOBS
+    if _JOBS is None:
+        with _JOBS_LOCK: # several sessions' script threads start at once
+            if _JOBS is None: _JOBS = JobQueue()
+    return _JOBS
+
+def set_jobs(queue):
+    """Swap the process queue (tests, benchmarks with other limits)."""
+    global _JOBS
+    _JOBS = queue
@@ -0,0 +1,66 @@
+# modules/lazy.py (v1.0 - Deferred Heavy Imports)
+# Οι βαριές βιβλιοθήκες (yfinance, PyMuPDF, fpdf, openpyxl, plotly) φορτώνονται στην πρώτη χρήση,
+# ή στο παρασκήνιο από το warm_up() αμέσως μετά την εκκίνηση του server.
+import importlib
+import threading
+import time
+
+HEAVY_MODULES = ['yfinance', 'fpdf', 'fitz', 'openpyxl', 'plotly.graph_objects']
+
+class LazyModule:
+    """Stand-in for a module: the real import runs on the first attribute access."""
+    def __init__(self, name):
+        self.__dict__['_name'] = name
+        self.__dict__['_module'] = None
+        self.__dict__['_lock'] = threading.Lock()
+
+    def _load(self):
+        module = self.__dict__['_module']
+        if module is None:
+            with self.__dict__['_lock']:
+                module = self.__dict__['_module']
+                if module is None:
+                    module = importlib.import_module(self.__dict__['_name'])
+                    self.__dict__['_module'] = module
+        return module
+
+    def __getattr__(self, attr): return getattr(self._load(), attr)
+    def __setattr__(self, attr, value): setattr(self._load(), attr, value) # e.g. monkeypatching in tests
+    def __dir__(self): return dir(self._load())
+    def __repr__(self):
+        state = 'loaded' if self.__dict__['_module'] is not None else 'not loaded'
+        return f"<lazy module '{self.__dict__['_name']}' ({state})>"
+
+    @property
+    def loaded(self): return self.__dict__['_module'] is not None
+
+def lazy_import(name) -> LazyModule:
+    return LazyModule(name)
+
+# === WARM-UP ===
+_WARM = {'thread': None, 'timings': {}}
+
+def warm_up(modules=None, background=True):
+    """
+    Import the heavy modules ahead of the first request (once per process).
+    In the background a daemon thread does the work; a request that needs a module
+    meanwhile simply waits on Python's import lock for it.
+    Returns the thread, or the {module: seconds} timings when run in the foreground.
+    """
+    names = list(modules or HEAVY_MODULES)
+    def run():
+        for name in names:
+            t0 = time.perf_counter()
+            try: importlib.import_module(name)
+            except ImportError: continue # optional in some deployments
+            _WARM['timings'][name] = time.perf_counter() - t0
+    if not background:
+        run(); return dict(_WARM['timings'])
+    if _WARM['thread'] is None:
+        _WARM['thread'] = threading.Thread(target=run, name='valuepy-warm-up', daemon=True)
+        _WARM['thread'].start()
+    return _WARM['thread']
+
+def warm_up_report() -> dict:
+    thread = _WARM['thread']
+    return {'started': thread is not None, 'done': thread is not None and not thread.is_alive(), 'seconds': dict(_WARM['timings'])}
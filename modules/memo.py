@@ -0,0 +1,89 @@
+# modules/memo.py (v1.0 - Content-Addressed Artifact Cache)
+# Κρατά αποτελέσματα ανάλυσης, PDF bytes και Plotly figures ανά hash περιεχομένου,
+# ώστε ένα rerun του Streamlit (π.χ. αλλαγή WACC) να μην ξαναχτίζει τίποτα.
+import json
+import pickle
+import hashlib
+import threading
+from collections import OrderedDict
+import pandas as pd
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_MAX_ENTRIES = 1024
+
+# --- Content hashing ---
+def frame_digest(df: pd.DataFrame) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    h.update(json.dumps([str(c) for c in df.columns]).encode('utf-8'))
+    h.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return h.hexdigest()
+
+def _json_default(obj):
+    # Frames nested in lists / dicts by content, never by their (truncated) repr
+    return frame_digest(obj) if isinstance(obj, pd.DataFrame) else str(obj)
+
+def digest(*parts) -> str:
+    """Stable hash of frames, dicts, lists and scalars (dict key order does not matter)."""
+    h = hashlib.blake2b(digest_size=16)
+    for p in parts:
+        if isinstance(p, pd.DataFrame): h.update(frame_digest(p).encode('ascii'))
+        else: h.update(json.dumps(p, sort_keys=True, default=_json_default).encode('utf-8'))
+        h.update(b'\x1f')
+    return h.hexdigest()
+
+def _size_of(value) -> int:
+    if isinstance(value, (bytes, bytearray)): return len(value)
+    if isinstance(value, pd.DataFrame): return int(value.memory_usage(deep=True).sum())
+    try: return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception: return 4096
+
+# --- LRU store ---
+class ArtifactCache:
+    """Process-wide LRU keyed by content hash, bounded by total bytes and entry count."""
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_bytes = max_bytes; self.max_entries = max_entries
+        self.enabled = True
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+        self._items = OrderedDict() # key -> (value, size)
+        self._bytes = 0
+        self._lock = threading.RLock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._items:
+                self.stats['misses'] += 1; return default
+            self._items.move_to_end(key)
+            self.stats['hits'] += 1
+            return self._items[key][0]
+
+    def put(self, key, value, size=None):
+        size = _size_of(value) if size is None else size
+        if size > self.max_bytes: return value # never cache something that would flush everything
+        with self._lock:
+            if key in self._items: self._bytes -= self._items.pop(key)[1]
+            self._items[key] = (value, size); self._bytes += size
+            while self._bytes > self.max_bytes or len(self._items) > self.max_entries:
+                _, (_, s) = self._items.popitem(last=False)
+                self._bytes -= s; self.stats['evictions'] += 1
+        return value
+
+    def get_or_compute(self, key, compute, size=None):
+        if not self.enabled: return compute()
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key); self.stats['hits'] += 1
+                return self._items[key][0]
+            self.stats['misses'] += 1
+        return self.put(key, compute(), size)
+
+    def clear(self):
+        with self._lock: self._items.clear(); self._bytes = 0
+
+    def info(self):
+        kinds = {}
+        for key in list(self._items):
+            kind = key[0] if isinstance(key, tuple) else 'other'
+            kinds[kind] = kinds.get(kind, 0) + 1
+        return {**self.stats, 'entries': len(self._items), 'bytes': self._bytes, 'by_kind': kinds}
+
+ARTIFACTS = ArtifactCache()
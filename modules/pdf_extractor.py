@@ -0,0 +1,173 @@
+# modules/pdf_extractor.py (v1.0 - Streaming PDF Statement Extractor)
+# Εντοπίζει τις σελίδες των καταστάσεων (αποτελέσματα, ισολογισμός, ταμειακές ροές)
+# με φθηνό pre-scan κειμένου και διαβάζει πίνακες μόνο από αυτές, σε process pool.
+import os
+import re
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from modules.lazy import lazy_import
+
+fitz = lazy_import('fitz') # PyMuPDF, loaded on the first PDF
+
+STATEMENT_TITLES = {
+    'income': ['income statement', 'statement of income', 'statement of operations', 'profit or loss',
+               'statement of comprehensive income', 'κατάσταση αποτελεσμάτων'],
+    'balance': ['balance sheet', 'statement of financial position', 'κατάσταση οικονομικής θέσης', 'ισολογισμός'],
+    'cashflow': ['cash flow', 'cash flows', 'ταμειακών ροών'],
+}
+SCALE_WORDS = {'in thousands': 1e3, "in '000": 1e3, 'in millions': 1e6, 'in billions': 1e9,
+               'σε χιλιάδες': 1e3, 'σε εκατομμύρια': 1e6}
+PER_SHARE_WORDS = ('eps', 'per share', 'ανά μετοχή') # never scaled by "in millions"
+HEADER_CHARS = 600 # titles sit at the top of the page
+MIN_NUMBERS = 8 # a statement page is mostly figures
+LINE_TOL = 3.0 # points; words closer than this vertically are on the same row
+
+_NUM_RE = re.compile(r'^\(?-?[€$£]?\d[\d.,]*\)?%?$')
+_YEAR_RE = re.compile(r'^(19|20)\d{2}$')
+
+# --- Token helpers ---
+def parse_number(tok: str):
+    """'1,234.5' / '(1,234)' / '1.234,5' / '-' -> float (None if not a number)."""
+    tok = tok.strip()
+    if tok in ('-', '—', '–'): return 0.0
+    if not _NUM_RE.match(tok): return None
+    neg = tok.startswith('(') and tok.endswith(')') or tok.startswith('-')
+    tok = tok.strip('()-%€$£')
+    if ',' in tok and '.' in tok:
+        tok = tok.replace('.', '').replace(',', '.') if tok.rfind(',') > tok.rfind('.') else tok.replace(',', '')
+    elif ',' in tok:
+        tok = tok.replace(',', '') if len(tok.rsplit(',', 1)[1]) == 3 else tok.replace(',', '.')
+    elif tok.count('.') > 1 or (tok.count('.') == 1 and len(tok.rsplit('.', 1)[1]) == 3 and tok[0] != '0'):
+        tok = tok.replace('.', '') # 1.234.567 / 12.345 thousands separators
+    try: val = float(tok)
+    except ValueError: return None
+    return -val if neg else val
+
+def _count_numbers(text):
+    return sum(1 for tok in text.split() if _NUM_RE.match(tok))
+
+def classify_statement(text):
+    head = text[:HEADER_CHARS].lower()
+    for kind, titles in STATEMENT_TITLES.items():
+        if any(t in head for t in titles): return kind
+    return None
+
+def _scale(text):
+    low = text[:HEADER_CHARS * 2].lower()
+    for word, mult in SCALE_WORDS.items():
+        if word in low: return mult
+    return 1.0
+
+# --- Stage 1: streaming pre-scan ---
+def iter_pages(path):
+    """Yield (page_no, text) one page at a time; only one page's text is alive at once."""
+    with fitz.open(path) as doc:
+        for i in range(doc.page_count):
+            yield i, doc.load_page(i).get_text()
+
+def find_statement_pages(path, stats=None):
+    """Yield (page_no, kind, scale) for pages that look like a financial statement."""
+    prev_kind = None
+    for i, text in iter_pages(path):
+        if stats is not None: stats['pages'] = i + 1
+        kind = classify_statement(text)
+        dense = _count_numbers(text) >= MIN_NUMBERS
+        if kind is None and prev_kind and dense and 'continued' in text[:HEADER_CHARS].lower(): kind = prev_kind
+        if kind and dense:
+            yield i, kind, _scale(text)
+            prev_kind = kind
+        else: prev_kind = None
+
+# --- Stage 2: table parsing (runs in worker processes) ---
+def _page_rows(page):
+    """Words -> text rows, grouped by vertical position and ordered left to right."""
+    words = sorted(page.get_text("words"), key=lambda w: ((w[1] + w[3]) / 2, w[0]))
+    rows, current, y_ref = [], [], None
+    for w in words:
+        y = (w[1] + w[3]) / 2
+        if y_ref is not None and abs(y - y_ref) > LINE_TOL:
+            rows.append(current); current = []
+        if not current: y_ref = y
+        current.append(w)
+    if current: rows.append(current)
+    return [[w[4] for w in sorted(r, key=lambda w: w[0])] for r in rows]
+
+def parse_statement_page(page, scale=1.0):
+    """One statement page -> {label: {year: value}}."""
+    years, items = [], {}
+    for tokens in _page_rows(page):
+        found = [int(t) for t in tokens if _YEAR_RE.match(t)]
+        if len(found) >= 2 or (found and len(found) == len(tokens)):
+            years = found; continue
+        if not years: continue
+        label_toks, values = [], []
+        for t in tokens:
+            v = parse_number(t)
+            if v is None:
+                if values: break # text after the figures: not a table row
+                label_toks.append(t)
+            else: values.append(v)
+        label = ' '.join(label_toks).strip(' :.')
+        if not label or len(values) < len(years): continue
+        mult = 1.0 if any(w in label.lower() for w in PER_SHARE_WORDS) else scale
+        items[label] = {y: v * mult for y, v in zip(years, values[-len(years):])}
+    return items
+
+def _parse_pages(path, pages):
+    out = []
+    with fitz.open(path) as doc:
+        for page_no, kind, scale in pages:
+            out.append((page_no, kind, parse_statement_page(doc.load_page(page_no), scale)))
+    return out
+
+# --- Pipeline ---
+_POOLS = {} # workers -> process pool shared by every call (app jobs, batch items)
+_POOLS_LOCK = threading.Lock()
+
+def _pool(workers, broken=None):
+    """
+    The shared pool of that size; `broken` (a pool that lost a worker) is replaced.
+    Workers are spawned, not forked: callers are often threads of a multi-threaded process.
+    """
+    with _POOLS_LOCK:
+        pool = _POOLS.get(workers)
+        if pool is None or pool is broken:
+            pool = _POOLS[workers] = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+        return pool
+
+def _submit(workers, *args):
+    pool = _pool(workers)
+    try: return pool.submit(_parse_pages, *args)
+    except BrokenProcessPool: return _pool(workers, broken=pool).submit(_parse_pages, *args)
+
+def extract_statements(path, workers: int = None, chunk: int = 1):
+    """
+    Pre-scan the PDF and hand statement pages to a process pool as soon as they are found,
+    so parsing overlaps with the scan. Returns ({label: {year: value}},
+    {'pages': n, 'statement_pages': {kind: [page_no]}, 'pooled_pages': n}).
+    Reports carry only a handful of statement pages, so each page is its own task by default
+    (chunk > 1 batches them). Earlier pages win when the same label shows up on several statements.
+    """
+    workers = workers or min(4, os.cpu_count() or 1)
+    stats = {'pages': 0}
+    results, batch, futures = [], [], []
+    try:
+        for hit in find_statement_pages(path, stats):
+            batch.append(hit)
+            if len(batch) < chunk: continue
+            if workers > 1: futures.append(_submit(workers, path, batch))
+            else: results.extend(_parse_pages(path, batch))
+            batch = []
+        if batch: results.extend(_parse_pages(path, batch)) # tail runs here while workers finish
+        pooled = [page for fut in as_completed(futures) for page in fut.result()]
+        results.extend(pooled)
+    finally:
+        for fut in futures: fut.cancel() # only this call's queued pages: the pool stays up
+
+    items, by_kind = {}, {}
+    for page_no, kind, page_items in sorted(results, key=lambda r: r[0]):
+        by_kind.setdefault(kind, []).append(page_no)
+        for label, vals in page_items.items(): items.setdefault(label, vals)
+    return items, {'pages': stats['pages'], 'statement_pages': by_kind, 'pooled_pages': len(pooled)}
@@ -0,0 +1,94 @@
+# modules/refresh.py (v1.0 - Incremental Fundamentals Refresh)
+# Συγκρίνει τις περιόδους που μόλις ήρθαν με όσες υπάρχουν ήδη στην τοπική cache:
+# προσθέτει μόνο νέες χρήσεις, καταγράφει αναθεωρήσεις και ξαναϋπολογίζει δείκτες
+# μόνο για όσες εταιρείες άλλαξαν.
+import os
+import json
+import datetime
+import numpy as np
+import pandas as pd
+
+RESTATE_RTOL = 1e-4 # relative change below this is rounding noise, not a restatement
+
+def _by_date(df):
+    out = df.loc[:, ~df.columns.duplicated()].drop(columns=['Year'], errors='ignore').copy()
+    out['Date'] = pd.to_datetime(out['Date'])
+    out = out.set_index('Date')
+    return out[~out.index.duplicated(keep='first')] # a period listed twice: the first (newest-first order) row wins
+
+def _values(frame):
+    try: return frame.to_numpy(dtype=float) # statements are numeric already; skip per-column parsing
+    except (TypeError, ValueError): return frame.apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+
+def _num(v): return None if v is None or (isinstance(v, float) and np.isnan(v)) else float(v)
+
+def merge_periods(stored: pd.DataFrame, fetched: pd.DataFrame, rtol: float = RESTATE_RTOL):
+    """
+    Fold freshly fetched statements into the stored ones (both: one row per period with Date).
+    Fetched values win; periods and fields only the store still has are kept, so history
+    grows past the four years Yahoo returns. Returns (merged frame newest first, changes).
+    Each change is {'kind': 'new_period' | 'restated' | 'new_field', 'date', 'field', 'old', 'new'}.
+    """
+    if fetched is None or fetched.empty or 'Date' not in fetched.columns: return stored, []
+    new = _by_date(fetched)
+    old = _by_date(stored) if stored is not None and not stored.empty and 'Date' in stored.columns else new.iloc[0:0]
+
+    # One aligned grid (all periods x all fields): diff and merge are then plain array ops
+    dates = new.index.union(old.index).sort_values(ascending=False)
+    cols = pd.Index(list(new.columns) + [c for c in old.columns if c not in new.columns])
+    a = _values(old.reindex(index=dates, columns=cols)); b = _values(new.reindex(index=dates, columns=cols))
+
+    changes = [{'kind': 'new_period', 'date': str(d.date())} for d in dates[~dates.isin(old.index)]]
+    if len(old):
+        changes += [{'kind': 'new_field', 'field': str(c)} for c in cols[~cols.isin(old.columns)]]
+        # Restatements: a period and field both sides have, with a value that moved (or appeared)
+        both = np.outer(dates.isin(old.index) & dates.isin(new.index), cols.isin(old.columns))
+        with np.errstate(invalid='ignore'):
+            moved = both & ~np.isnan(b) & (np.isnan(a) | ~np.isclose(a, b, rtol=rtol, atol=0))
+        for r, c in zip(*np.nonzero(moved)):
+            changes.append({'kind': 'restated', 'date': str(dates[r].date()), 'field': str(cols[c]), 'old': _num(a[r, c]), 'new': _num(b[r, c])})
+    if not changes: return stored, []
+
+    merged = pd.DataFrame(np.where(np.isnan(b), a, b), index=dates, columns=cols)
+    merged.index.name = 'Date'
+    merged = merged.reset_index()
+    merged['Year'] = merged['Date'].dt.year
+    merged.attrs = dict(fetched.attrs) # e.g. the loader's normalization stamp
+    return merged, changes
+
+def refresh_company(ticker, fetched, cache, analyze, dataset='statements', ratios_dataset='ratios'):
+    """
+    One ticker: merge `fetched` into the cached statements. Unchanged -> only the TTL restarts.
+    Changed -> store the merged statements and `analyze(merged)` (ratio history) as `ratios_dataset`.
+    Returns the list of changes (empty when nothing moved).
+    """
+    stored = cache.peek(ticker, dataset)
+    merged, changes = merge_periods(stored, fetched)
+    if not changes:
+        cache.renew(ticker, dataset, save=False)
+        return []
+    cache.put(ticker, dataset, merged, save=False)
+    ratios = analyze(merged)
+    if ratios is not None and not ratios.empty: cache.put(ticker, ratios_dataset, ratios, save=False)
+    return [{'ticker': ticker, 'dataset': dataset, **c} for c in changes]
+
+# === CHANGE LOG ===
+class ChangeLog:
+    """Append-only JSON lines: one record per new filing / restatement, stamped with the run time."""
+    def __init__(self, path):
+        self.path = path
+        self.run = datetime.datetime.now().isoformat(timespec='seconds')
+
+    def write(self, changes):
+        if not changes: return 0
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as fh:
+            for c in changes: fh.write(json.dumps({'run': self.run, **c}, default=str) + '\n')
+        return len(changes)
+
+def summarize_changes(changes) -> dict:
+    """{'new_period': n, 'restated': n, 'new_field': n, 'tickers': n}"""
+    out = {'new_period': 0, 'restated': 0, 'new_field': 0}
+    for c in changes: out[c['kind']] = out.get(c['kind'], 0) + 1
+    out['tickers'] = len({c['ticker'] for c in changes if 'ticker' in c})
+    return out
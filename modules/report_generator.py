@@ -1,56 +1,98 @@
-# modules/report_generator.py (v5.0 - CFA Compatible)
-from fpdf import FPDF
+# modules/report_generator.py (v6.0 - CFA Compatible, batch & book mode)
+import os
+import re
 import datetime
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from modules.telemetry import count, instrumented
+from modules.lazy import lazy_import
 
-class PDFReport(FPDF):
-    def header(self):
-        self.set_font('Helvetica', 'B', 15)
-        self.cell(0, 10, 'ValuePy - Forensic Analysis Report', ln=True, align='C')
-        self.ln(5)
-    def footer(self):
-        self.set_y(-15)
-        self.set_font('Helvetica', 'I', 8)
-        self.cell(0, 10, f'Page {self.page_no()}', align='C')
+fpdf = lazy_import('fpdf')
+fitz = lazy_import('fitz') # PyMuPDF, only needed to stitch book parts together
+
+# === SHARED LAYOUT (computed once, reused by every report in a batch) ===
+REPORT_TITLE = 'ValuePy - Forensic Analysis Report'
+DISCLAIMER = "Disclaimer: Automated analysis for educational purposes only."
+SECTIONS = [
+    ("1. Liquidity", '1_Liquidity'),
+    ("2. Activity & Efficiency", '2_Activity'),
+    ("3. Solvency", '3_Solvency'),
+    ("4. Profitability", '4_Profitability'),
+    ("5. Management Returns", '5_Management'),
+    ("6. Per Share Data", '6_Per_Share'),
+    ("7. Cash Flow", '7_Cash_Flow'),
+]
+# Peer table: (header, source group, key, column width)
+PEER_COLUMNS = [
+    ("Health", 'Forensics', 'Health_Score', 16), ("Z", 'Forensics', 'Z_Score', 16), ("M", 'Forensics', 'M_Score', 16),
+    ("ROE %", '5_Management', 'ROE', 18), ("ROIC %", '5_Management', 'ROIC', 18), ("Net M. %", '4_Profitability', 'Net_Margin', 20),
+    ("D/E", '3_Solvency', 'Debt_to_Equity', 16), ("Curr.", '1_Liquidity', 'Current_Ratio', 16), ("CCC", '2_Activity', 'CCC', 16),
+]
+
+_PDF_CLASS = None
+
+def _pdf_class():
+    """PDFReport is built on first use, so importing this module does not pull in fpdf."""
+    global _PDF_CLASS
+    if _PDF_CLASS is None:
+        class PDFReport(fpdf.FPDF):
+            def header(self):
+                self.set_font('Helvetica', 'B', 15)
+                self.cell(0, 10, REPORT_TITLE, ln=True, align='C')
+                self.ln(5)
+            def footer(self):
+                self.set_y(-15)
+                self.set_font('Helvetica', 'I', 8)
+                self.cell(0, 10, f'Page {self.page_no()}', align='C')
+        _PDF_CLASS = PDFReport
+    return _PDF_CLASS
+
+def _new_pdf(): return _pdf_class()()
+
+def __getattr__(name): # keeps `from modules.report_generator import PDFReport` working
+    if name == 'PDFReport': return _pdf_class()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def clean_text(text):
     if text is None: return ""
     text = str(text).replace("🟢", "").replace("🔴", "").replace("⚠️", "").replace("✅", "").replace("€", "EUR ")
-    return text.strip()
+    return text.encode('latin-1', 'replace').decode('latin-1').strip() # core fonts are latin-1 only
 
-def create_pdf_bytes(company_name, res):
-    pdf = PDFReport()
-    pdf.add_page()
-    
+def _now(): return datetime.datetime.now().strftime('%Y-%m-%d %H:%M')
+
+def _section_rows(data_dict):
+    """Pairs of (key, value) per grid line (2 cols)."""
+    items = list(data_dict.items())
+    return [items[i:i + 2] for i in range(0, len(items), 2)]
+
+def _render_company(pdf, company_name, res, generated_on):
+    """Lay out one company's report on the current page of `pdf`."""
     # 1. Header
     pdf.set_font("Helvetica", "B", 20)
     pdf.cell(0, 15, txt=f"Report: {clean_text(company_name)}", ln=True, align='L')
     pdf.set_font("Helvetica", "", 10)
-    pdf.cell(0, 10, txt=f"Generated on: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M')}", ln=True)
+    pdf.cell(0, 10, txt=f"Generated on: {generated_on}", ln=True)
     pdf.line(10, 35, 200, 35)
     pdf.ln(10)
 
     # UNPACK DATA (New Structure)
     an = res.get('Analysis', {})
     forensics = res.get('Forensics', {})
-    
+
     def add_section(title, data_dict):
         pdf.set_font("Helvetica", "B", 12)
         pdf.set_fill_color(240, 240, 240)
         pdf.cell(0, 8, title, ln=True, fill=True)
         pdf.ln(2)
         pdf.set_font("Helvetica", "", 10)
-        
+
         # Grid layout simulation (2 cols)
-        keys = list(data_dict.keys())
-        for i in range(0, len(keys), 2):
-            k1 = keys[i]
-            v1 = data_dict[k1]
+        for pair in _section_rows(data_dict):
+            (k1, v1) = pair[0]
             pdf.cell(50, 6, k1 + ":", border=0)
             pdf.cell(40, 6, str(v1), border=0)
-            
-            if i + 1 < len(keys):
-                k2 = keys[i+1]
-                v2 = data_dict[k2]
+            if len(pair) > 1:
+                (k2, v2) = pair[1]
                 pdf.cell(50, 6, k2 + ":", border=0)
                 pdf.cell(40, 6, str(v2), border=0, ln=True)
             else:
@@ -60,7 +102,7 @@ def create_pdf_bytes(company_name, res):
     # 2. Forensics Summary
     pdf.set_font("Helvetica", "B", 14)
     pdf.cell(0, 10, "I. Forensic Health Check", ln=True)
-    
+
     pdf.set_font("Helvetica", "B", 11)
     pdf.cell(60, 8, f"Health Score: {forensics.get('Health_Score',0)}/100", ln=True)
     pdf.set_font("Helvetica", "", 11)
@@ -71,18 +113,143 @@ def create_pdf_bytes(company_name, res):
     # 3. The 7 Pillars
     pdf.set_font("Helvetica", "B", 14)
     pdf.cell(0, 10, "II. Fundamental Analysis (7 Pillars)", ln=True)
-    
-    add_section("1. Liquidity", an.get('1_Liquidity', {}))
-    add_section("2. Activity & Efficiency", an.get('2_Activity', {}))
-    add_section("3. Solvency", an.get('3_Solvency', {}))
-    add_section("4. Profitability", an.get('4_Profitability', {}))
-    add_section("5. Management Returns", an.get('5_Management', {}))
-    add_section("6. Per Share Data", an.get('6_Per_Share', {}))
-    add_section("7. Cash Flow", an.get('7_Cash_Flow', {}))
+    for title, key in SECTIONS: add_section(title, an.get(key, {}))
 
     # Footer Disclaimer
     pdf.ln(10)
     pdf.set_font("Helvetica", "I", 8)
-    pdf.multi_cell(0, 5, "Disclaimer: Automated analysis for educational purposes only.")
+    pdf.multi_cell(0, 5, DISCLAIMER)
+
+@instrumented('report.pdf')
+def create_pdf_bytes(company_name, res, generated_on=None):
+    pdf = _new_pdf()
+    pdf.add_page()
+    _render_company(pdf, company_name, res, generated_on or _now())
+    return bytes(pdf.output())
+
+# === BATCH API ===
+def safe_filename(name):
+    return re.sub(r'[^\w.-]+', '_', str(name)).strip('_') or 'report'
+
+def _render_files(items, out_dir, generated_on):
+    """Worker: one PDF per company, written straight to disk. Returns [(name, path, pages)]."""
+    out = []
+    for name, res in items:
+        pdf = _new_pdf()
+        pdf.add_page()
+        _render_company(pdf, name, res, generated_on)
+        path = os.path.join(out_dir, f"{safe_filename(name)}.pdf")
+        pdf.output(path)
+        out.append((name, path, pdf.page_no()))
+    return out
+
+def _render_book_part(items, path, generated_on):
+    """Worker: consecutive companies in one PDF, each starting on a new page. Returns [(name, pages)]."""
+    pdf = _new_pdf()
+    pages = []
+    for name, res in items:
+        start = pdf.page_no()
+        pdf.add_page()
+        _render_company(pdf, name, res, generated_on)
+        pages.append((name, pdf.page_no() - start))
+    pdf.output(path)
+    return pages
+
+def _peer_value(res, group, key):
+    src = res.get('Forensics', {}) if group == 'Forensics' else res.get('Analysis', {}).get(group, {})
+    val = src.get(key)
+    return "-" if val is None else (f"{val:,.0f}" if key in ('Health_Score', 'CCC') else f"{val:,.2f}")
+
+def _render_front_matter(pdf, names, results, start_pages, title, generated_on):
+    """Cover, table of contents and peer comparison table (sorted by Health Score)."""
+    pdf.add_page()
+    pdf.set_font("Helvetica", "B", 22)
+    pdf.cell(0, 15, clean_text(title), ln=True, align='L')
+    pdf.set_font("Helvetica", "", 10)
+    pdf.cell(0, 8, f"{len(names)} companies - generated on {generated_on}", ln=True)
+    pdf.ln(4)
+
+    pdf.set_font("Helvetica", "B", 14)
+    pdf.cell(0, 10, "Contents", ln=True)
+    pdf.set_font("Helvetica", "", 10)
+    for name in names:
+        pdf.cell(150, 6, clean_text(name), border=0)
+        pdf.cell(0, 6, str(start_pages.get(name, '')), border=0, ln=True, align='R')
+
+    pdf.add_page()
+    pdf.set_font("Helvetica", "B", 14)
+    pdf.cell(0, 10, "Peer Comparison", ln=True)
+    ranked = sorted(names, key=lambda n: -(results[n].get('Forensics', {}).get('Health_Score') or 0))
+
+    def table_header():
+        pdf.set_font("Helvetica", "B", 9)
+        pdf.set_fill_color(240, 240, 240)
+        pdf.cell(38, 7, "Company", border=1, fill=True)
+        for head, _, _, w in PEER_COLUMNS: pdf.cell(w, 7, head, border=1, fill=True, align='C')
+        pdf.ln()
+        pdf.set_font("Helvetica", "", 9)
+
+    table_header()
+    for name in ranked:
+        if pdf.get_y() > pdf.h - 25:
+            pdf.add_page(); table_header()
+        pdf.cell(38, 6, clean_text(name)[:22], border=1)
+        for _, group, key, w in PEER_COLUMNS: pdf.cell(w, 6, _peer_value(results[name], group, key), border=1, align='R')
+        pdf.ln()
+
+@instrumented('report.batch')
+def create_pdf_batch(results: dict, out_dir: str, mode: str = "files", workers: int = None, chunk: int = 25,
+                     book_name: str = "book.pdf", title: str = "ValuePy - Peer Book"):
+    """
+    Render many analysis results ({company: calculate_financial_ratios result}) in worker processes.
+    mode="files": one PDF per company in out_dir. mode="book": one combined PDF with contents,
+    peer comparison table and bookmarks. mode="both": both. Output goes straight to disk.
+    Returns {'files': [paths], 'book': path or None, 'pages': total pages rendered}.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    generated_on = _now()
+    names = list(results)
+    batches = [[(n, results[n]) for n in names[i:i + chunk]] for i in range(0, len(names), chunk)]
+    workers = workers or min(len(batches), os.cpu_count() or 1) or 1
+    out = {'files': [], 'book': None, 'pages': 0}
+
+    def run(fn, jobs):
+        if workers <= 1 or len(jobs) <= 1: return [fn(*j) for j in jobs]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futs = {pool.submit(fn, *j): i for i, j in enumerate(jobs)}
+            done = [None] * len(jobs)
+            for f in as_completed(futs): done[futs[f]] = f.result()
+            return done
+
+    if mode in ("files", "both"):
+        for part in run(_render_files, [(b, out_dir, generated_on) for b in batches]):
+            out['files'] += [p for _, p, _ in part]; out['pages'] += sum(n for _, _, n in part)
+
+    if mode in ("book", "both"):
+        with tempfile.TemporaryDirectory(dir=out_dir) as tmp:
+            parts = [os.path.join(tmp, f"part_{i:05d}.pdf") for i in range(len(batches))]
+            page_counts = run(_render_book_part, [(b, p, generated_on) for b, p in zip(batches, parts)])
+            out['book'] = _assemble_book(names, results, parts, page_counts, os.path.join(out_dir, book_name), title, generated_on)
+            out['pages'] += sum(n for pc in page_counts for _, n in pc)
+    count('report.pages', out['pages'])
+    return out
+
+def _assemble_book(names, results, parts, page_counts, path, title, generated_on):
+    """
+    Front matter first, then each rendered part appended with an incremental save: only the
+    part being added (plus the growing xref) is in memory, never the whole book.
+    """
+    # Front matter length does not depend on the page numbers printed in it
+    probe = _new_pdf(); _render_front_matter(probe, names, results, {}, title, generated_on)
+    front_pages = probe.page_no()
+    start_pages, page = {}, front_pages + 1
+    for pc in page_counts:
+        for name, n in pc: start_pages[name] = page; page += n
 
-    return bytes(pdf.output())
\ No newline at end of file
+    front = _new_pdf(); _render_front_matter(front, names, results, start_pages, title, generated_on)
+    front.output(path)
+    for part in parts:
+        with fitz.open(path) as book, fitz.open(part) as src: book.insert_pdf(src); book.saveIncr()
+    with fitz.open(path) as book:
+        book.set_toc([[1, "Contents", 1]] + [[1, str(n), start_pages[n]] for n in names]); book.saveIncr()
+    return path
@@ -0,0 +1,241 @@
+# modules/screener.py (v1.0 - Indexed Ratio Screener)
+# Στηλοθετημένος πίνακας δεικτών (μία γραμμή ανά εταιρεία-χρήση) με ταξινομημένο ευρετήριο ανά δείκτη:
+# φίλτρα εύρους με searchsorted, συνδυασμός με bitmaps (and / or / not), top-k κατά οποιονδήποτε δείκτη.
+#
+#   table = RatioTable.from_rows(rows)
+#   table.screen("Z_Score > 2.99 and ROIC > 12 and CCC < 60", by='ROIC', k=20)
+import re
+import ast
+import difflib
+import numpy as np
+import pandas as pd
+from modules.analyzer import flatten_ratios
+
+KEY_COLUMNS = ['Id', 'Sector', 'Year', 'Period'] # labels, not screened numerically (Year is both)
+_TEXT_KEYS = ('Id', 'Sector', 'Period')
+_CMP = {ast.Gt: '>', ast.GtE: '>=', ast.Lt: '<', ast.LtE: '<=', ast.Eq: '==', ast.NotEq: '!='}
+_FLIP = {'>': '<', '>=': '<=', '<': '>', '<=': '>=', '==': '==', '!=': '!='}
+
+def _alias(name): return re.sub(r'[^a-z0-9]', '', str(name).lower())
+
+def _prepare(expr: str) -> str:
+    """Friendlier syntax -> Python: AND/OR/NOT in any case, single '=', trailing '%' on numbers."""
+    expr = re.sub(r'\b(and|or|not|in)\b', lambda m: m.group(1).lower(), expr, flags=re.IGNORECASE)
+    expr = re.sub(r'(?<![<>=!])=(?!=)', '==', expr)
+    return re.sub(r'(\d)\s*%', r'\1', expr)
+
+def _reverse_keeping_ties(order, sorted_vals):
+    """Descending view of an ascending stable index whose equal values stay in table order (a stable descending sort)."""
+    vals = sorted_vals[::-1]
+    if not len(vals): return order
+    new = np.empty(len(vals), dtype=bool); new[0] = True; new[1:] = vals[1:] != vals[:-1]
+    starts = np.flatnonzero(new); ends = np.append(starts[1:], len(vals)) - 1
+    run = np.cumsum(new) - 1
+    return order[::-1][starts[run] + ends[run] - np.arange(len(vals))]
+
+class RatioTable:
+    """
+    Columnar ratio table: one float64 array per metric, key columns as arrays / categoricals.
+    Sorted per-metric indexes are built on first use and reused by every later query.
+    """
+    def __init__(self, frame: pd.DataFrame, id_col: str = 'Id'):
+        frame = frame.reset_index(drop=True).rename(columns={id_col: 'Id'})
+        self.n = len(frame)
+        self.keys = {}
+        for k in KEY_COLUMNS:
+            if k not in frame.columns: continue
+            self.keys[k] = pd.Categorical(frame[k].astype(str)) if k in _TEXT_KEYS else frame[k].to_numpy()
+        self.columns = {}
+        for c in frame.columns:
+            if c in _TEXT_KEYS: continue
+            vals = pd.to_numeric(frame[c], errors='coerce') if frame[c].dtype == object else frame[c]
+            if vals.dtype.kind in 'fiub': self.columns[c] = vals.to_numpy(dtype=np.float64, na_value=np.nan)
+        self._aliases = {_alias(c): c for c in [*self.columns, *self.keys]}
+        self._index = {} # metric -> (row order of non-NaN values, sorted values)
+        self._latest = None
+
+    # --- Constructors ---
+    @classmethod
+    def from_rows(cls, rows, id_col: str = 'Id'):
+        """Flat rows ({'Id', 'Sector', 'Year', metric: value}), e.g. batch_runner results."""
+        return cls(pd.DataFrame(list(rows)), id_col)
+
+    @classmethod
+    def from_results(cls, results: dict, sectors: dict = None):
+        """{id: nested calculate_financial_ratios result} (one row per company)."""
+        sectors = sectors or {}
+        return cls.from_rows({'Id': k, 'Sector': sectors.get(k, "General"), **flatten_ratios(res)} for k, res in results.items() if res)
+
+    @classmethod
+    def from_benchmarks(cls, store):
+        """Every company of a SectorBenchmarks universe (latest values)."""
+        return cls.from_rows(store.rows())
+
+    def __len__(self): return self.n
+
+    @property
+    def nbytes(self) -> int:
+        arrays = [*self.columns.values(), *(a for idx in self._index.values() for a in idx)]
+        return sum(a.nbytes for a in arrays) + sum(getattr(k, 'nbytes', 0) for k in self.keys.values())
+
+    # --- Indexes ---
+    def resolve(self, name) -> str:
+        """Column for a (case / underscore tolerant) name, e.g. 'z score' -> 'Z_Score'."""
+        hit = self._aliases.get(_alias(name))
+        if hit is None:
+            close = difflib.get_close_matches(_alias(name), list(self._aliases), n=3)
+            raise ValueError(f"unknown ratio '{name}'" + (f"; did you mean {', '.join(self._aliases[c] for c in close)}?" if close else ""))
+        return hit
+
+    def index(self, name):
+        """(row order, sorted values) for one metric, NaN rows excluded; built once."""
+        name = self.resolve(name)
+        if name not in self._index:
+            vals = self.columns[name]
+            order = np.argsort(vals, kind='stable') # NaN sorts last
+            order = order[:self.n - int(np.isnan(vals).sum())]
+            self._index[name] = (order, vals[order])
+        return self._index[name]
+
+    def build_indexes(self, names=None):
+        for name in (names or self.columns): self.index(name)
+        return self
+
+    # --- Bitmaps ---
+    def all(self): return np.ones(self.n, dtype=bool)
+
+    def range(self, name, lo=-np.inf, hi=np.inf, lo_inclusive=True, hi_inclusive=True):
+        """Rows with lo <= value <= hi (bounds optionally strict): two binary searches and one scatter."""
+        order, sorted_vals = self.index(name)
+        a = np.searchsorted(sorted_vals, lo, 'left' if lo_inclusive else 'right')
+        b = np.searchsorted(sorted_vals, hi, 'right' if hi_inclusive else 'left')
+        mask = np.zeros(self.n, dtype=bool)
+        mask[order[a:b]] = True
+        return mask
+
+    def compare(self, name, op, value):
+        """One `column op value` clause as a bitmap (numeric range, or label equality for Id / Sector / Period)."""
+        name = self.resolve(name)
+        if name in _TEXT_KEYS:
+            cat = self.keys[name]
+            values = value if isinstance(value, (list, tuple, set)) else [value]
+            codes = [cat.categories.get_loc(str(v)) for v in values if str(v) in cat.categories]
+            mask = np.isin(cat.codes, codes)
+            if op in ('==', 'in'): return mask
+            if op in ('!=', 'not in'): return ~mask
+            raise ValueError(f"'{name}' only supports ==, != and in")
+        if op in ('in', 'not in'):
+            mask = np.zeros(self.n, dtype=bool)
+            for v in value: mask |= self.range(name, v, v)
+            return mask if op == 'in' else ~mask & self.range(name)
+        value = float(value)
+        if op == '>': return self.range(name, lo=value, lo_inclusive=False)
+        if op == '>=': return self.range(name, lo=value)
+        if op == '<': return self.range(name, hi=value, hi_inclusive=False)
+        if op == '<=': return self.range(name, hi=value)
+        if op == '==': return self.range(name, value, value)
+        if op == '!=': return self.range(name) & ~self.range(name, value, value)
+        raise ValueError(f"unsupported operator {op}")
+
+    def latest(self):
+        """Bitmap of each Id's newest row (by Year, then Period)."""
+        if self._latest is None:
+            ids = self.keys['Id'].codes if 'Id' in self.keys else np.arange(self.n)
+            year = self.columns.get('Year', np.zeros(self.n))
+            period = self.keys['Period'].codes if 'Period' in self.keys else np.zeros(self.n)
+            order = np.lexsort((period, np.nan_to_num(year, nan=-np.inf), ids))
+            last = np.ones(self.n, dtype=bool)
+            last[:-1] = ids[order][:-1] != ids[order][1:]
+            self._latest = np.zeros(self.n, dtype=bool); self._latest[order[last]] = True
+        return self._latest
+
+    def where(self, expr: str):
+        """Bitmap of the rows matching a filter expression (see _Compiler)."""
+        if not expr or not str(expr).strip(): return self.all()
+        try: tree = ast.parse(_prepare(str(expr)), mode='eval')
+        except SyntaxError as e: raise ValueError(f"bad screen expression: {e.msg}") from None
+        return _Compiler(self).visit(tree.body)
+
+    # --- Results ---
+    def top(self, k, by, ascending=False, mask=None):
+        """Row numbers of the k best rows by a metric (NaN never ranks; ties in table order), optionally within a bitmap."""
+        order, sorted_vals = self.index(by)
+        rows = order if ascending else _reverse_keeping_ties(order, sorted_vals)
+        if mask is not None: rows = rows[mask[rows]]
+        return rows if k is None else rows[:k]
+
+    def frame(self, rows, columns=None) -> pd.DataFrame:
+        cols = [self.resolve(c) for c in columns] if columns else list(self.columns)
+        out = {k: v[rows] for k, v in self.keys.items()} # labels first, Year keeps its own dtype
+        out.update({c: self.columns[c][rows] for c in cols if c not in out})
+        return pd.DataFrame(out)
+
+    def screen(self, expr: str = None, by: str = None, k: int = None, ascending: bool = False,
+               latest: bool = False, columns=None) -> pd.DataFrame:
+        """
+        Rows matching `expr`, best first by `by` (table order otherwise), at most k.
+        latest=True keeps only each company's newest year. Column names are case / underscore tolerant.
+        """
+        mask = self.where(expr)
+        if latest: mask &= self.latest()
+        rows = self.top(k, by, ascending, mask) if by else np.flatnonzero(mask)[:k]
+        if columns and by and self.resolve(by) not in [self.resolve(c) for c in columns]: columns = [*columns, by]
+        return self.frame(rows, columns)
+
+    def count(self, expr: str = None, latest: bool = False) -> int:
+        mask = self.where(expr)
+        return int((mask & self.latest()).sum() if latest else mask.sum())
+
+class _Compiler(ast.NodeVisitor):
+    """
+    Filter expression AST -> bitmap. Grammar: comparisons between one column and numbers
+    (chains like `10 < ROIC <= 25` allowed), `Sector == 'Energy'`, `Sector in ('Energy', 'Utilities')`,
+    combined with and / or / not (or & | ~) and parentheses.
+    """
+    def __init__(self, table): self.t = table
+
+    def visit_BoolOp(self, node):
+        masks = [self.visit(v) for v in node.values]
+        out = masks[0].copy()
+        for m in masks[1:]:
+            if isinstance(node.op, ast.And): out &= m
+            else: out |= m
+        return out
+
+    def visit_BinOp(self, node):
+        if isinstance(node.op, ast.BitAnd): return self.visit(node.left) & self.visit(node.right)
+        if isinstance(node.op, ast.BitOr): return self.visit(node.left) | self.visit(node.right)
+        raise ValueError("use and / or / not to combine conditions")
+
+    def visit_UnaryOp(self, node):
+        if isinstance(node.op, (ast.Not, ast.Invert)): return ~self.visit(node.operand)
+        raise ValueError("unexpected unary operator")
+
+    def visit_Compare(self, node):
+        terms = [node.left, *node.comparators]
+        out = None
+        for left, op, right in zip(terms, node.ops, terms[1:]):
+            mask = self._clause(left, op, right)
+            out = mask if out is None else out & mask
+        return out
+
+    def visit_Name(self, node): # bare boolean column, e.g. `not Is_Paper_Profits`
+        return self.t.compare(node.id, '==', 1.0)
+
+    def generic_visit(self, node):
+        raise ValueError(f"unsupported syntax in screen: {type(node).__name__}")
+
+    def _clause(self, left, op, right):
+        if isinstance(op, (ast.In, ast.NotIn)):
+            if not isinstance(left, ast.Name): raise ValueError("write `Column in (...)`")
+            return self.t.compare(left.id, 'in' if isinstance(op, ast.In) else 'not in', self._literal(right))
+        sym = _CMP.get(type(op))
+        if sym is None: raise ValueError("unsupported comparison")
+        if isinstance(left, ast.Name) and not isinstance(right, ast.Name): return self.t.compare(left.id, sym, self._literal(right))
+        if isinstance(right, ast.Name) and not isinstance(left, ast.Name): return self.t.compare(right.id, _FLIP[sym], self._literal(left))
+        raise ValueError("each comparison needs exactly one column and one value")
+
+    @staticmethod
+    def _literal(node):
+        try: return ast.literal_eval(node)
+        except ValueError: raise ValueError(f"expected a number or text, got {ast.dump(node)}") from None
@@ -0,0 +1,163 @@
+# modules/telemetry.py (v1.0 - Pipeline Instrumentation)
+# Χρονομέτρηση σταδίων (spans), μετρητές και μέγιστη μνήμη για fetch -> normalize -> analyze -> PDF.
+# Απενεργοποιημένο (default) κοστίζει μόνο έναν έλεγχο boolean ανά κλήση.
+# Ένα ενεργό trace() καταγράφει τα spans του δικού του νήματος ακόμη κι όταν τα process metrics είναι κλειστά.
+#
+#   VALUEPY_TELEMETRY=1 python batch_runner.py ...      # enable from the environment
+#   VALUEPY_TELEMETRY=1 streamlit run app.py            # process metrics for the app (the Debug toggle is per session)
+#   telemetry.enable(); ...; telemetry.write('metrics.prom')
+import os
+import sys
+import json
+import time
+import logging
+import threading
+from functools import wraps
+
+try: import resource # not on Windows
+except ImportError: resource = None
+
+logger = logging.getLogger('valuepy.telemetry')
+
+class _State:
+    enabled = os.environ.get('VALUEPY_TELEMETRY', '') not in ('', '0', 'false')
+    log = os.environ.get('VALUEPY_TELEMETRY_LOG', '') not in ('', '0', 'false') # one JSON log line per span
+    traces = 0 # active traces in any thread: spans must be timed for them even when disabled
+
+_STATE = _State()
+_LOCK = threading.Lock()
+_SPANS = {} # name -> {'count', 'total', 'max', 'rss_growth'}
+_COUNTERS = {} # name -> value
+_LOCAL = threading.local() # per-thread span depth and active trace
+_RSS_UNIT = 1 if sys.platform == 'darwin' else 1024 # ru_maxrss is bytes on macOS, KiB on Linux
+
+def enable(on: bool = True, log: bool = None):
+    _STATE.enabled = on
+    if log is not None: _STATE.log = log
+
+def enabled() -> bool: return _STATE.enabled
+
+def reset():
+    with _LOCK: _SPANS.clear(); _COUNTERS.clear()
+
+def rss_max_bytes():
+    """Process high-water RSS in bytes."""
+    if resource is None: return 0
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * _RSS_UNIT
+
+def _key(name, labels):
+    return name if not labels else name + '{' + ','.join(f'{k}="{v}"' for k, v in sorted(labels.items())) + '}'
+
+# === SPANS ===
+class _NullSpan:
+    __slots__ = ()
+    def __enter__(self): return self
+    def __exit__(self, *exc): return False
+
+_NULL = _NullSpan()
+
+class _Span:
+    __slots__ = ('name', 't0', 'rss0', 'depth')
+    def __init__(self, name): self.name = name
+
+    def __enter__(self):
+        self.depth = getattr(_LOCAL, 'depth', 0); _LOCAL.depth = self.depth + 1
+        self.rss0 = rss_max_bytes(); self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        dt = time.perf_counter() - self.t0
+        growth = rss_max_bytes() - self.rss0
+        _LOCAL.depth = self.depth
+        trace = getattr(_LOCAL, 'trace', None)
+        if trace is not None: trace.append({'span': self.name, 'depth': self.depth, 'start': self.t0 - trace.t0, 'seconds': dt, 'rss_growth': growth})
+        if not _STATE.enabled: return False # timed only for this thread's trace
+        with _LOCK:
+            s = _SPANS.get(self.name)
+            if s is None: s = _SPANS[self.name] = {'count': 0, 'total': 0.0, 'max': 0.0, 'rss_growth': 0}
+            s['count'] += 1; s['total'] += dt; s['max'] = max(s['max'], dt); s['rss_growth'] += growth
+        if _STATE.log: logger.info(json.dumps({'span': self.name, 'seconds': round(dt, 6), 'depth': self.depth, 'rss_growth': growth}))
+        return False
+
+def span(name, **labels):
+    """`with span('loader.normalize'):` - times the block when telemetry is enabled (or for this thread's trace), no-op otherwise."""
+    if not (_STATE.enabled or _STATE.traces and getattr(_LOCAL, 'trace', None) is not None): return _NULL
+    return _Span(_key(name, labels))
+
+def instrumented(name):
+    """Decorator form of span()."""
+    def wrap(fn):
+        @wraps(fn)
+        def inner(*args, **kwargs):
+            if not (_STATE.enabled or _STATE.traces and getattr(_LOCAL, 'trace', None) is not None): return fn(*args, **kwargs)
+            with _Span(name): return fn(*args, **kwargs)
+        return inner
+    return wrap
+
+def count(name, n=1, **labels):
+    if not _STATE.enabled: return
+    key = _key(name, labels)
+    with _LOCK: _COUNTERS[key] = _COUNTERS.get(key, 0) + n
+
+# === TRACES (per-stage breakdown of one run) ===
+class Trace(list):
+    """Spans finished on this thread while the trace is active, in completion order (recorded even when disabled)."""
+    def __init__(self, name):
+        super().__init__(); self.name = name; self.t0 = time.perf_counter(); self.seconds = 0.0; self.rss_max = 0
+
+    def __enter__(self):
+        self._prev = getattr(_LOCAL, 'trace', None); _LOCAL.trace = self
+        with _LOCK: _STATE.traces += 1
+        return self
+
+    def __exit__(self, *exc):
+        _LOCAL.trace = self._prev
+        with _LOCK: _STATE.traces -= 1
+        self.seconds = time.perf_counter() - self.t0; self.rss_max = rss_max_bytes()
+        return False
+
+    def start(self): return self.__enter__()
+    def stop(self): self.__exit__(None, None, None); return self
+
+    def stages(self):
+        """[{'span', 'depth', 'start', 'seconds', 'rss_growth'}] ordered by start time."""
+        return sorted(self, key=lambda s: s['start'])
+
+def trace(name='run'):
+    """`with trace('analysis') as t:` collects the spans of one run on this thread, whether or not telemetry is enabled."""
+    return Trace(name)
+
+# === EXPORT ===
+def snapshot() -> dict:
+    with _LOCK:
+        return {'enabled': _STATE.enabled, 'spans': {k: dict(v) for k, v in _SPANS.items()},
+                'counters': dict(_COUNTERS), 'rss_max_bytes': rss_max_bytes()}
+
+def to_prometheus(prefix='valuepy') -> str:
+    snap = snapshot(); lines = []
+    def metric(name, kind, helptext, rows):
+        lines.append(f"# HELP {prefix}_{name} {helptext}"); lines.append(f"# TYPE {prefix}_{name} {kind}")
+        lines.extend(f"{prefix}_{name}{labels} {value}" for labels, value in rows)
+    def span_label(key):
+        name, _, rest = key.partition('{')
+        return '{span="' + name + '"' + (',' + rest if rest else '}')
+    spans = sorted(snap['spans'].items())
+    metric('span_seconds_total', 'counter', 'Total seconds spent in a pipeline stage.', [(span_label(k), f"{v['total']:.6f}") for k, v in spans])
+    metric('span_calls_total', 'counter', 'Times a pipeline stage ran.', [(span_label(k), v['count']) for k, v in spans])
+    metric('span_seconds_max', 'gauge', 'Slowest single run of a pipeline stage.', [(span_label(k), f"{v['max']:.6f}") for k, v in spans])
+    metric('span_rss_growth_bytes_total', 'counter', 'Growth of the RSS high-water mark inside a stage.', [(span_label(k), v['rss_growth']) for k, v in spans])
+    counters = {}
+    for key, value in sorted(snap['counters'].items()):
+        name, _, rest = key.partition('{')
+        counters.setdefault(name, []).append(('{' + rest if rest else '', value))
+    for name, rows in counters.items(): metric(name.replace('.', '_') + '_total', 'counter', f"Counter {name}.", rows)
+    metric('rss_max_bytes', 'gauge', 'Process RSS high-water mark.', [('', snap['rss_max_bytes'])])
+    return '\n'.join(lines) + '\n'
+
+def write(path):
+    """Atomically write the current metrics; '.json' -> snapshot(), anything else -> Prometheus text."""
+    body = json.dumps(snapshot(), indent=2) if path.endswith('.json') else to_prometheus()
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as fh: fh.write(body)
+    os.replace(tmp, path)
+    return path
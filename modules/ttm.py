@@ -0,0 +1,93 @@
+# modules/ttm.py (v1.0 - Quarterly & Trailing-Twelve-Month Series)
+# Τριμηνιαίες καταστάσεις -> σειρές TTM: κυλιόμενο άθροισμα 4 τριμήνων για τα μεγέθη ροής
+# (αποτελέσματα, ταμειακές ροές), τιμή τέλους τριμήνου για τον ισολογισμό. Όλες οι εταιρείες μαζί.
+import numpy as np
+import pandas as pd
+from modules.analyzer import FIELD_SOURCES, calculate_ratios_wide
+
+# Normalized fields measured over a period (summed over four quarters); everything else is point-in-time
+FLOW_KEYS = ['revenue', 'cogs', 'ebit', 'net_income', 'interest', 'ebitda', 'depreciation', 'sga', 'eps',
+             'cfo', 'cfi', 'cff', 'capex', 'dividends']
+FLOW_FIELDS = frozenset([c for k in FLOW_KEYS for c in FIELD_SOURCES[k]] + ['GrossProfit', 'FreeCashFlow'])
+WINDOW = 4
+WINDOW_DAYS = (250, 300) # first -> last quarter end of a gap-free window is ~273 days
+STORAGE_DTYPE = np.float32 # ~7 significant digits: plenty for statement values feeding ratios
+
+def stack_quarters(frames: dict, dtype=STORAGE_DTYPE) -> pd.DataFrame:
+    """
+    {ticker: normalized quarterly df (Date column)} -> one wide frame indexed by (Ticker, Date),
+    oldest quarter first within each ticker, one `dtype` column per field (union over tickers).
+    The MultiIndex keeps tickers as integer codes, so 10+ years x thousands of tickers stays compact.
+    """
+    cols, blocks = {}, []
+    for ticker, df in frames.items():
+        if df is None or df.empty or 'Date' not in df.columns: continue
+        if df.columns.has_duplicates: df = df.loc[:, ~df.columns.duplicated()]
+        num = df.select_dtypes('number')
+        names = num.columns.tolist()
+        keep = [i for i, c in enumerate(names) if c != 'Year']
+        pos = [cols.setdefault(names[i], len(cols)) for i in keep]
+        dates = df['Date'] if df['Date'].dtype.kind == 'M' else pd.to_datetime(df['Date'])
+        blocks.append((ticker, dates.to_numpy(), pos, num.to_numpy(dtype=dtype)[:, keep]))
+    if not blocks: return pd.DataFrame(index=pd.MultiIndex.from_arrays([[], []], names=['Ticker', 'Date']))
+
+    # One preallocated block filled per ticker (a concat of thousands of differently-shaped frames crawls)
+    sizes = [len(b[1]) for b in blocks]
+    values = np.full((sum(sizes), len(cols)), np.nan, dtype=dtype)
+    row = 0
+    for (_, _, pos, vals), size in zip(blocks, sizes):
+        values[row:row + size, pos] = vals; row += size
+    index = pd.MultiIndex.from_arrays([np.repeat([b[0] for b in blocks], sizes), np.concatenate([b[1] for b in blocks])], names=['Ticker', 'Date'])
+    wide = pd.DataFrame(values, index=index, columns=list(cols))
+    wide = wide[~wide.index.duplicated(keep='first')]
+    return wide.sort_index(level=[0, 1])
+
+def ttm_panel(wide: pd.DataFrame, flows=None, dtype=STORAGE_DTYPE) -> pd.DataFrame:
+    """
+    Quarterly wide frame (see stack_quarters) -> TTM rows on the same (Ticker, Date) index.
+    A row exists only where the ticker has four consecutive quarters ending at that date.
+    Flow fields (`flows`, default FLOW_FIELDS) are the four-quarter sum, NaN if any quarter
+    lacks the value; other fields are the quarter-end value. Sums run in float64, stored as `dtype`.
+    """
+    if wide.empty: return wide
+    wide = wide.sort_index(level=[0, 1])
+    flows = FLOW_FIELDS if flows is None else frozenset(flows)
+    groups = wide.index.codes[0]
+    days = wide.index.get_level_values(1).to_numpy(dtype='datetime64[D]').astype(np.int64)
+
+    # Window ending at row i = rows i-3..i: same ticker and no missing quarter in between
+    n = len(wide); k = WINDOW - 1
+    ok = np.zeros(n, dtype=bool)
+    if n > k:
+        span = days[k:] - days[:-k]
+        ok[k:] = (groups[k:] == groups[:-k]) & (span >= WINDOW_DAYS[0]) & (span <= WINDOW_DAYS[1])
+
+    out = {}
+    for col in wide.columns:
+        x = wide[col].to_numpy(dtype=np.float64)
+        if col in flows:
+            s = np.full(n, np.nan)
+            if n > k: s[k:] = sum(x[k - j:n - j] for j in range(WINDOW))
+            x = s
+        out[col] = x[ok].astype(dtype)
+    return pd.DataFrame(out, index=wide.index[ok])
+
+def company_ttm(df: pd.DataFrame, flows=None) -> pd.DataFrame:
+    """
+    One company's normalized quarterly frame -> TTM frame shaped like the annual one
+    (Date, Year, fields; newest first), ready for calculate_financial_ratios(df, period='ttm').
+    """
+    ttm = ttm_panel(stack_quarters({'_': df}, dtype=np.float64), flows, dtype=np.float64)
+    if ttm.empty: return pd.DataFrame()
+    out = ttm.droplevel(0).sort_index(ascending=False).reset_index()
+    out['Year'] = out['Date'].dt.year
+    return out
+
+def ttm_ratios(frames: dict, flows=None) -> pd.DataFrame:
+    """{ticker: normalized quarterly df} -> TTM ratios for every ticker and window in one pass."""
+    ttm = ttm_panel(stack_quarters(frames), flows)
+    if ttm.empty: return pd.DataFrame()
+    return calculate_ratios_wide(ttm, period='ttm')
+
+def memory_mb(df: pd.DataFrame) -> float:
+    return round(df.memory_usage(deep=True, index=True).sum() / 2**20, 2)
@@ -0,0 +1,109 @@
+# modules/valuation.py (v1.0 - DCF / EVA Sensitivity & Monte Carlo)
+# Αποτίμηση πάνω σε ολόκληρα πλέγματα WACC x growth x margin και προσομοίωση Monte Carlo,
+# με NumPy broadcasting σε κομμάτια σταθερού μεγέθους (φραγμένη μνήμη).
+import numpy as np
+from modules.analyzer import TAX_RATE
+
+STAGE1_YEARS = 5 # explicit growth at the input rate
+FADE_YEARS = 5 # linear fade to the terminal rate
+TERMINAL_GROWTH = 0.02
+RONIC_FLOOR = 0.05 # return on new capital used for reinvestment needs (never below this)
+DEFAULT_CHUNK = 1 << 16 # scenarios per broadcast block: ~chunk x years x 8 bytes per temporary
+PERCENTILES = [5, 25, 50, 75, 95]
+
+# === INPUTS ===
+def valuation_inputs(res: dict) -> dict:
+    """Base case from a calculate_financial_ratios result, or None when there is nothing to value."""
+    val = res.get('Valuation', {}); an = res.get('Analysis', {})
+    nopat = float(val.get('NOPAT', 0) or 0)
+    margin = float(an.get('4_Profitability', {}).get('Operating_Margin', 0) or 0) / 100
+    if nopat == 0 or margin == 0: return None
+    revenue = nopat / (1 - TAX_RATE) / margin
+    growth = res.get('Growth', {}).get('Revenue_Growth', 0) or 0
+    return {'revenue': revenue, 'margin': margin, 'tax': TAX_RATE, 'nopat': nopat,
+            'invested_capital': float(val.get('Invested_Capital', 0) or 0),
+            'roic': float(an.get('5_Management', {}).get('ROIC', 0) or 0) / 100,
+            'growth': float(np.clip(growth / 100, -0.10, 0.30))}
+
+# === CORE (one block of scenarios) ===
+def growth_paths(growth, terminal=TERMINAL_GROWTH, stage1=STAGE1_YEARS, fade=FADE_YEARS):
+    """(k,) growth rates -> (k, stage1 + fade) yearly rates: flat, then linear fade to terminal."""
+    g = np.asarray(growth, dtype=float)[:, None]
+    w = np.concatenate([np.zeros(stage1), np.arange(1, fade + 1) / (fade + 1)])[None, :]
+    return g * (1 - w) + terminal * w
+
+def _dcf_block(inputs, wacc, growth, margin, terminal, stage1, fade):
+    """Enterprise value for k scenarios (1-D arrays of equal length)."""
+    rates = growth_paths(growth, terminal, stage1, fade) # (k, T)
+    revenue = inputs['revenue'] * np.cumprod(1 + rates, axis=1)
+    nopat = revenue * (margin * (1 - inputs['tax']))[:, None]
+    ronic = max(inputs['roic'], RONIC_FLOOR)
+    fcf = nopat * (1 - rates / ronic)
+    years = np.arange(1, rates.shape[1] + 1)[None, :]
+    disc = (1 + wacc)[:, None] ** -years
+    tv_fcf = nopat[:, -1] * (1 + terminal) * (1 - terminal / ronic)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        tv = np.where(wacc > terminal, tv_fcf / (wacc - terminal), np.nan)
+    return (fcf * disc).sum(axis=1) + tv * disc[:, -1]
+
+def _eva_block(inputs, wacc, margin):
+    return inputs['nopat'] * (margin / inputs['margin']) - inputs['invested_capital'] * wacc
+
+# === PUBLIC API ===
+def dcf_value(inputs, wacc, growth, margin=None, terminal=TERMINAL_GROWTH, stage1=STAGE1_YEARS,
+              fade=FADE_YEARS, chunk=DEFAULT_CHUNK):
+    """Broadcast wacc / growth / margin against each other and value every combination, chunk rows at a time."""
+    margin = inputs['margin'] if margin is None else margin
+    w, g, m = np.broadcast_arrays(np.asarray(wacc, float), np.asarray(growth, float), np.asarray(margin, float))
+    shape = w.shape
+    w, g, m = w.ravel(), g.ravel(), m.ravel()
+    out = np.empty(w.size)
+    for i in range(0, w.size, chunk):
+        s = slice(i, i + chunk)
+        out[s] = _dcf_block(inputs, w[s], g[s], m[s], terminal, stage1, fade)
+    return out.reshape(shape)
+
+def sensitivity_grid(inputs, waccs=None, growths=None, margins=None, terminal=TERMINAL_GROWTH, chunk=DEFAULT_CHUNK) -> dict:
+    """
+    Heatmap-ready surfaces: 'dcf' is (wacc, growth, margin) enterprise value,
+    'eva' is (wacc, margin) economic value added. Axes default around the base case.
+    """
+    waccs = np.round(np.arange(0.05, 0.1501, 0.005), 4) if waccs is None else np.asarray(waccs, float)
+    growths = np.round(inputs['growth'] + np.arange(-0.06, 0.0601, 0.01), 4) if growths is None else np.asarray(growths, float)
+    margins = np.round(inputs['margin'] * np.array([0.75, 1.0, 1.25]), 4) if margins is None else np.asarray(margins, float)
+    dcf = dcf_value(inputs, waccs[:, None, None], growths[None, :, None], margins[None, None, :], terminal=terminal, chunk=chunk)
+    eva = _eva_block(inputs, waccs[:, None], margins[None, :])
+    return {'wacc': waccs, 'growth': growths, 'margin': margins, 'dcf': dcf, 'eva': eva}
+
+def summarize(x, bins=None) -> dict:
+    """Mean / sd / percentiles / P(x < 0); with bins, also histogram edges and counts for plotting."""
+    x = np.asarray(x, float); x = x[np.isfinite(x)]
+    if x.size == 0: return {'n': 0}
+    pct = np.percentile(x, PERCENTILES)
+    out = {'n': int(x.size), 'mean': float(x.mean()), 'std': float(x.std()),
+           **{f'p{p}': float(v) for p, v in zip(PERCENTILES, pct)}, 'prob_negative': float((x < 0).mean())}
+    if bins:
+        counts, edges = np.histogram(x, bins=bins, range=(pct[0] - (pct[-1] - pct[0]) * 0.25, pct[-1] + (pct[-1] - pct[0]) * 0.25))
+        out['hist'] = {'edges': edges, 'counts': counts}
+    return out
+
+def monte_carlo(inputs, n=200_000, seed=None, wacc=(0.10, 0.015), growth=None, margin=None,
+                terminal=TERMINAL_GROWTH, chunk=DEFAULT_CHUNK, keep_samples=True, bins=None) -> dict:
+    """
+    Normal draws of (mean, sd) for WACC, growth and operating margin -> DCF and EVA distributions.
+    Each driver has its own child stream of the seed, so results do not depend on chunk size.
+    WACC draws are clipped just above the terminal rate so every draw has a terminal value.
+    """
+    growth = growth or (inputs['growth'], 0.03)
+    margin = margin or (inputs['margin'], abs(inputs['margin']) * 0.2)
+    rng_w, rng_g, rng_m = (np.random.default_rng(s) for s in np.random.SeedSequence(seed).spawn(3))
+    dcf = np.empty(n); eva = np.empty(n)
+    for i in range(0, n, chunk):
+        k = min(chunk, n - i)
+        w = np.maximum(rng_w.normal(*wacc, k), terminal + 0.005)
+        g = rng_g.normal(*growth, k); m = rng_m.normal(*margin, k)
+        dcf[i:i + k] = _dcf_block(inputs, w, g, m, terminal, STAGE1_YEARS, FADE_YEARS)
+        eva[i:i + k] = _eva_block(inputs, w, m)
+    out = {'n': n, 'seed': seed, 'dcf': summarize(dcf, bins), 'eva': summarize(eva, bins)}
+    if keep_samples: out['samples'] = {'dcf': dcf.astype(np.float32), 'eva': eva.astype(np.float32)}
+    return out
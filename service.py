@@ -0,0 +1,287 @@
+# service.py (v1.0 - Local Analysis Service)
+# Ο ίδιος αγωγός (loader -> analyzer -> PDF) πίσω από ένα μικρό HTTP/JSON API για άλλα εργαλεία:
+# ταυτόχρονες αιτήσεις ενώνονται σε μία διανυσματική κλήση του analyzer, απαντήσεις με ETag ανά έκδοση δεδομένων.
+#
+#   python service.py --port 8765
+#   curl localhost:8765/v1/ratios/TSLA
+#   curl 'localhost:8765/v1/ratios?tickers=TSLA,MSFT&period=ttm'
+#   curl -o TSLA.pdf localhost:8765/v1/report/TSLA.pdf
+import os
+import sys
+import json
+import math
+import time
+import queue
+import argparse
+import threading
+from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor, ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+if script_dir not in sys.path: sys.path.append(script_dir)
+
+import numpy as np
+from test_loader import resolve_to_ticker, load_company_info, get_company_df, normalize_dataframe, get_cache, DATASETS
+from modules.analyzer import PERIODS, frames_to_wide, calculate_ratios_wide, history_to_result, quarter_labels
+from modules.ttm import stack_quarters, ttm_panel
+from modules.report_generator import create_pdf_bytes
+from modules.memo import ArtifactCache, digest
+from modules import telemetry
+
+API_VERSION = "1" # part of every ETag: bump when the response layout changes
+FREQS = {'annual': 'annual', 'ttm': 'quarterly'}
+BATCH_WINDOW_MS = 5 # how long the first request of a batch waits for company
+MAX_BATCH = 256
+MAX_TICKERS = 500 # per multi-ticker request
+
+def _jsonable(obj):
+    """NaN / inf -> null, NumPy scalars -> Python (strict JSON for non-Python clients)."""
+    if isinstance(obj, dict): return {k: _jsonable(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)): return [_jsonable(v) for v in obj]
+    if hasattr(obj, 'item'): obj = obj.item()
+    if isinstance(obj, float) and not math.isfinite(obj): return None
+    return obj
+
+class AnalysisService:
+    """
+    Loader + batched analyzer + PDF pool; the HTTP handler below is a thin layer over it.
+    Requests queue up for at most `batch_ms` and are analyzed together (one calculate_ratios_wide
+    call per batch and period, TTM windows included). Responses are cached by ETag: a digest of the fundamentals
+    cache's data versions for the ticker (the normalized data itself when caching is off).
+    """
+    def __init__(self, backend=None, batch_ms: float = BATCH_WINDOW_MS, max_batch: int = MAX_BATCH,
+                 fetch_workers: int = 8, pdf_workers: int = 2, responses: ArtifactCache = None):
+        self.backend = backend # None = yfinance; a stub (see benchmarks/synthetic.py) for load tests
+        self.batch_ms = batch_ms; self.max_batch = max(1, max_batch)
+        self.responses = responses or ArtifactCache(max_bytes=128 * 1024 * 1024)
+        self.stats = {'requests': 0, 'cached': 0, 'batches': 0, 'analyzed': 0, 'pdfs': 0}
+        self._queue = queue.Queue()
+        self._fetch_pool = ThreadPoolExecutor(max_workers=fetch_workers, thread_name_prefix='valuepy-fetch')
+        self._pdf_pool = ProcessPoolExecutor(max_workers=pdf_workers) if pdf_workers else ThreadPoolExecutor(max_workers=1)
+        self._pdf_inflight = {}; self._lock = threading.Lock()
+        self._batcher = threading.Thread(target=self._batch_loop, name='valuepy-batcher', daemon=True)
+        self._batcher.start()
+
+    # --- Data version ---
+    def etag(self, ticker, period):
+        """Validator from the cache index alone (no data read); None when the data would be (re)fetched."""
+        cache = get_cache()
+        if cache is False: return None
+        dataset = DATASETS[FREQS[period]]
+        if not (cache.is_fresh(ticker, dataset) and cache.is_fresh(ticker, 'info')): return None
+        return '"' + digest(API_VERSION, ticker, period, cache.version(ticker, dataset), cache.version(ticker, 'info')) + '"'
+
+    # --- Ratios ---
+    def submit(self, ticker, period='annual') -> Future:
+        """Future of (etag, JSON bytes, result dict) for one ticker; LookupError when there is no data."""
+        if period not in PERIODS: raise ValueError(f"period must be one of {PERIODS}")
+        ticker = resolve_to_ticker(ticker)
+        with self._lock: self.stats['requests'] += 1
+        fut = Future()
+        tag = self.etag(ticker, period)
+        hit = self.responses.get(('ratios', tag)) if tag else None
+        if hit is not None:
+            with self._lock: self.stats['cached'] += 1
+            fut.set_result(hit)
+        else: self._queue.put((ticker, period, fut))
+        return fut
+
+    def ratios(self, ticker, period='annual', timeout=120):
+        return self.submit(ticker, period).result(timeout)
+
+    def _batch_loop(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.perf_counter() + self.batch_ms / 1000
+            while len(batch) < self.max_batch:
+                try: batch.append(self._queue.get(timeout=max(0.0, deadline - time.perf_counter())) if self.batch_ms else self._queue.get_nowait())
+                except queue.Empty: break
+            try: self._run_batch(batch)
+            except Exception as e:
+                for _, _, fut in batch:
+                    if not fut.done(): fut.set_exception(e)
+
+    def _load(self, ticker, period):
+        """(normalized df with Market Cap, sector) or raises LookupError."""
+        try: data = get_company_df(ticker, "yahoo", backend=self.backend, freq=FREQS[period])
+        except Exception as e: raise LookupError(f"{ticker}: {e}") from None
+        if not data: raise LookupError(f"no data found for {ticker}")
+        info_df, sector = load_company_info(ticker, backend=self.backend)
+        df = normalize_dataframe(data[0]['table'], "yahoo")
+        if df.empty: raise LookupError(f"no usable statements for {ticker}")
+        df['Market Cap'] = info_df['Κεφαλαιοποίηση'].iloc[0] if not info_df.empty else 0
+        return df, sector
+
+    def _run_batch(self, batch):
+        telemetry.count('service.batch_items', len(batch))
+        with self._lock: self.stats['batches'] += 1
+        waiting = defaultdict(list) # (ticker, period) -> futures (the same ticker twice is analyzed once)
+        for ticker, period, fut in batch: waiting[(ticker, period)].append(fut)
+        def resolve(key, result=None, error=None):
+            for fut in waiting[key]: fut.set_exception(error) if error else fut.set_result(result)
+
+        with telemetry.span('service.load'):
+            loads = {key: self._fetch_pool.submit(self._load, *key) for key in waiting}
+        todo = defaultdict(dict) # period -> {ticker: (df, sector, etag)}
+        for (ticker, period), f in loads.items():
+            try: df, sector = f.result()
+            except LookupError as e: resolve((ticker, period), error=e); continue
+            tag = self.etag(ticker, period) or '"' + digest(API_VERSION, ticker, period, sector, df) + '"'
+            hit = self.responses.get(('ratios', tag))
+            if hit is not None: resolve((ticker, period), hit)
+            else: todo[period][ticker] = (df, sector, tag)
+
+        for period, items in todo.items():
+            with telemetry.span('service.analyze', period=period): histories = self._analyze({t: v[0] for t, v in items.items()}, period)
+            with self._lock: self.stats['analyzed'] += len(items)
+            for ticker, (df, sector, tag) in items.items():
+                history = histories.get(ticker)
+                if history is None or history.empty:
+                    resolve((ticker, period), error=LookupError(f"not enough periods to analyze {ticker} ({period})")); continue
+                res = history_to_result(history, period)
+                body = json.dumps(_jsonable({'ticker': ticker, 'sector': sector, 'period': period, **res}), separators=(',', ':')).encode('utf-8')
+                resolve((ticker, period), self.responses.put(('ratios', tag), (tag, body, res), size=2 * len(body)))
+
+    @staticmethod
+    def _analyze(frames, period):
+        """{ticker: normalized df} -> {ticker: ratio history, newest first} in one vectorized call."""
+        if period == 'ttm':
+            ttm = ttm_panel(stack_quarters(frames, dtype=np.float64), dtype=np.float64) # float64 like company_ttm: same numbers as the app
+            if ttm.empty: return {}
+            ratios = calculate_ratios_wide(ttm, period='ttm').reset_index()
+            ratios.insert(2, 'Period', quarter_labels(ratios['Date'])); ratios.insert(2, 'Year', ratios['Date'].dt.year)
+        else: ratios = calculate_ratios_wide(frames_to_wide(frames)).reset_index()
+        tickers = ratios['Ticker'].to_numpy() # contiguous per ticker, newest first
+        starts = np.flatnonzero(np.r_[True, tickers[1:] != tickers[:-1]]); ends = np.r_[starts[1:], len(tickers)]
+        return {tickers[a]: ratios.iloc[a:b] for a, b in zip(starts, ends)}
+
+    # --- PDF ---
+    def report(self, ticker, period='annual', timeout=120):
+        """(etag, PDF bytes); renders once per data version, on the PDF worker pool."""
+        tag, _, res = self.ratios(ticker, period, timeout)
+        pdf_tag = tag[:-1] + '-pdf"'
+        pdf = self.responses.get(('pdf', pdf_tag))
+        if pdf is not None: return pdf_tag, pdf
+        with self._lock:
+            fut = self._pdf_inflight.get(pdf_tag)
+            if fut is None:
+                fut = self._pdf_inflight[pdf_tag] = self._pdf_pool.submit(create_pdf_bytes, resolve_to_ticker(ticker), res)
+                self.stats['pdfs'] += 1
+        try: pdf = fut.result(timeout)
+        finally:
+            with self._lock: self._pdf_inflight.pop(pdf_tag, None)
+        self.responses.put(('pdf', pdf_tag), pdf)
+        return pdf_tag, pdf
+
+    def info(self) -> dict:
+        with self._lock: stats = dict(self.stats)
+        return {**stats, 'queued': self._queue.qsize(), 'responses': self.responses.info()}
+
+    def close(self):
+        self._fetch_pool.shutdown(wait=False, cancel_futures=True); self._pdf_pool.shutdown(wait=False, cancel_futures=True)
+
+# === HTTP ===
+class Handler(BaseHTTPRequestHandler):
+    """
+    GET /v1/ratios/{ticker}?period=annual|ttm       one company (nested calculate_financial_ratios layout)
+    GET /v1/ratios?tickers=A,B,C&period=...         {ticker: result | {"error": ...}}
+    GET /v1/report/{ticker}.pdf?period=...          PDF report
+    GET /health, GET /metrics (Prometheus text)
+    Every 200 carries an ETag; a matching If-None-Match gets 304.
+    """
+    protocol_version = 'HTTP/1.1' # keep-alive
+    disable_nagle_algorithm = True # headers and body are separate writes: avoid the 40 ms delayed-ACK stall
+    service: AnalysisService = None
+    quiet = True
+
+    def log_message(self, fmt, *args):
+        if not self.quiet: super().log_message(fmt, *args)
+
+    def do_GET(self):
+        url = urlsplit(self.path); query = parse_qs(url.query)
+        parts = [p for p in url.path.split('/') if p]
+        period = query.get('period', ['annual'])[0].lower()
+        try:
+            with telemetry.span('service.request', route=parts[1] if len(parts) > 1 else (parts[0] if parts else '')):
+                if parts == ['health']: return self._send(200, json.dumps({'ok': True, **self.service.info()}, default=str).encode('utf-8'))
+                if parts == ['metrics']: return self._send(200, telemetry.to_prometheus().encode('utf-8'), 'text/plain; version=0.0.4')
+                if parts[:2] == ['v1', 'ratios'] and len(parts) == 3: return self._ratios([parts[2]], period, single=True)
+                if parts == ['v1', 'ratios'] and query.get('tickers'): return self._ratios([t for v in query['tickers'] for t in v.split(',') if t.strip()], period)
+                if parts[:2] == ['v1', 'report'] and len(parts) == 3 and parts[2].lower().endswith('.pdf'):
+                    ticker = parts[2][:-4]
+                    tag = self.service.etag(resolve_to_ticker(ticker), period) if period in PERIODS else None
+                    if tag and self._not_modified(tag[:-1] + '-pdf"'): return
+                    tag, pdf = self.service.report(ticker, period)
+                    if self._not_modified(tag): return
+                    return self._send(200, pdf, 'application/pdf', tag)
+                self._error(404, "not found")
+        except ValueError as e: self._error(400, str(e))
+        except LookupError as e: self._error(404, str(e))
+        except Exception as e: self._error(500, f"{type(e).__name__}: {e}")
+
+    def _ratios(self, tickers, period, single=False):
+        if period not in PERIODS: raise ValueError(f"period must be one of {PERIODS}")
+        if len(tickers) > MAX_TICKERS: raise ValueError(f"at most {MAX_TICKERS} tickers per request")
+        if single:
+            tag = self.service.etag(resolve_to_ticker(tickers[0]), period)
+            if tag and self._not_modified(tag): return # answered from the cache index, no data read
+            tag, body, _ = self.service.ratios(tickers[0], period)
+            if self._not_modified(tag): return
+            return self._send(200, body, etag=tag)
+        futures = {resolve_to_ticker(t): self.service.submit(t, period) for t in tickers}
+        parts, tags = [], []
+        for ticker, fut in futures.items():
+            try: tag, body, _ = fut.result(120); tags.append(tag)
+            except LookupError as e: body = json.dumps({'error': str(e)}).encode('utf-8'); tags.append('"missing"')
+            parts.append(json.dumps(ticker).encode('utf-8') + b':' + body)
+        tag = '"' + digest(tags) + '"'
+        if self._not_modified(tag): return
+        self._send(200, b'{' + b','.join(parts) + b'}', etag=tag)
+
+    def _not_modified(self, tag):
+        if tag not in [t.strip() for t in self.headers.get('If-None-Match', '').split(',')]: return False
+        telemetry.count('service.not_modified')
+        self.send_response(304); self.send_header('ETag', tag); self.send_header('Content-Length', '0'); self.end_headers()
+        return True
+
+    def _send(self, status, body, content_type='application/json', etag=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type); self.send_header('Content-Length', str(len(body)))
+        if etag: self.send_header('ETag', etag); self.send_header('Cache-Control', 'no-cache') # revalidate with If-None-Match
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status, message):
+        telemetry.count('service.errors', status=status)
+        self._send(status, json.dumps({'error': message}).encode('utf-8'))
+
+class Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128 # listen backlog (default 5): a burst of new clients would wait out a SYN retry
+
+def make_server(service, host='127.0.0.1', port=8765, quiet=True):
+    """Threaded HTTP server bound to `service` (port 0 = any free port, see server.server_address)."""
+    handler = type('BoundHandler', (Handler,), {'service': service, 'quiet': quiet})
+    return Server((host, port), handler)
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="ValuePy local analysis service (HTTP/JSON)")
+    ap.add_argument('--host', default='127.0.0.1')
+    ap.add_argument('--port', type=int, default=8765)
+    ap.add_argument('--batch-ms', type=float, default=BATCH_WINDOW_MS, help="how long a request waits to be batched with others")
+    ap.add_argument('--max-batch', type=int, default=MAX_BATCH)
+    ap.add_argument('--fetch-workers', type=int, default=8, help="concurrent loader threads")
+    ap.add_argument('--pdf-workers', type=int, default=2, help="PDF rendering processes")
+    ap.add_argument('--verbose', action='store_true', help="log every request")
+    return ap.parse_args(argv)
+
+if __name__ == '__main__':
+    args = parse_args()
+    service = AnalysisService(batch_ms=args.batch_ms, max_batch=args.max_batch, fetch_workers=args.fetch_workers, pdf_workers=args.pdf_workers)
+    server = make_server(service, args.host, args.port, quiet=not args.verbose)
+    print(f"ValuePy service on http://{args.host}:{server.server_address[1]}  (GET /v1/ratios/TSLA, /v1/report/TSLA.pdf, /health, /metrics)")
+    try: server.serve_forever()
+    except KeyboardInterrupt: pass
+    finally: server.server_close(); service.close()
@@ -1,81 +1,452 @@
 # test_loader.py (Final Working Version)
 import pandas as pd
-import yfinance as yf
-import fitz  # PyMuPDF
+import numpy as np
+import datetime
+import re
+import time
+import threading
+from collections import Counter, defaultdict
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import List, Dict, Any
+from modules.cache import FundamentalsCache
+from modules.refresh import refresh_company, ChangeLog
+from modules.analyzer import calculate_ratio_history
+from modules.ttm import company_ttm
+from modules.telemetry import span, count, instrumented
+from modules.lazy import lazy_import
+from modules.pdf_extractor import extract_statements, parse_number, classify_statement, SCALE_WORDS, PER_SHARE_WORDS
+
+yf = lazy_import('yfinance') # loaded on the first Yahoo fetch
+openpyxl = lazy_import('openpyxl') # only for uploaded workbooks
 
 # === CFA MAPPING ===
 COLUMN_MAP = {
     'total revenue': 'Revenue', 'revenue': 'Revenue', 'operating revenue': 'Revenue',
     'cost of revenue': 'CostOfGoodsSold', 'cost of goods sold': 'CostOfGoodsSold',
     'gross profit': 'GrossProfit', 'operating income': 'OperatingIncome', 'ebit': 'OperatingIncome',
-    'net income': 'NetIncome', 'ebitda': 'EBITDA', 'basic eps': 'BasicEPS',
+    'net income': 'NetIncome', 'ebitda': 'EBITDA', 'basic eps': 'BasicEPS', 'interest expense': 'InterestExpense',
     'total assets': 'TotalAssets', 'total current assets': 'CurrentAssets',
     'total liabilities': 'TotalLiabilities', 'total current liabilities': 'CurrentLiabilities',
     'total equity': 'TotalEquity', 'stockholders equity': 'TotalEquity', 
-    'total debt': 'TotalDebt', 'long term debt': 'TotalDebt', 'total capitalization': 'TotalDebt',
+    'total debt': 'TotalDebt', 'long term debt': 'TotalDebt',
     'cash': 'Cash', 'cash and cash equivalents': 'Cash',
     'inventory': 'Inventory', 'net receivables': 'Receivables', 'accounts receivable': 'Receivables',
     'accounts payable': 'Payables', 'net ppe': 'NetPPE', 
     'operating cash flow': 'OperatingCashFlow', 'capital expenditure': 'CapitalExpenditures', 'capex': 'CapitalExpenditures',
     'free cash flow': 'FreeCashFlow', 'cash dividends paid': 'CashDividendsPaid',
     'investing cash flow': 'InvestingCashFlow', 'financing cash flow': 'FinancingCashFlow',
-    'retained earnings': 'RetainedEarnings', 'share issued': 'ShareIssued'
+    'retained earnings': 'RetainedEarnings', 'share issued': 'ShareIssued',
+    'selling general and administration': 'SellingGeneralAndAdministration',
+    'reconciled depreciation': 'ReconciledDepreciation', 'depreciation and amortization': 'DepreciationAndAmortization'
 }
 
+# === NORMALIZATION INDEX (built once at import) ===
+_CAMEL_RE = re.compile(r'(?<=[a-z0-9])(?=[A-Z])|(?<=[A-Z])(?=[A-Z][a-z])')
+_PASSTHROUGH = {'Date', 'Year'}
+
+@lru_cache(maxsize=16384)
+def _clean_key(col) -> str:
+    """'Total  Revenue', 'TotalRevenue', 'total revenue' -> 'total revenue'."""
+    return ' '.join(_CAMEL_RE.sub(' ', str(col).strip()).lower().split())
+
+# clean key -> (priority, standard name); earlier COLUMN_MAP entries win collisions
+_NORMALIZE_INDEX = {}
+for _prio, (_raw, _std) in enumerate(COLUMN_MAP.items()):
+    _NORMALIZE_INDEX.setdefault(_clean_key(_raw), (_prio, _std))
+
+# source_type -> Counter of raw column names that had no mapping
+UNMAPPED_FIELDS = defaultdict(Counter)
+_UNMAPPED_LOCK = threading.Lock() # batch loads normalize from many threads; Counter.update is not atomic
+
+@instrumented('loader.normalize')
 def normalize_dataframe(df: pd.DataFrame, source_type: str) -> pd.DataFrame:
     if df.empty: return df
-    norm_df = df.copy()
-    clean_cols_map = {str(c).strip().lower().replace('  ', ' '): c for c in df.columns}
-    rename_dict = {}
-    for raw_key, standard_key in COLUMN_MAP.items():
-        for clean_col, original_col in clean_cols_map.items():
-            if raw_key == clean_col: rename_dict[original_col] = standard_key
-    norm_df.rename(columns=rename_dict, inplace=True)
+    if df.attrs.get('normalization', {}).get('source') == source_type: return df.copy(deep=False) # already done (e.g. a cached frame)
+    # One dict lookup per column; a column already carrying its standard name keeps it
+    best = {}
+    unmapped = []
+    for pos, col in enumerate(df.columns):
+        hit = _NORMALIZE_INDEX.get(_clean_key(col))
+        if hit is None:
+            if col not in _PASSTHROUGH: unmapped.append(col)
+            continue
+        prio, std = (-1, hit[1]) if col == hit[1] else hit
+        if std not in best or prio < best[std][0]: best[std] = (prio, pos)
+    new_cols = list(df.columns)
+    for std, (_, pos) in best.items(): new_cols[pos] = std
+
+    norm_df = df.copy(deep=False) # shares the column data, only the labels change
+    norm_df.columns = new_cols
     if 'Year' not in norm_df.columns and 'Date' in norm_df.columns:
         norm_df['Year'] = pd.to_datetime(norm_df['Date']).dt.year
+
+    with _UNMAPPED_LOCK: UNMAPPED_FIELDS[source_type].update(str(c) for c in unmapped)
+    count('loader.rows', len(norm_df), source=source_type); count('loader.fields_unmapped', len(unmapped), source=source_type)
+    norm_df.attrs['normalization'] = {'source': source_type, 'mapped': len(best), 'unmapped': [str(c) for c in unmapped]}
     return norm_df
 
-def get_company_df(source: str, source_type: str = "yahoo") -> List[Dict[str, Any]]:
+def normalization_coverage(source_type: str = None) -> Dict[str, Any]:
+    """Most frequent unmapped raw fields, per source (or for one source)."""
+    with _UNMAPPED_LOCK:
+        sources = [source_type] if source_type else list(UNMAPPED_FIELDS)
+        return {src: UNMAPPED_FIELDS[src].most_common() for src in sources}
+
+# === LOCAL CACHE ===
+_CACHE = None
+_CACHE_LOCK = threading.Lock()
+INFO_FIELDS = ['marketCap', 'longName', 'sector', 'industry', 'currency']
+
+def get_cache():
+    global _CACHE
+    if _CACHE is None:
+        with _CACHE_LOCK: # first use is often from job / fetch pool threads
+            if _CACHE is None: _CACHE = FundamentalsCache()
+    return _CACHE
+
+def set_cache(cache):
+    """Swap the process cache (tests, custom dirs). False disables caching."""
+    global _CACHE
+    _CACHE = cache
+
+def _cached(ticker, dataset, fetch, force_refresh):
+    cache = get_cache()
+    if cache is False: return fetch()
+    missed = []
+    def miss(): missed.append(1); return fetch()
+    out = cache.get_or_fetch(ticker, dataset, miss, force_refresh=force_refresh)
+    count('loader.cache_misses' if missed else 'loader.cache_hits', dataset=dataset)
+    return out
+
+# Yahoo statement attributes and cache dataset per frequency
+STATEMENT_ATTRS = {'annual': ('financials', 'balance_sheet', 'cashflow'),
+                   'quarterly': ('quarterly_financials', 'quarterly_balance_sheet', 'quarterly_cashflow')}
+DATASETS = {'annual': 'statements', 'quarterly': 'quarterly'}
+# Incremental refresh keeps its own accumulated statements (never evicted, only grown by merge_periods):
+# fetches above overwrite DATASETS with whatever Yahoo serves now and would erase the older periods
+HISTORY_DATASETS = {'annual': 'history', 'quarterly': 'history_quarterly'}
+RATIO_DATASETS = {'annual': 'ratios', 'quarterly': 'ratios_ttm'} # history -> (TTM) ratio history
+
+def get_company_df(source: str, source_type: str = "yahoo", force_refresh: bool = False, backend=None, freq: str = 'annual') -> List[Dict[str, Any]]:
+    """freq='quarterly' (Yahoo only): quarterly statements, one row per quarter end; see modules.ttm for TTM."""
+    with span('loader.fetch', source=source_type):
+        return _get_company_df(source, source_type, force_refresh, backend, freq)
+
+def _get_company_df(source, source_type, force_refresh, backend, freq='annual'):
     if source_type == "yahoo":
         print(f"⚡ Fetching Yahoo Data for: {source}")
-        df = get_yahoo_data(source)
+        df = _cached(source, DATASETS[freq], lambda: normalize_dataframe(get_yahoo_data(source, backend, freq), 'yahoo'), force_refresh)
         return [{"title": "Yahoo Data", "table": df}] if not df.empty else []
     elif source_type == "pdf":
-        return [] # PDF logic removed for simplicity in debugging
+        print(f"📄 Extracting PDF statements: {source}")
+        df = get_pdf_data(source)
+        return [{"title": "PDF Report", "table": df}] if not df.empty else []
+    elif source_type == "xlsx":
+        print(f"📊 Reading XLSX statements: {source}")
+        df = get_xlsx_data(source)
+        return [{"title": "Excel Report", "table": df}] if not df.empty else []
     return []
 
-def get_yahoo_data(ticker: str) -> pd.DataFrame:
+def statement_items_to_frame(items: Dict[str, Dict[int, float]]) -> pd.DataFrame:
+    """{line item: {year: value}} -> same shape as get_yahoo_data (one row per period, Date & Year)."""
+    if not items: return pd.DataFrame()
+    full = pd.DataFrame(items).sort_index(ascending=False)
+    full.index = pd.to_datetime([f"{int(y)}-12-31" for y in full.index])
+    return merge_statements(full, pd.DataFrame(), pd.DataFrame())
+
+@instrumented('loader.pdf')
+def get_pdf_data(path: str, workers: int = None) -> pd.DataFrame:
     try:
-        t = yf.Ticker(ticker) # ΑΠΛΟ CALL
+        items, meta = extract_statements(path, workers=workers)
+        full = statement_items_to_frame(items)
+        print(f"✅ PDF parsed: {meta['pages']} pages, statements on {meta['statement_pages']}, {full.shape}")
+        return full
+    except Exception as e:
+        print(f"Error: {e}")
+        return pd.DataFrame()
+
+@instrumented('loader.merge')
+def merge_statements(inc: pd.DataFrame, bal: pd.DataFrame, cf: pd.DataFrame) -> pd.DataFrame:
+    """Transposed income / balance / cash-flow frames -> one row per period with Date & Year."""
+    full = pd.concat([d for d in [inc, bal, cf] if not d.empty], axis=1)
+    full = full.loc[:, ~full.columns.duplicated()]
+    full.reset_index(inplace=True)
+    if 'index' in full.columns: full.rename(columns={'index': 'Date'}, inplace=True)
+    if 'Date' in full.columns:
+        full['Date'] = pd.to_datetime(full['Date'])
+        full['Year'] = full['Date'].dt.year
+    return full
+
+def fetch_yahoo_statements(ticker: str, backend=None, freq: str = 'annual') -> pd.DataFrame:
+    """Like get_yahoo_data but lets network errors propagate (for retrying callers)."""
+    t = (backend or yf).Ticker(ticker)
+    inc, bal, cf = (getattr(t, a).T for a in STATEMENT_ATTRS[freq])
+    if inc.empty and bal.empty: return pd.DataFrame()
+    return merge_statements(inc, bal, cf)
+
+def get_yahoo_data(ticker: str, backend=None, freq: str = 'annual') -> pd.DataFrame:
+    try:
+        t = (backend or yf).Ticker(ticker) # ΑΠΛΟ CALL
         try:
-            inc = t.financials.T
-            bal = t.balance_sheet.T
-            cf = t.cashflow.T
+            with span('loader.yahoo_download', freq=freq):
+                inc, bal, cf = (getattr(t, a).T for a in STATEMENT_ATTRS[freq])
         except: return pd.DataFrame()
 
         if inc.empty and bal.empty:
             print(f"❌ Empty data for {ticker}")
             return pd.DataFrame()
 
-        full = pd.concat([d for d in [inc, bal, cf] if not d.empty], axis=1)
-        full = full.loc[:, ~full.columns.duplicated()]
-        full.reset_index(inplace=True)
-        if 'index' in full.columns: full.rename(columns={'index': 'Date'}, inplace=True)
-        if 'Date' in full.columns:
-            full['Date'] = pd.to_datetime(full['Date'])
-            full['Year'] = full['Date'].dt.year
-        
+        full = merge_statements(inc, bal, cf)
         print(f"✅ Data fetched: {full.shape}")
         return full
     except Exception as e:
         print(f"Error: {e}")
         return pd.DataFrame()
 
+# === XLSX (read-only, streamed) ===
+XLSX_HEADER_ROWS = 30 # the year header must sit near the top of a statement sheet
+XLSX_PROBE_ROWS = 40 # rows after the header used to confirm line items on unnamed sheets
+XLSX_MIN_ITEMS = 3
+XLSX_MAX_GAP = 200 # stop a sheet after this many rows without a line item
+_XLSX_YEAR_RE = re.compile(r'(?<!\d)(19|20)\d{2}(?!\d)')
+
+def _xlsx_year(cell):
+    if isinstance(cell, (datetime.date, datetime.datetime)): return cell.year
+    if isinstance(cell, (int, float)) and not isinstance(cell, bool):
+        return int(cell) if float(cell).is_integer() and 1900 <= cell <= 2100 else None
+    if isinstance(cell, str) and len(cell) <= 16:
+        m = _XLSX_YEAR_RE.search(cell)
+        return int(m.group(0)) if m else None
+    return None
+
+def _xlsx_number(cell):
+    if isinstance(cell, bool) or cell is None: return None
+    if isinstance(cell, (int, float)): return float(cell)
+    return parse_number(str(cell)) if isinstance(cell, str) else None
+
+def _xlsx_sheet_items(rows, sheet_name):
+    """Stream one sheet's rows -> {label: {year: value}}; {} as soon as it is clearly not a statement."""
+    header, scale = None, 1.0
+    for i, row in enumerate(rows):
+        if i >= XLSX_HEADER_ROWS: return {}
+        texts = ' '.join(c for c in row if isinstance(c, str)).lower()
+        scale = next((m for w, m in SCALE_WORDS.items() if w in texts), scale)
+        years = [(j, y) for j, c in enumerate(row) if (y := _xlsx_year(c))]
+        if len(years) >= 2 and len({y for _, y in years}) == len(years):
+            header = years; break
+    if header is None: return {}
+
+    named = classify_statement(sheet_name) is not None
+    first_col = header[0][0]
+    items, known, gap = {}, 0, 0
+    for i, row in enumerate(rows):
+        if not named and i == XLSX_PROBE_ROWS and known < XLSX_MIN_ITEMS: return {}
+        label = next((str(c).strip() for c in row[:first_col] if isinstance(c, str) and c.strip()), None)
+        vals = {y: v for j, y in header if j < len(row) and (v := _xlsx_number(row[j])) is not None}
+        if not label or not vals:
+            gap += 1
+            if gap > XLSX_MAX_GAP: break
+            continue
+        gap = 0
+        known += _clean_key(label) in _NORMALIZE_INDEX
+        mult = 1.0 if any(w in label.lower() for w in PER_SHARE_WORDS) else scale
+        items.setdefault(label, {y: v * mult for y, v in vals.items()})
+    return items if named or known >= XLSX_MIN_ITEMS else {}
+
+@instrumented('loader.xlsx')
+def get_xlsx_data(path: str) -> pd.DataFrame:
+    """
+    Read financial statements from a workbook in read-only mode.
+    Each sheet is streamed row by row: sheets without a year header near the top,
+    or without recognisable line items, are abandoned after a few dozen rows.
+    """
+    try:
+        wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+        try:
+            items, used = {}, []
+            for ws in wb.worksheets:
+                sheet_items = _xlsx_sheet_items(ws.iter_rows(values_only=True), ws.title)
+                if sheet_items: used.append(ws.title)
+                for label, vals in sheet_items.items(): items.setdefault(label, vals)
+        finally: wb.close()
+        full = statement_items_to_frame(items)
+        print(f"✅ XLSX parsed: statements on {used}, {full.shape}")
+        return full
+    except Exception as e:
+        print(f"Error: {e}")
+        return pd.DataFrame()
+
 def resolve_to_ticker(query: str): return query.strip().upper()
 
-def load_company_info(ticker):
+def get_yahoo_info(ticker: str, backend=None) -> pd.DataFrame:
+    info = (backend or yf).Ticker(ticker).info or {}
+    row = {k: info.get(k) for k in INFO_FIELDS}
+    return pd.DataFrame([row]) if any(v is not None for v in row.values()) else pd.DataFrame()
+
+def load_company_info(ticker, force_refresh: bool = False, backend=None):
     try:
-        t = yf.Ticker(ticker)
-        return pd.DataFrame([{"Κεφαλαιοποίηση": t.info.get('marketCap', 0), "Όνομα": t.info.get('longName', ticker)}]), "General"
-    except: return pd.DataFrame(), "General"
\ No newline at end of file
+        info = _cached(ticker, 'info', lambda: get_yahoo_info(ticker, backend), force_refresh).iloc[0]
+        cap = info.get('marketCap'); name = info.get('longName'); sector = info.get('sector')
+        return pd.DataFrame([{"Κεφαλαιοποίηση": cap if pd.notna(cap) else 0, "Όνομα": name if pd.notna(name) else ticker}]), sector if pd.notna(sector) and sector else "General"
+    except: return pd.DataFrame(), "General"
+
+# === BATCH LOADER (peer groups / watchlists) ===
+YAHOO_HOST = 'query2.finance.yahoo.com'
+
+class RateLimiter:
+    """Token bucket per host: at most `rate` requests/sec with bursts up to `burst`."""
+    def __init__(self, rate: float = 10.0, burst: int = 10):
+        self.rate = rate; self.burst = burst
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, host: str = YAHOO_HOST):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                tokens, last = self._buckets.get(host, (self.burst, now))
+                tokens = min(self.burst, tokens + (now - last) * self.rate)
+                if tokens >= 1:
+                    self._buckets[host] = (tokens - 1, now); return
+                self._buckets[host] = (tokens, now)
+                wait = (1 - tokens) / self.rate
+            time.sleep(wait)
+
+def _with_retry(fn, limiter, retries, backoff, host=YAHOO_HOST):
+    for attempt in range(retries + 1):
+        limiter.acquire(host)
+        try: return fn()
+        except Exception:
+            if attempt == retries: raise
+            time.sleep(backoff * (2 ** attempt))
+
+def get_companies_batch(tickers, max_workers: int = 16, rate_limit: float = 10.0, retries: int = 2, backoff: float = 0.5,
+                        with_info: bool = True, force_refresh: bool = False, backend=None) -> Dict[str, Any]:
+    """
+    Fetch statements (and info) for many tickers concurrently through the cache.
+    Returns {'data': {ticker: {'table', 'info'}}, 'failed': {ticker: reason}, 'elapsed': sec}.
+    A ticker lands in 'failed' when its statements could not be loaded; info errors
+    are reported there too but keep the statements in 'data'.
+    """
+    tickers = list(dict.fromkeys(resolve_to_ticker(t) for t in tickers if str(t).strip()))
+    limiter = RateLimiter(rate_limit, burst=max(1, int(rate_limit)))
+    start = time.monotonic()
+
+    def load_statements(tk):
+        fetch = lambda: normalize_dataframe(_with_retry(lambda: fetch_yahoo_statements(tk, backend), limiter, retries, backoff), 'yahoo')
+        return _cached(tk, 'statements', fetch, force_refresh)
+
+    def load_info(tk):
+        fetch = lambda: _with_retry(lambda: get_yahoo_info(tk, backend), limiter, retries, backoff)
+        return _cached(tk, 'info', fetch, force_refresh)
+
+    data, failed = {}, {}
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        jobs = {pool.submit(load_statements, tk): (tk, 'table') for tk in tickers}
+        if with_info: jobs.update({pool.submit(load_info, tk): (tk, 'info') for tk in tickers})
+        results = {tk: {'table': pd.DataFrame(), 'info': pd.DataFrame()} for tk in tickers}
+        for fut in as_completed(jobs):
+            tk, part = jobs[fut]
+            try: results[tk][part] = fut.result()
+            except Exception as e: failed[tk] = "; ".join(filter(None, [failed.get(tk), f"{part}: {e}"]))
+
+    for tk, res in results.items():
+        if res['table'].empty: failed.setdefault(tk, "table: no data")
+        else: data[tk] = res
+    elapsed = time.monotonic() - start
+    print(f"✅ Batch fetched {len(data)}/{len(tickers)} in {elapsed:.2f}s")
+    return {'data': data, 'failed': failed, 'elapsed': elapsed}
+
+# === INCREMENTAL REFRESH (daily universe updates) ===
+def _stored_ratio_history(ticker, statements, freq='annual'):
+    """Ratio history from merged statements (TTM windows for quarterly), with the cached market cap (0 if unknown)."""
+    df = normalize_dataframe(statements, 'yahoo')
+    if freq == 'quarterly': df = company_ttm(df)
+    if df.empty: return pd.DataFrame()
+    info = get_cache().peek(ticker, 'info')
+    cap = info['marketCap'].iloc[0] if info is not None and 'marketCap' in info.columns else None
+    df['Market Cap'] = cap if pd.notna(cap) else 0
+    return calculate_ratio_history(df, 'ttm' if freq == 'quarterly' else 'annual')
+
+def stored_ratios(ticker, freq: str = 'annual', columns=None) -> pd.DataFrame:
+    """
+    Cached ratio history (optionally only `columns`); rebuilt from the stored statements (no fetch) when missing.
+    Only ratios of the refresh history are kept: fetched statements change behind their back.
+    """
+    cache = get_cache()
+    ratios = cache.peek(ticker, RATIO_DATASETS[freq], columns)
+    if ratios is not None: return ratios
+    statements = cache.peek(ticker, HISTORY_DATASETS[freq])
+    keep = statements is not None and not statements.empty
+    if not keep: statements = cache.peek(ticker, DATASETS[freq]) # never refreshed: whatever was last fetched
+    if statements is None or statements.empty: return pd.DataFrame()
+    ratios = _stored_ratio_history(ticker, statements, freq)
+    if keep and not ratios.empty: cache.put(ticker, RATIO_DATASETS[freq], ratios)
+    return ratios[[c for c in columns if c in ratios.columns]] if columns and not ratios.empty else ratios
+
+def stored_ratio_panel(tickers=None, columns=None, max_workers: int = 8) -> pd.DataFrame:
+    """
+    Annual ratio histories of many tickers (default: every ticker with stored statements) as one
+    panel with Ticker / Sector / Year columns, newest year first per ticker. Nothing is fetched.
+    columns: only these ratios (Parquet reads just those columns, much faster for big universes).
+    """
+    cache = get_cache()
+    if tickers is None: tickers = sorted(set(cache.tickers(HISTORY_DATASETS['annual'])) | set(cache.tickers(DATASETS['annual'])))
+    else: tickers = [resolve_to_ticker(t) for t in tickers]
+    wanted = None if columns is None else ['Year', *[c for c in columns if c != 'Year']]
+    def load(t):
+        info = cache.peek(t, 'info', ['sector'])
+        sector = info['sector'].iloc[0] if info is not None and len(info) else None
+        return stored_ratios(t, columns=wanted), sector if pd.notna(sector) and sector else "General"
+    with ThreadPoolExecutor(max_workers=max_workers) as pool: loaded = list(pool.map(load, tickers)) # Parquet reads release the GIL
+    keep = [(t, r, sector) for t, (r, sector) in zip(tickers, loaded) if not r.empty]
+    if not keep: return pd.DataFrame(columns=['Ticker', 'Sector', 'Year', *(c for c in (wanted or []) if c != 'Year')])
+    panel = pd.concat([r for _, r, _ in keep], ignore_index=True)
+    sizes = [len(r) for _, r, _ in keep]
+    panel.insert(0, 'Sector', np.repeat([s for _, _, s in keep], sizes))
+    panel.insert(0, 'Ticker', np.repeat([t for t, _, _ in keep], sizes))
+    return panel
+
+def refresh_companies(tickers, only_due: bool = True, max_workers: int = 16, rate_limit: float = 10.0, retries: int = 2,
+                      backoff: float = 0.5, change_log: str = None, backend=None, freq: str = 'annual') -> Dict[str, Any]:
+    """
+    Re-check stored fundamentals and fold in only what changed.
+    only_due skips tickers whose statements are still fresh (the cache expiry follows the
+    expected filing date), so a daily run fetches little. Unchanged tickers just restart their
+    TTL; changed ones get merged statements (HISTORY_DATASETS, apart from what get_company_df /
+    get_companies_batch cache) plus a recomputed ratio history in the cache.
+    freq='quarterly' keeps every quarter Yahoo ever returned (it only serves the last few),
+    so the stored TTM history grows quarter by quarter.
+    Returns {'changed', 'unchanged', 'skipped', 'failed': {ticker: reason}, 'changes', 'elapsed'}.
+    """
+    cache = get_cache()
+    if cache is False: raise ValueError("incremental refresh needs the fundamentals cache")
+    tickers = list(dict.fromkeys(resolve_to_ticker(t) for t in tickers if str(t).strip()))
+    dataset = HISTORY_DATASETS[freq]
+    due = [t for t in tickers if not (only_due and cache.is_fresh(t, dataset))]
+    limiter = RateLimiter(rate_limit, burst=max(1, int(rate_limit)))
+    start = time.monotonic()
+
+    def update(tk):
+        fetched = normalize_dataframe(_with_retry(lambda: fetch_yahoo_statements(tk, backend, freq), limiter, retries, backoff), 'yahoo')
+        if fetched.empty: raise ValueError("no data")
+        if cache.peek(tk, 'info') is None: # first sighting: sector & market cap for the ratios
+            try: cache.put(tk, 'info', _with_retry(lambda: get_yahoo_info(tk, backend), limiter, retries, backoff), save=False)
+            except Exception: pass
+        return refresh_company(tk, fetched, cache, lambda merged: _stored_ratio_history(tk, merged, freq), dataset, RATIO_DATASETS[freq])
+
+    out = {'changed': [], 'unchanged': [], 'skipped': [t for t in tickers if t not in set(due)], 'failed': {}, 'changes': []}
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        jobs = {pool.submit(update, tk): tk for tk in due}
+        for fut in as_completed(jobs):
+            tk = jobs[fut]
+            try: changes = fut.result()
+            except Exception as e: out['failed'][tk] = str(e); continue
+            out['changed' if changes else 'unchanged'].append(tk)
+            out['changes'] += changes
+    cache.flush()
+    if change_log: ChangeLog(change_log).write(out['changes'])
+    count('loader.refresh_fetched', len(due)); count('loader.refresh_changed', len(out['changed']))
+    out['elapsed'] = time.monotonic() - start
+    print(f"✅ Refresh: {len(due)}/{len(tickers)} checked, {len(out['changed'])} changed, {len(out['failed'])} failed in {out['elapsed']:.2f}s")
+    return out
@@ -0,0 +1,29 @@
+import io
+import contextlib
+import pytest
+
+from test_loader import set_cache, get_yahoo_data, normalize_dataframe
+from modules import telemetry
+from synthetic import SyntheticUniverse
+
+@pytest.fixture(autouse=True)
+def no_cache():
+    """Every test starts without the process cache (tests that need one set their own)."""
+    set_cache(False); telemetry.enable(False)
+    yield
+    set_cache(None)
+
+@pytest.fixture(scope='session')
+def universe():
+    return SyntheticUniverse(40, years=5, missing=0.1, quarters=8)
+
+@pytest.fixture(scope='session')
+def frames(universe):
+    """{ticker: normalized annual df with Market Cap} for the synthetic universe."""
+    backend = universe.backend(); out = {}
+    with contextlib.redirect_stdout(io.StringIO()): # the loader prints per fetch
+        for t in universe.tickers:
+            df = normalize_dataframe(get_yahoo_data(t, backend=backend), 'yahoo')
+            df['Market Cap'] = universe.info(t)['marketCap']
+            out[t] = df
+    return out
@@ -0,0 +1,132 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from modules.analyzer import (RATIO_GROUPS, BENEISH_FIELDS, BENEISH_WEIGHTS, BENEISH_INTERCEPT, M_SCORE_DEFAULT,
+                              calculate_financial_ratios, calculate_ratio_history, calculate_ratios_panel, calculate_ratios_wide,
+                              frames_to_panel, frames_to_wide, ratio_row_to_dict)
+
+def reference_ratios(df):
+    """The pre-vectorization calculate_financial_ratios (v8.0): newest row only, one pd.to_numeric per lookup."""
+    t = df.sort_values(by='Year', ascending=False).reset_index(drop=True).iloc[0]
+    def get_val(keys, default=0):
+        for k in [keys] if isinstance(keys, str) else keys:
+            val = pd.to_numeric(t.get(k), errors='coerce')
+            if not pd.isna(val): return float(val)
+        return float(default)
+    safe_div = lambda a, b: a / b if b != 0 else 0
+
+    revenue = get_val(['Revenue', 'TotalRevenue', 'Sales']); cogs = get_val(['CostOfGoodsSold', 'CostOfRevenue'])
+    ebit = get_val(['OperatingIncome', 'EBIT']); net_income = get_val(['NetIncome', 'NetIncomeCommonStockholders'])
+    interest = abs(get_val(['InterestExpense', 'Interest']))
+    ebitda = get_val('EBITDA')
+    if ebitda == 0: ebitda = ebit + get_val(['ReconciledDepreciation', 'DepreciationAndAmortization'])
+    cash = get_val(['Cash', 'CashAndCashEquivalents'])
+    receivables = get_val(['Receivables', 'AccountsReceivable', 'NetReceivables'])
+    if receivables == 0: receivables = get_val('CurrentAssets') * 0.2
+    inventory = get_val('Inventory')
+    payables = get_val(['Payables', 'AccountsPayable'])
+    if payables == 0: payables = get_val('CurrentLiabilities') * 0.2
+    current_assets = get_val(['CurrentAssets', 'TotalCurrentAssets']); current_liabilities = get_val(['CurrentLiabilities', 'TotalCurrentLiabilities'])
+    total_assets = get_val('TotalAssets'); total_equity = get_val(['TotalEquity', 'StockholdersEquity'])
+    total_debt = get_val(['TotalDebt', 'LongTermDebtAndCapitalLeaseObligation'])
+    if total_debt == 0: total_debt = get_val('LongTermDebt') + get_val('CurrentDebt')
+    net_ppe = get_val(['NetPPE', 'PropertyPlantEquipmentNet'])
+    cfo = get_val(['OperatingCashFlow', 'TotalCashFromOperatingActivities'])
+    cfi = get_val(['InvestingCashFlow', 'TotalCashflowsFromInvestingActivities'])
+    cff = get_val(['FinancingCashFlow', 'TotalCashFromFinancingActivities'])
+    capex = abs(get_val(['CapitalExpenditures', 'CapEx'])); dividends = abs(get_val(['CashDividendsPaid', 'DividendsPaid']))
+    shares = get_val(['ShareIssued', 'CommonStockSharesOutstanding']); market_cap = get_val('Market Cap')
+
+    dso = safe_div(receivables, revenue) * 365; dsi = safe_div(inventory, cogs) * 365; dpo = safe_div(payables, cogs) * 365
+    nopat = ebit * 0.75; invested_capital = total_equity + total_debt - cash
+    eps = get_val('BasicEPS')
+    if eps == 0: eps = safe_div(net_income, shares)
+    out = {
+        'Current_Ratio': round(safe_div(current_assets, current_liabilities), 2),
+        'Quick_Ratio': round(safe_div(current_assets - inventory, current_liabilities), 2),
+        'Cash_Ratio': round(safe_div(cash, current_liabilities), 2),
+        'DSO': round(dso, 0), 'DSI': round(dsi, 0), 'DPO': round(dpo, 0), 'CCC': round(dso + dsi - dpo, 0),
+        'Total_Asset_Turnover': round(safe_div(revenue, total_assets), 2), 'Fixed_Asset_Turnover': round(safe_div(revenue, net_ppe), 2),
+        'Debt_to_Equity': round(safe_div(total_debt, total_equity), 2), 'Net_Debt_to_EBITDA': round(safe_div(total_debt - cash, ebitda), 2),
+        'Interest_Coverage': round(safe_div(ebit, interest), 2), 'Fin_Lev_Multiplier': round(safe_div(total_assets, total_equity), 2),
+        'Gross_Margin': round(safe_div(revenue - cogs, revenue) * 100, 2), 'EBITDA_Margin': round(safe_div(ebitda, revenue) * 100, 2),
+        'Operating_Margin': round(safe_div(ebit, revenue) * 100, 2), 'Net_Margin': round(safe_div(net_income, revenue) * 100, 2),
+        'ROE': round(safe_div(net_income, total_equity) * 100, 2), 'ROA': round(safe_div(net_income, total_assets) * 100, 2),
+        'ROIC': round(safe_div(nopat, invested_capital) * 100, 2),
+        'EPS': round(eps, 2), 'Dividend_Payout': round(safe_div(dividends, net_income) * 100, 2), 'BVPS': round(safe_div(total_equity, shares), 2),
+        'CFO': cfo, 'CFI': cfi, 'CFF': cff, 'FCF': cfo - capex, 'CAPEX_Sales': round(safe_div(capex, revenue) * 100, 2),
+    }
+    z = (1.2 * safe_div(current_assets - current_liabilities, total_assets) + 1.4 * safe_div(get_val('RetainedEarnings'), total_assets)
+         + 3.3 * safe_div(ebit, total_assets) + 0.6 * (safe_div(market_cap, total_debt) if total_debt > 0 else 0) + safe_div(revenue, total_assets))
+    score = (20 * (cfo > net_income) + 15 * (out['Interest_Coverage'] > 3) + 15 * (out['ROE'] > 15) + 25 * (z > 2.99)
+             + 15 * (out['Net_Margin'] > 10) + 10 * (out['Debt_to_Equity'] < 1.0))
+    out.update({'Z_Score': round(z, 2), 'Health_Score': score, 'Is_Paper_Profits': cfo < net_income, 'Gap': net_income - cfo,
+                'Invested_Capital': invested_capital, 'NOPAT': nopat})
+    return out
+
+def flat(res):
+    """Nested engine result -> the fields the reference computes."""
+    row = {k: v for group in res['Analysis'].values() for k, v in group.items()}
+    row.update({k: res['Forensics'][k] for k in ('Z_Score', 'Health_Score', 'Is_Paper_Profits', 'Gap')})
+    row.update({k: res['Valuation'][k] for k in ('Invested_Capital', 'NOPAT')})
+    return row
+
+def assert_same(got, want, where):
+    assert got.keys() == want.keys()
+    for k, v in want.items():
+        assert got[k] == pytest.approx(v, rel=1e-9, abs=1e-9), f"{where} {k}: {got[k]} != {v}"
+
+def test_single_company_matches_reference(frames):
+    for ticker, df in frames.items():
+        assert_same(flat(calculate_financial_ratios(df)), reference_ratios(df), ticker)
+
+def test_panel_and_wide_match_reference_for_every_year(frames):
+    panel = calculate_ratios_panel(frames_to_panel(frames))
+    wide = calculate_ratios_wide(frames_to_wide(frames)).reset_index()
+    assert len(panel) == len(wide) == sum(len(df) for df in frames.values())
+    for ratios in (panel, wide):
+        for row in ratios.to_dict('records'):
+            df = frames[row['Ticker']]
+            assert_same(flat(ratio_row_to_dict(row)), reference_ratios(df[df['Year'] == row['Year']]), f"{row['Ticker']}/{row['Year']}")
+
+def test_compact_panel_matches_float64(frames):
+    full = calculate_ratios_panel(frames_to_panel(frames))
+    compact = calculate_ratios_panel(frames_to_panel(frames, compact=True))
+    cols = [c for g in RATIO_GROUPS.values() for c in g if c not in ('CFO', 'CFI', 'CFF', 'FCF')]
+    np.testing.assert_allclose(compact[cols].to_numpy(float), full[cols].to_numpy(float), rtol=1e-3, atol=0.02)
+
+def test_headline_is_newest_year_and_trends_oldest_first(frames):
+    df = next(iter(frames.values()))
+    res = calculate_financial_ratios(df.sample(frac=1, random_state=0)) # row order must not matter
+    assert res == calculate_financial_ratios(df)
+    assert res['Trends']['Year'] == sorted(df['Year'].tolist())
+
+def test_empty_inputs():
+    assert calculate_financial_ratios(pd.DataFrame()) == {}
+    assert frames_to_panel({}).empty and frames_to_wide({'X': pd.DataFrame()}).empty
+
+def test_m_score_and_growth_by_hand():
+    t0 = {'Year': 2024, 'Revenue': 1200.0, 'CostOfRevenue': 780.0, 'SellingGeneralAndAdministration': 150.0, 'ReconciledDepreciation': 50.0,
+          'NetPPE': 450.0, 'AccountsReceivable': 240.0, 'CurrentAssets': 500.0, 'CurrentLiabilities': 300.0, 'TotalAssets': 1500.0,
+          'LongTermDebt': 400.0, 'TotalDebt': 500.0, 'StockholdersEquity': 700.0, 'NetIncome': 100.0, 'OperatingCashFlow': 60.0, 'CapitalExpenditures': -30.0}
+    t1 = {'Year': 2023, 'Revenue': 1000.0, 'CostOfRevenue': 600.0, 'SellingGeneralAndAdministration': 120.0, 'ReconciledDepreciation': 40.0,
+          'NetPPE': 400.0, 'AccountsReceivable': 150.0, 'CurrentAssets': 450.0, 'CurrentLiabilities': 250.0, 'TotalAssets': 1300.0,
+          'LongTermDebt': 380.0, 'TotalDebt': 480.0, 'StockholdersEquity': 650.0, 'NetIncome': 90.0, 'OperatingCashFlow': 110.0, 'CapitalExpenditures': -20.0}
+    ratios = calculate_ratio_history(pd.DataFrame([t1, t0]))
+    new, old = ratios.iloc[0], ratios.iloc[1]
+
+    want = {'DSRI': (240 / 1200) / (150 / 1000), 'GMI': (400 / 1000) / (420 / 1200),
+            'AQI': (1 - (500 + 450) / 1500) / (1 - (450 + 400) / 1300), 'SGI': 1200 / 1000,
+            'DEPI': (40 / (40 + 400)) / (50 / (50 + 450)), 'SGAI': (150 / 1200) / (120 / 1000),
+            'LVGI': ((300 + 400) / 1500) / ((250 + 380) / 1300), 'TATA': (100 - 60) / 1500}
+    for k, v in want.items(): assert new[k] == pytest.approx(round(v, 3)), k
+    m_score = BENEISH_INTERCEPT + sum(BENEISH_WEIGHTS[k] * v for k, v in want.items())
+    assert new['M_Score'] == pytest.approx(round(m_score, 2))
+    assert new['Revenue_Growth'] == pytest.approx(20.0) and new['FCF_Growth'] == pytest.approx(round((30 - 90) / 90 * 100, 2))
+
+    # First year: no t-1 -> default M-Score, NaN indexes, but accruals still stand on their own
+    assert old['M_Score'] == M_SCORE_DEFAULT
+    assert all(np.isnan(old[k]) for k in BENEISH_FIELDS if k != 'TATA')
+    assert old['TATA'] == pytest.approx(round((90 - 110) / 1300, 3))
+    assert old['Revenue_Growth'] == 0 and old['FCF_Growth'] == 0
@@ -0,0 +1,58 @@
+import io
+import time
+import threading
+import contextlib
+
+import test_loader
+from test_loader import get_companies_batch, RateLimiter
+
+class FlakyBackend:
+    """Synthetic yfinance backend whose Ticker() raises for the first `fail_first` calls per ticker (always for `dead`)."""
+    def __init__(self, universe, fail_first=0, dead=()):
+        self.inner = universe.backend(); self.fail_first = fail_first; self.dead = set(dead)
+        self.calls = {}; self._lock = threading.Lock()
+    def Ticker(self, ticker):
+        with self._lock: n = self.calls[ticker] = self.calls.get(ticker, 0) + 1
+        if ticker in self.dead or n <= self.fail_first: raise ConnectionError(f"{ticker}: try {n} refused")
+        return self.inner.Ticker(ticker)
+
+def batch(tickers, **kw):
+    with contextlib.redirect_stdout(io.StringIO()): return get_companies_batch(tickers, **kw)
+
+def test_batch_returns_every_ticker(universe):
+    tickers = universe.tickers[:10]
+    out = batch(tickers + [tickers[0].lower(), ' '], backend=universe.backend(), rate_limit=1000)
+    assert sorted(out['data']) == sorted(tickers) and out['failed'] == {}
+    res = out['data'][tickers[0]]
+    assert 'Revenue' in res['table'].columns and res['info']['marketCap'].iloc[0] == universe.info(tickers[0])['marketCap']
+
+def test_retry_with_exponential_backoff(universe, monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(test_loader.time, 'sleep', sleeps.append) # the limiter never waits at this rate
+    backend = FlakyBackend(universe, fail_first=2)
+    out = batch(universe.tickers[:3], backend=backend, rate_limit=1000, retries=2, backoff=0.5, with_info=False)
+    assert sorted(out['data']) == universe.tickers[:3] and out['failed'] == {}
+    assert all(n == 3 for n in backend.calls.values())
+    assert sorted(sleeps) == [0.5] * 3 + [1.0] * 3
+
+def test_failures_are_listed_per_ticker(universe):
+    good, dead = universe.tickers[:2], universe.tickers[2]
+    backend = FlakyBackend(universe, dead=[dead])
+    out = batch([*good, dead], backend=backend, rate_limit=1000, retries=1, backoff=0)
+    assert sorted(out['data']) == good
+    assert set(out['failed']) == {dead}
+    assert 'table: ' in out['failed'][dead] and 'info: ' in out['failed'][dead] and 'refused' in out['failed'][dead]
+    assert backend.calls[dead] == 4 # (1 try + 1 retry) x statements and info
+
+def test_rate_limit_caps_request_rate(universe):
+    out = batch(universe.tickers[:30], backend=universe.backend(), rate_limit=20, with_info=False)
+    assert len(out['data']) == 30
+    assert out['elapsed'] >= (30 - 20) / 20 * 0.9 # the first 20 ride the burst, the rest at 20/s
+
+def test_rate_limiter_is_per_host():
+    limiter = RateLimiter(rate=10, burst=2)
+    start = time.monotonic()
+    for _ in range(2): limiter.acquire('a'); limiter.acquire('b')
+    assert time.monotonic() - start < 0.05
+    limiter.acquire('a')
+    assert time.monotonic() - start >= 0.09
@@ -0,0 +1,44 @@
+import io
+import json
+import contextlib
+import pandas as pd
+import pytest
+
+import batch_runner
+import test_loader
+
+@pytest.fixture
+def synthetic(universe, monkeypatch):
+    """batch_runner fetches through the synthetic backend."""
+    backend = universe.backend()
+    monkeypatch.setattr(batch_runner, 'get_company_df', lambda s, t: test_loader.get_company_df(s, t, backend=backend))
+    monkeypatch.setattr(batch_runner, 'load_company_info', lambda t: test_loader.load_company_info(t, backend=backend))
+    return universe
+
+def run(out, tickers, *flags):
+    args = batch_runner.parse_args(['--out', str(out), '--tickers', *tickers, '--workers', '1', '--format', 'csv', *flags])
+    with contextlib.redirect_stdout(io.StringIO()): return batch_runner.run(args)
+
+def test_fresh_run_starts_a_new_checkpoint(tmp_path, synthetic):
+    first, second = synthetic.tickers[:3], synthetic.tickers[3:5]
+    run(tmp_path, first)
+    rows = run(tmp_path, second)
+    assert [r['Id'] for r in rows] == second
+    assert pd.read_csv(tmp_path / 'results.csv')['Id'].tolist() == second
+    assert sorted(json.loads(line)['id'] for line in open(tmp_path / 'checkpoint.jsonl')) == sorted(second)
+
+def test_resume_skips_done_items_and_keeps_to_the_current_list(tmp_path, synthetic):
+    a, b, c = synthetic.tickers[:3]
+    run(tmp_path, [a, b])
+    rows = run(tmp_path, [b, c], '--resume')
+    assert [r['Id'] for r in rows] == [b, c] # a is in the checkpoint but not in this run
+    ids = [json.loads(line)['id'] for line in open(tmp_path / 'checkpoint.jsonl')]
+    assert sorted(ids) == sorted([a, b, c]) # b was not run again
+
+def test_pdf_names_stay_inside_the_pdf_dir(tmp_path, frames):
+    pytest.importorskip('fpdf')
+    pdf_dir = tmp_path / 'pdfs'; pdf_dir.mkdir()
+    table = next(iter(frames.values())).drop(columns=['Market Cap'])
+    row, _ = batch_runner.analyze_item('../../evil/ACME', table, 5e9, 'yahoo', pdf_dir=str(pdf_dir))
+    assert row['Id'] == '../../evil/ACME'
+    assert [p.name for p in pdf_dir.iterdir()] == ['.._.._evil_ACME.pdf'] and not (tmp_path / 'evil').exists()
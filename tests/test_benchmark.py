@@ -0,0 +1,43 @@
+import random
+import pytest
+
+import modules.benchmark as benchmark
+from modules.benchmark import SectorBenchmarks, ALL_SECTORS
+
+def brute_percentile(values, value):
+    below = sum(v < value for v in values); equal = sum(v == value for v in values)
+    return 100.0 * (below + 0.5 * equal) / len(values)
+
+@pytest.fixture
+def store():
+    rng = random.Random(0); s = SectorBenchmarks(metrics=['ROE'])
+    for i in range(30): s.add(f"C{i}", 'Tech' if i < 20 else 'Energy', {'ROE': float(rng.randint(0, 9))}) # many ties
+    return s
+
+def test_percentile_and_median_exclude_the_company(store):
+    for company, (sector, vals) in list(store._members.items()):
+        others = [v['ROE'] for c, (s, v) in store._members.items() if c != company and s == sector]
+        for probe in (vals['ROE'], vals['ROE'] + 0.5, -1.0, 99.0):
+            assert store.percentile(sector, 'ROE', probe, exclude=company) == pytest.approx(brute_percentile(others, probe))
+        for q in (0.0, 0.25, 0.5, 0.9, 1.0):
+            assert store.quantile(sector, 'ROE', q, exclude=company) == sorted(others)[min(len(others) - 1, int(q * len(others)))]
+
+def test_rank_against_peers_only():
+    s = SectorBenchmarks(metrics=['ROE'], min_peers=5)
+    for i in range(5): s.add(f"P{i}", 'Tech', {'ROE': 10.0})
+    s.add('TOP', 'Tech', {'ROE': 50.0})
+    res = s.rank('Tech', {'ROE': 50.0}, exclude='TOP')
+    assert res['peers'] == 5 and res['metrics']['ROE']['percentile'] == 100.0 and res['metrics']['ROE']['median'] == 10.0
+    assert s.rank('Tech', {'ROE': 50.0})['metrics']['ROE']['percentile'] == round(100 * 5.5 / 6, 1) # without exclude: itself counts
+    s.remove('P0')
+    assert s.rank('Tech', {'ROE': 50.0}, exclude='TOP')['peer_group'] == ALL_SECTORS # 4 peers < min_peers
+
+def test_compaction_keeps_other_writers_rows(tmp_path, monkeypatch):
+    path = str(tmp_path / 'benchmarks.jsonl')
+    first, second = SectorBenchmarks(path, metrics=['ROE']), SectorBenchmarks(path, metrics=['ROE']) # two processes
+    first.add('A', 'Tech', {'ROE': 1.0}); first.add('A', 'Tech', {'ROE': 2.0})
+    second.add('B', 'Energy', {'ROE': 3.0})
+    first.compact() # must not drop B, which `first` never saw
+    reloaded = SectorBenchmarks(path, metrics=['ROE'])
+    assert sorted(reloaded.rows(), key=lambda r: r['Id']) == [{'Id': 'A', 'Sector': 'Tech', 'ROE': 2.0}, {'Id': 'B', 'Sector': 'Energy', 'ROE': 3.0}]
+    assert sum(1 for _ in open(path)) == 2
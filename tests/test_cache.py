@@ -0,0 +1,102 @@
+import io
+import json
+import time
+import threading
+import contextlib
+import pytest
+
+from modules.cache import FundamentalsCache
+from test_loader import set_cache, get_company_df, load_company_info, normalize_dataframe
+
+class CountingBackend:
+    """The synthetic yfinance backend, counting Ticker() calls (one per network fetch)."""
+    def __init__(self, universe):
+        self.inner = universe.backend(); self.calls = 0
+    def Ticker(self, ticker):
+        self.calls += 1
+        return self.inner.Ticker(ticker)
+
+@pytest.fixture
+def cache(tmp_path):
+    c = FundamentalsCache(str(tmp_path)); set_cache(c)
+    return c
+
+def fetch(ticker, backend, **kw):
+    with contextlib.redirect_stdout(io.StringIO()): return get_company_df(ticker, 'yahoo', backend=backend, **kw)
+
+def test_miss_then_hit(cache, universe):
+    backend = CountingBackend(universe); t = universe.tickers[0]
+    first = fetch(t, backend)[0]['table']; second = fetch(t, backend)[0]['table']
+    assert backend.calls == 1 and cache.stats['misses'] == 1 and cache.stats['hits'] == 1
+    assert list(second.columns) == list(first.columns) and second.attrs['normalization']['source'] == 'yahoo'
+    assert 'Revenue' in second.columns # the normalized frame is what gets stored
+    assert list(normalize_dataframe(second, 'yahoo').columns) == list(second.columns)
+    load_company_info(t, backend=backend); load_company_info(t, backend=backend)
+    assert backend.calls == 2
+
+def test_force_refresh_and_ttl_expiry(tmp_path, universe):
+    cache = FundamentalsCache(str(tmp_path), ttls={'info': 0.05}); set_cache(cache)
+    backend = CountingBackend(universe); t = universe.tickers[1]
+    load_company_info(t, backend=backend); load_company_info(t, backend=backend)
+    assert backend.calls == 1
+    time.sleep(0.06)
+    assert not cache.is_fresh(t, 'info')
+    load_company_info(t, backend=backend)
+    assert backend.calls == 2 and cache.stats['expired'] == 1
+    load_company_info(t, force_refresh=True, backend=backend)
+    assert backend.calls == 3
+
+def test_lru_eviction(tmp_path, universe):
+    backend = CountingBackend(universe); a, b, c = universe.tickers[:3]
+    probe = FundamentalsCache(str(tmp_path / 'probe')); set_cache(probe)
+    fetch(a, backend); one = probe.size_bytes()
+    cache = FundamentalsCache(str(tmp_path / 'lru'), max_bytes=int(2.5 * one)); set_cache(cache)
+    fetch(a, backend); fetch(b, backend); time.sleep(0.01)
+    fetch(a, backend) # a is now more recent than b
+    fetch(c, backend)
+    assert cache.stats['evictions'] == 1
+    assert cache.peek(b, 'statements') is None and cache.peek(a, 'statements') is not None
+    assert json.load(open(tmp_path / 'lru' / 'index.json')).keys() == cache._index.keys()
+
+def test_processes_sharing_a_root_keep_each_others_entries(tmp_path, universe):
+    backend = universe.backend(); a, b = universe.tickers[:2]
+    first, second = FundamentalsCache(str(tmp_path)), FundamentalsCache(str(tmp_path)) # each loads the index once
+    set_cache(first); fetch(a, backend)
+    set_cache(second); fetch(b, backend)
+    first.invalidate(a, 'info') # any later save of `first` must not drop b
+    on_disk = json.load(open(tmp_path / 'index.json'))
+    assert {'%s__statements' % a, '%s__statements' % b} <= on_disk.keys()
+    assert FundamentalsCache(str(tmp_path)).get(b, 'statements') is not None
+
+def test_hits_persist_last_access(tmp_path, universe, monkeypatch):
+    monkeypatch.setattr('modules.cache.ACCESS_SAVE_INTERVAL', 0)
+    cache = FundamentalsCache(str(tmp_path)); set_cache(cache)
+    t = universe.tickers[0]; fetch(t, universe.backend())
+    before = json.load(open(tmp_path / 'index.json'))[f'{t}__statements']['last_access']
+    time.sleep(0.01); cache.get(t, 'statements')
+    assert json.load(open(tmp_path / 'index.json'))[f'{t}__statements']['last_access'] > before
+
+def test_lookups_see_other_processes_writes(tmp_path, universe):
+    backend = universe.backend(); t = universe.tickers[0]
+    service_side, batch_side = FundamentalsCache(str(tmp_path)), FundamentalsCache(str(tmp_path))
+    set_cache(service_side); fetch(t, backend); load_company_info(t, backend=backend)
+    old = service_side.version(t, 'statements')
+    time.sleep(0.01)
+    set_cache(batch_side); fetch(t, backend, force_refresh=True) # e.g. batch_runner refetching
+    assert service_side.version(t, 'statements') == batch_side.version(t, 'statements') > old
+    batch_side.invalidate(t, 'statements')
+    assert not service_side.is_fresh(t, 'statements') and service_side.peek(t, 'statements') is None
+
+def test_concurrent_writers_of_one_entry_leave_a_whole_file(tmp_path, frames):
+    writers = [FundamentalsCache(str(tmp_path)) for _ in range(4)] # app, batch_runner, service, ... on one root
+    df = next(iter(frames.values()))
+    errors = []
+    def write(cache):
+        try:
+            for _ in range(10): cache.put('SAME', 'statements', df, save=False)
+        except Exception as e: errors.append(e) # e.g. another writer's os.replace took our tmp file
+    threads = [threading.Thread(target=write, args=(c,)) for c in writers]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    assert not errors and len(writers[0]._read('SAME__statements')) == len(df)
+    assert not list(tmp_path.glob('*.tmp'))
@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+
+from modules.analyzer import calculate_ratios_panel, frames_to_panel
+from modules.forensics import scan_universe
+
+def panel(sectors, tata, years=None):
+    n = len(sectors)
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({'Ticker': [f"T{i:03d}" for i in range(n)], 'Sector': sectors, 'Year': years if years is not None else [2024] * n,
+                         'TATA': tata, 'CFO': rng.uniform(50, 150, n), 'Gap': rng.uniform(-5, 5, n)})
+
+def test_small_sector_is_scored_against_the_whole_year():
+    rng = np.random.default_rng(1)
+    ratios = panel(['Big'] * 50 + ['Small'] * 2, [*rng.normal(0, 0.02, 50), 0.50, 0.0])
+    out = scan_universe(ratios, all_rows=True).set_index('Ticker')
+    assert out.loc['T050', 'Peer_Group'] == 'All 2024' and out.loc['T000', 'Peer_Group'] == 'Big 2024'
+    assert out.loc['T050', 'Accruals_Z'] > 3.5 and 'Accruals' in out.loc['T050', 'Flags']
+    assert out.loc['T051', 'Accruals_Z'] < 3.5
+
+def test_rows_without_a_year_have_no_peers():
+    rng = np.random.default_rng(2)
+    ratios = panel(['Big'] * 20, rng.normal(0, 0.02, 20), years=[2024.0] * 19 + [np.nan])
+    out = scan_universe(ratios, all_rows=True).set_index('Ticker')
+    assert len(out) == 20 and np.isnan(out.loc['T019', 'Accruals_Z']) and pd.isna(out.loc['T019', 'Peer_Group'])
+    assert out.loc['T000', 'Peer_Group'] == 'Big 2024.0' and np.isfinite(out.loc['T000', 'Accruals_Z'])
+
+def test_one_year_company_with_extreme_accruals_is_flagged(frames):
+    newco = next(iter(frames.values())).iloc[:1].copy() # a single fiscal year: no prior year to compare with
+    newco['NetIncome'] = newco['OperatingCashFlow'] + 0.4 * newco['TotalAssets']
+    ratios = calculate_ratios_panel(frames_to_panel({**frames, 'NEWCO': newco}))
+    out = scan_universe(ratios, all_rows=True).set_index('Ticker')
+    assert out.loc['NEWCO', 'Accruals'] == 0.4 and out.loc['NEWCO', 'Peer_Group'] == f"General {newco['Year'].iloc[0]}"
+    assert 'Accruals' in out.loc['NEWCO', 'Flags']
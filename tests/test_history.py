@@ -0,0 +1,33 @@
+import pickle
+import pandas as pd
+import pytest
+
+from modules.history import HistoryStore, FRAMES
+
+def group(title, df, reports=('Main',)):
+    return {'title': title, 'time': '12:00', 'reports': {name: {'data': {'Ratio': 1.0}, 'df': df} for name in reports}}
+
+@pytest.fixture
+def store(tmp_path):
+    s = HistoryStore(hot=1, max_entries=10, spill_root=str(tmp_path))
+    yield s
+    s.clear()
+
+def test_frame_held_twice_is_released_after_spill_and_reload(store):
+    df = pd.DataFrame({'Revenue': [1.0, 2.0], 'Year': [2024, 2023]})
+    first = store.add(group('A', df, reports=('Main', 'Peer')))
+    key = store.get(first)['reports']['Main']['key']
+    assert FRAMES._frames[key][1] == 2
+    store.add(group('B', pd.DataFrame({'Revenue': [3.0]}))) # spills A
+    assert key not in FRAMES._frames
+    got = store.get(first) # reload A, spills B
+    assert got['reports']['Peer']['df'].equals(df) and FRAMES._frames[key][1] == 2
+    store.clear()
+    assert key not in FRAMES._frames and store._frame_keys == []
+
+def test_memory_usage_reads_recorded_sizes(store, monkeypatch):
+    store.add(group('A', pd.DataFrame({'x': range(100)}))); store.add(group('B', pd.DataFrame({'y': range(50)})))
+    monkeypatch.setattr(pickle, 'dumps', lambda *a, **k: pytest.fail("memory_usage must not pickle"))
+    mem = store.memory_usage()
+    assert mem['entries'] == 2 and mem['hot'] == 1 and mem['spills'] == 1
+    assert mem['results_bytes'] > 0 and mem['frames_bytes'] >= 50 * 8 and mem['disk_bytes'] > 0
@@ -0,0 +1,49 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from modules import benchmark
+from modules.jobs import JobQueue
+
+def store_after(gate, side):
+    def fn(job):
+        job.report(0.9, "store")
+        gate.wait(5)
+        with job.commit(): side.append(job.id)
+        return 'stored'
+    return fn
+
+def test_cancel_after_last_report_skips_the_side_effects():
+    queue, gate, side = JobQueue(max_workers=1), threading.Event(), []
+    try:
+        job = queue.submit('a', store_after(gate, side), owner='s1')
+        while job.stage != "store": time.sleep(0.001)
+        assert queue.cancel(job.id, 's1')
+        gate.set(); job.wait(5)
+        assert job.status == 'cancelled' and job.result is None and side == []
+    finally: queue.shutdown()
+
+def test_cancel_during_commit_is_too_late():
+    queue, entered, release = JobQueue(max_workers=1), threading.Event(), threading.Event()
+    def fn(job):
+        with job.commit(): entered.set(); release.wait(5)
+        return 'stored'
+    try:
+        job = queue.submit('a', fn, owner='s1')
+        entered.wait(5)
+        assert not queue.cancel(job.id, 's1')
+        assert job.owners == {'s1'} # the failed cancel keeps its owner
+        assert queue.submit('a', fn, owner='s2') is job and queue.stats['deduplicated'] == 1
+        release.set(); job.wait(5)
+        assert job.status == 'done' and job.result == 'stored' and queue.stats['submitted'] == 1
+    finally: queue.shutdown()
+
+def test_benchmarks_are_created_once_across_threads(monkeypatch, tmp_path):
+    monkeypatch.setattr(benchmark, '_BENCHMARKS', None)
+    monkeypatch.setattr(benchmark, 'default_benchmark_path', lambda: str(tmp_path / 'benchmarks.jsonl'))
+    made = []
+    class Slow(benchmark.SectorBenchmarks):
+        def __init__(self, *a, **kw): time.sleep(0.01); made.append(1); super().__init__(*a, **kw)
+    monkeypatch.setattr(benchmark, 'SectorBenchmarks', Slow)
+    with ThreadPoolExecutor(8) as pool: stores = list(pool.map(lambda _: benchmark.get_benchmarks(), range(8)))
+    assert len(made) == 1 and all(s is stores[0] for s in stores)
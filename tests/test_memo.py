@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+
+from modules.memo import ArtifactCache, digest
+
+def test_lru_evicts_least_recently_used_past_the_byte_bound():
+    cache = ArtifactCache(max_bytes=30)
+    for k in 'abc': cache.put(k, b'x' * 10)
+    cache.get('a') # a is now the most recent
+    cache.put('d', b'x' * 10)
+    assert cache.get('b') is None and all(cache.get(k) is not None for k in 'acd')
+    assert cache.info()['bytes'] == 30 and cache.stats['evictions'] == 1
+
+def test_entry_bound_and_oversized_values():
+    cache = ArtifactCache(max_bytes=100, max_entries=2)
+    for k in 'abc': cache.put(k, b'x')
+    assert cache.info()['entries'] == 2 and cache.get('a') is None
+    assert cache.put('big', b'x' * 101) == b'x' * 101 and cache.get('big') is None # returned, never stored
+    assert cache.get('c') is not None
+
+def test_get_or_compute_computes_once():
+    cache, calls = ArtifactCache(), []
+    compute = lambda: calls.append(1) or 'v'
+    assert cache.get_or_compute('k', compute) == cache.get_or_compute('k', compute) == 'v' and len(calls) == 1
+    cache.enabled = False
+    cache.get_or_compute('k', compute); assert len(calls) == 2
+
+def test_digest_is_stable_and_content_addressed():
+    df = pd.DataFrame({'a': np.arange(100.0)})
+    assert digest(df, {'x': 1, 'y': 2}) == digest(df.copy(), {'y': 2, 'x': 1})
+    assert digest(df) != digest(df.assign(a=df['a'] + 1))
+    other = df.copy(); other.loc[50, 'a'] = -1.0 # same head / tail: identical repr
+    assert repr(df) == repr(other)
+    assert digest([df], {'f': df}) != digest([other], {'f': other}) # nested frames hash their content too
+    assert digest('ab', 'c') != digest('a', 'bc')
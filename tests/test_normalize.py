@@ -0,0 +1,31 @@
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+
+import test_loader
+from test_loader import normalize_dataframe, normalization_coverage
+
+def frame(*cols): return pd.DataFrame([[1.0] * len(cols)], columns=list(cols))
+
+def test_spelling_variants_map_to_one_name():
+    for col in ('Total Revenue', 'TotalRevenue', 'total  revenue'):
+        assert list(normalize_dataframe(frame(col), 'yahoo').columns) == ['Revenue']
+
+def test_existing_standard_name_wins():
+    assert list(normalize_dataframe(frame('Long Term Debt', 'TotalDebt'), 'yahoo').columns) == ['Long Term Debt', 'TotalDebt']
+
+def test_total_capitalization_is_not_debt():
+    out = normalize_dataframe(frame('Total Capitalization', 'Long Term Debt'), 'yahoo')
+    assert list(out.columns) == ['Total Capitalization', 'TotalDebt'] # debt + equity, not a debt figure
+    assert out.attrs['normalization']['unmapped'] == ['Total Capitalization']
+
+def test_normalized_frame_passes_through():
+    once = normalize_dataframe(frame('Total Revenue', 'Other Line Item 1'), 'yahoo')
+    twice = normalize_dataframe(once, 'yahoo')
+    assert list(twice.columns) == list(once.columns) and twice is not once
+
+def test_unmapped_counts_are_exact_under_threads(monkeypatch):
+    monkeypatch.setattr(test_loader, 'UNMAPPED_FIELDS', type(test_loader.UNMAPPED_FIELDS)(test_loader.Counter))
+    df = frame('Total Revenue', *[f"Odd Field {i}" for i in range(50)])
+    with ThreadPoolExecutor(8) as pool: list(pool.map(lambda _: normalize_dataframe(df, 'pdf'), range(400)))
+    counts = dict(normalization_coverage('pdf')['pdf'])
+    assert len(counts) == 50 and set(counts.values()) == {400}
@@ -0,0 +1,33 @@
+import pytest
+
+pytest.importorskip('fitz'); pytest.importorskip('fpdf')
+from bench_pdf_extract import build_report
+from modules import pdf_extractor
+from modules.pdf_extractor import extract_statements, parse_number
+
+@pytest.fixture(scope='module')
+def report(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('pdf') / 'report.pdf')
+    build_report(path, 20)
+    return path
+
+def test_parse_number_formats():
+    assert parse_number('1,234.5') == 1234.5 and parse_number('(1,234)') == -1234 and parse_number('1.234,5') == 1234.5
+    assert parse_number('-') == 0.0 and parse_number('Revenue') is None
+
+def test_statement_pages_run_through_the_pool(report):
+    serial, meta1 = extract_statements(report, workers=1)
+    pooled, meta2 = extract_statements(report, workers=2)
+    assert meta1['pooled_pages'] == 0 and meta2['pooled_pages'] == 3 # one task per statement page
+    assert pooled == serial and meta2['statement_pages'] == meta1['statement_pages'] == {'income': [12], 'balance': [13], 'cashflow': [14]}
+    assert pooled['Total revenue'] == {2024: pytest.approx(5120.4e6), 2023: pytest.approx(4608.4e6)} # printed to one decimal
+    assert pooled['Basic EPS'][2024] == pytest.approx(2.3) # per-share figures are not scaled
+
+def test_chunked_tail_runs_in_process(report):
+    items, meta = extract_statements(report, workers=2, chunk=2)
+    assert meta['pooled_pages'] == 2 and len(items) == len(extract_statements(report, workers=1)[0])
+
+def test_pool_is_spawned_once_and_reused(report):
+    extract_statements(report, workers=2); pool = pdf_extractor._POOLS[2]
+    extract_statements(report, workers=2)
+    assert pdf_extractor._POOLS[2] is pool and pool._mp_context.get_start_method() == 'spawn'
@@ -0,0 +1,52 @@
+import io
+import contextlib
+import pandas as pd
+import pytest
+
+from modules.cache import FundamentalsCache
+from modules.refresh import merge_periods
+from test_loader import set_cache, get_company_df, refresh_companies, stored_ratios
+
+class RestatingBackend:
+    """The synthetic yfinance backend; restate() scales the newest revenue of every later fetch."""
+    def __init__(self, universe):
+        self.inner = universe.backend(); self.factor = 1.0
+    def restate(self, factor): self.factor = factor
+    def Ticker(self, ticker):
+        t = self.inner.Ticker(ticker)
+        if self.factor != 1.0:
+            t.financials = t.financials.copy()
+            t.financials.iloc[list(t.financials.index).index('Total Revenue'), 0] *= self.factor
+        return t
+
+@pytest.fixture
+def cache(tmp_path):
+    c = FundamentalsCache(str(tmp_path)); set_cache(c)
+    return c
+
+def quiet(fn, *args, **kw):
+    with contextlib.redirect_stdout(io.StringIO()): return fn(*args, **kw)
+
+def test_fetch_after_refresh_keeps_the_restatement_for_the_next_refresh(cache, universe):
+    backend = RestatingBackend(universe); t = universe.tickers[0]
+    quiet(refresh_companies, [t], backend=backend)
+    before = stored_ratios(t)['Net_Margin'].iloc[0]
+    backend.restate(1.25)
+    quiet(get_company_df, t, 'yahoo', force_refresh=True, backend=backend) # app / batch / service fetch
+    res = quiet(refresh_companies, [t], only_due=False, backend=backend)
+    assert [(c['kind'], c['field']) for c in res['changes']] == [('restated', 'Revenue')]
+    assert stored_ratios(t)['Net_Margin'].iloc[0] == pytest.approx(before / 1.25, rel=1e-3)
+
+def test_refresh_history_is_never_evicted(tmp_path, universe):
+    cache = FundamentalsCache(str(tmp_path), max_bytes=1); set_cache(cache)
+    backend = universe.backend(); a, b = universe.tickers[:2]
+    quiet(refresh_companies, [a], backend=backend)
+    quiet(get_company_df, b, 'yahoo', backend=backend)
+    assert cache.peek(a, 'history') is not None and cache.peek(b, 'statements') is None
+
+def test_repeated_period_does_not_break_the_merge():
+    stored = pd.DataFrame({'Date': pd.to_datetime(['2024-12-31', '2023-12-31', '2023-12-31']), 'Revenue': [120.0, 100.0, 99.0]})
+    fetched = pd.DataFrame({'Date': pd.to_datetime(['2025-12-31', '2024-12-31', '2024-12-31']), 'Revenue': [130.0, 121.0, 50.0]})
+    merged, changes = merge_periods(stored, fetched)
+    assert merged['Revenue'].tolist() == [130.0, 121.0, 100.0]
+    assert sorted(c['kind'] for c in changes) == ['new_period', 'restated']
@@ -0,0 +1,15 @@
+import pytest
+
+fitz = pytest.importorskip('fitz'); pytest.importorskip('fpdf')
+from bench_pdf_batch import sample_results
+from modules.report_generator import create_pdf_batch
+
+def test_book_is_assembled_part_by_part(tmp_path):
+    results = sample_results(7)
+    out = create_pdf_batch(results, str(tmp_path), mode="both", workers=1, chunk=3) # 3 parts, appended one at a time
+    assert len(out['files']) == 7
+    with fitz.open(out['book']) as book:
+        toc = book.get_toc()
+        assert [t[1] for t in toc] == ["Contents", *results] and toc[0][2] == 1
+        assert book.page_count == toc[1][2] - 1 + out['pages'] // 2 # front matter + each company once
+        for _, name, page in toc[1:]: assert f"Report: {name}" in book[page - 1].get_text()
@@ -0,0 +1,14 @@
+import run_suite
+
+def test_short_cases_are_looped_to_the_minimum_sample(monkeypatch):
+    calls = []
+    monkeypatch.setitem(run_suite.RUN, 'normalize', calls.append)
+    res = run_suite.measure('normalize', [1, 2, 3], repeat=3, min_seconds=0.02)
+    assert res['loops'] > 10 and res['repeat'] == 3 # a pass of three no-op calls takes microseconds
+    assert len(calls) == 1 + 3 + 3 * res['loops'] * 3 + 3 # warm-up, calibration pass, samples, memory pass
+    assert res['items_per_s'] > 0
+
+def test_compare_flags_only_beyond_tolerance():
+    base = {'results': {'a@1': {'items_per_s': 100.0, 'peak_kb_per_item': 10.0}}}
+    assert run_suite.compare({'a@1': {'items_per_s': 80.0, 'peak_kb_per_item': 12.0}}, base, 0.25, 0.25) == []
+    assert [r[1] for r in run_suite.compare({'a@1': {'items_per_s': 70.0, 'peak_kb_per_item': 13.0}}, base, 0.25, 0.25)] == ['items_per_s', 'peak_kb_per_item']
@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from modules.screener import RatioTable
+
+@pytest.fixture(scope='module')
+def rows():
+    rng = np.random.default_rng(7); n = 300
+    df = pd.DataFrame({'Id': [f"C{i // 3:03d}" for i in range(n)], 'Sector': rng.choice(['Energy', 'Tech', 'Utilities'], n),
+                       'Year': np.tile([2022, 2023, 2024], n // 3),
+                       'ROIC': rng.integers(-5, 30, n).astype(float), # integers: plenty of ties
+                       'Z_Score': np.round(rng.normal(3, 1, n), 1), 'CCC': rng.normal(50, 30, n)})
+    df.loc[rng.choice(n, 30, replace=False), 'ROIC'] = np.nan
+    return df
+
+def check(table, df, expr, want):
+    assert np.array_equal(table.where(expr), want.to_numpy()), expr
+
+def test_boolean_logic_and_precedence(rows):
+    t = RatioTable(rows)
+    roic, z, ccc = rows['ROIC'], rows['Z_Score'], rows['CCC']
+    check(t, rows, "ROIC > 20 or Z_Score > 4 and CCC < 30", (roic > 20) | ((z > 4) & (ccc < 30))) # and binds tighter
+    check(t, rows, "(ROIC > 20 or Z_Score > 4) and CCC < 30", ((roic > 20) | (z > 4)) & (ccc < 30))
+    check(t, rows, "not ROIC > 10 and Sector == 'Tech'", ~(roic > 10) & (rows['Sector'] == 'Tech')) # not binds tighter than and
+    check(t, rows, "NOT (roic >= 10 OR z_score < 2)", ~((roic >= 10) | (z < 2)))
+    check(t, rows, "(Sector in ('Energy', 'Utilities')) & ~(CCC > 50)", rows['Sector'].isin(['Energy', 'Utilities']) & ~(ccc > 50))
+    check(t, rows, "ROIC = 12", roic == 12)
+    check(t, rows, "ROIC != 12", roic.notna() & (roic != 12)) # NaN is never a match
+
+@pytest.mark.parametrize('expr', ["ROIC.real > 1", "abs(ROIC) > 1", "__import__('os')", "ROIC > 1 + 1",
+                                  "ROIC > Z_Score", "[ROIC > 1]", "lambda: 1", "Revenu > 1"])
+def test_disallowed_syntax_is_rejected(rows, expr):
+    with pytest.raises(ValueError): RatioTable(rows).where(expr)
+
+def test_range_queries_on_indexed_columns(rows):
+    t = RatioTable(rows).build_indexes()
+    roic = rows['ROIC']
+    check(t, rows, "10 < ROIC <= 25", (roic > 10) & (roic <= 25))
+    check(t, rows, "25 >= ROIC >= 10", (roic >= 10) & (roic <= 25))
+    check(t, rows, "ROIC in (0, 12, 29)", roic.isin([0, 12, 29]))
+    assert np.array_equal(t.range('CCC', 20, 40, lo_inclusive=False), ((rows['CCC'] > 20) & (rows['CCC'] <= 40)).to_numpy())
+
+@pytest.mark.parametrize('ascending', [False, True])
+def test_top_k_matches_a_stable_pandas_sort(rows, ascending):
+    t = RatioTable(rows)
+    got = t.screen("Z_Score > 2", by='ROIC', k=25, ascending=ascending)
+    hits = rows[rows['Z_Score'] > 2].dropna(subset=['ROIC'])
+    want = hits.sort_values('ROIC', ascending=ascending, kind='stable').head(25)
+    assert got['ROIC'].tolist() == want['ROIC'].tolist()
+    assert list(zip(got['Id'], got['Year'])) == list(zip(want['Id'], want['Year'])) # ties in table order
+    assert len(t.screen(by='ROIC')) == rows['ROIC'].notna().sum() # NaN never ranks
@@ -0,0 +1,21 @@
+import io
+import time
+import contextlib
+
+from modules.cache import FundamentalsCache
+from service import AnalysisService
+from test_loader import set_cache, get_company_df
+
+def test_etag_follows_refreshes_by_other_processes(tmp_path, universe):
+    backend = universe.backend(); t = universe.tickers[0]
+    service = AnalysisService(backend=backend, batch_ms=0, pdf_workers=0)
+    try:
+        set_cache(FundamentalsCache(str(tmp_path)))
+        first_tag, _, _ = service.ratios(t)
+        assert service.etag(t, 'annual') == first_tag
+        time.sleep(0.01)
+        batch = FundamentalsCache(str(tmp_path)) # batch_runner: same cache dir, its own index
+        with contextlib.redirect_stdout(io.StringIO()):
+            batch.put(t, 'statements', get_company_df(t, 'yahoo', backend=backend)[0]['table'])
+        assert service.etag(t, 'annual') not in (None, first_tag)
+    finally: service.close()
@@ -0,0 +1,40 @@
+import threading
+
+from modules import telemetry
+from modules.jobs import JobQueue
+
+def work(job=None):
+    with telemetry.span('outer'):
+        with telemetry.span('inner'): pass
+    return 1
+
+def test_disabled_and_untraced_spans_are_free():
+    assert telemetry.span('x') is telemetry._NULL
+
+def test_trace_records_without_enabling_process_metrics():
+    telemetry.reset()
+    with telemetry.trace('session') as tr: work()
+    assert [(s['span'], s['depth']) for s in tr.stages()] == [('outer', 0), ('inner', 1)]
+    assert not telemetry.enabled() and telemetry.snapshot()['spans'] == {}
+
+def test_trace_is_local_to_its_thread():
+    seen = []
+    def other(): seen.append(telemetry.span('elsewhere') is telemetry._NULL)
+    with telemetry.trace('session') as tr:
+        t = threading.Thread(target=other); t.start(); t.join()
+    assert seen == [True] and len(tr) == 0
+
+def test_enabled_aggregates_without_a_trace():
+    telemetry.reset(); telemetry.enable(True)
+    try: work()
+    finally: telemetry.enable(False)
+    assert set(telemetry.snapshot()['spans']) == {'outer', 'inner'}
+
+def test_jobs_are_traced_on_request():
+    queue = JobQueue(max_workers=1)
+    try:
+        plain = queue.submit('a', work); traced = queue.submit('b', work, traced=True)
+        plain.wait(5); traced.wait(5)
+        assert plain.trace is None
+        assert [s['span'] for s in traced.trace.stages()] == ['jobs.run', 'outer', 'inner']
+    finally: queue.shutdown()
@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from modules.ttm import company_ttm, stack_quarters, ttm_panel
+
+def quarters(ends, revenue, assets):
+    """Normalized quarterly frame, newest first like the loader's."""
+    dates = pd.to_datetime(ends)
+    df = pd.DataFrame({'Date': dates, 'Year': dates.year, 'Revenue': revenue, 'TotalAssets': assets})
+    return df.sort_values('Date', ascending=False).reset_index(drop=True)
+
+ENDS = ['2023-03-31', '2023-06-30', '2023-09-30', '2023-12-31', '2024-03-31', '2024-06-30']
+REVENUE = [10.0, 11.0, 12.0, 13.0, 14.0, 15.0]
+ASSETS = [100.0, 101.0, 102.0, 103.0, 104.0, 105.0]
+
+def test_rolling_four_quarter_sums_and_quarter_end_balances():
+    out = company_ttm(quarters(ENDS, REVENUE, ASSETS))
+    assert out['Date'].dt.strftime('%Y-%m-%d').tolist() == ['2024-06-30', '2024-03-31', '2023-12-31'] # newest first
+    assert out['Revenue'].tolist() == [12 + 13 + 14 + 15, 11 + 12 + 13 + 14, 10 + 11 + 12 + 13]
+    assert out['TotalAssets'].tolist() == [105.0, 104.0, 103.0] # latest quarter, not summed
+    assert out['Year'].tolist() == [2024, 2024, 2023]
+
+def test_missing_quarter_or_value_gives_no_ttm():
+    gap = company_ttm(quarters([e for e in ENDS if e != '2023-09-30'], [r for r in REVENUE if r != 12.0], ASSETS[:5]))
+    assert gap.empty # every four-row window spans the missing quarter
+
+    revenue = REVENUE.copy(); revenue[4] = np.nan # 2024-03-31 revenue missing
+    out = company_ttm(quarters(ENDS, revenue, ASSETS)).set_index('Date')
+    assert np.isnan(out.loc['2024-06-30', 'Revenue']) and np.isnan(out.loc['2024-03-31', 'Revenue'])
+    assert out.loc['2023-12-31', 'Revenue'] == 46.0 and out.loc['2024-06-30', 'TotalAssets'] == 105.0
+
+def test_windows_never_cross_tickers():
+    frames = {'A': quarters(ENDS[:4], REVENUE[:4], ASSETS[:4]), 'B': quarters(ENDS[2:], [1.0, 2.0, 3.0, 4.0], ASSETS[2:])}
+    wide = stack_quarters(frames)
+    assert wide.index.get_level_values('Ticker').tolist() == ['A'] * 4 + ['B'] * 4 # oldest quarter first per ticker
+    ttm = ttm_panel(wide)
+    assert ttm.index.tolist() == [('A', pd.Timestamp('2023-12-31')), ('B', pd.Timestamp('2024-06-30'))]
+    assert ttm['Revenue'].tolist() == pytest.approx([46.0, 10.0]) and ttm['TotalAssets'].tolist() == [103.0, 105.0]
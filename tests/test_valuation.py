@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from modules.valuation import (FADE_YEARS, RONIC_FLOOR, STAGE1_YEARS, TERMINAL_GROWTH, dcf_value, monte_carlo, sensitivity_grid)
+
+INPUTS = {'revenue': 1000.0, 'margin': 0.15, 'tax': 0.25, 'nopat': 112.5, 'invested_capital': 600.0, 'roic': 0.12, 'growth': 0.06}
+
+def scalar_dcf(inputs, wacc, growth, margin, terminal=TERMINAL_GROWTH):
+    """Year-by-year DCF in plain Python: flat growth, linear fade to terminal, Gordon terminal value."""
+    ronic = max(inputs['roic'], RONIC_FLOOR)
+    revenue, value = inputs['revenue'], 0.0
+    for t in range(1, STAGE1_YEARS + FADE_YEARS + 1):
+        w = max(0, t - STAGE1_YEARS) / (FADE_YEARS + 1)
+        rate = growth * (1 - w) + terminal * w
+        revenue *= 1 + rate
+        nopat = revenue * margin * (1 - inputs['tax'])
+        value += nopat * (1 - rate / ronic) / (1 + wacc) ** t
+    tv = nopat * (1 + terminal) * (1 - terminal / ronic) / (wacc - terminal)
+    return value + tv / (1 + wacc) ** t
+
+def test_grid_cell_matches_scalar_dcf_and_eva():
+    grid = sensitivity_grid(INPUTS)
+    i, j, k = 7, 2, 0
+    w, g, m = grid['wacc'][i], grid['growth'][j], grid['margin'][k]
+    assert grid['dcf'][i, j, k] == pytest.approx(scalar_dcf(INPUTS, w, g, m), rel=1e-12)
+    assert grid['eva'][i, k] == pytest.approx(INPUTS['nopat'] * m / INPUTS['margin'] - INPUTS['invested_capital'] * w)
+    assert grid['dcf'].shape == (len(grid['wacc']), len(grid['growth']), len(grid['margin']))
+
+def test_wacc_at_or_below_terminal_has_no_value():
+    assert np.isnan(dcf_value(INPUTS, TERMINAL_GROWTH, 0.05))
+
+def test_grid_does_not_depend_on_chunk_size():
+    base = sensitivity_grid(INPUTS)['dcf']
+    np.testing.assert_array_equal(sensitivity_grid(INPUTS, chunk=7)['dcf'], base)
+
+def test_monte_carlo_is_reproducible_and_chunk_independent():
+    a = monte_carlo(INPUTS, n=50_000, seed=42)
+    b = monte_carlo(INPUTS, n=50_000, seed=42)
+    c = monte_carlo(INPUTS, n=50_000, seed=42, chunk=4_096)
+    for p in ('p5', 'p25', 'p50', 'p75', 'p95'):
+        assert a['dcf'][p] == b['dcf'][p] == c['dcf'][p] and a['eva'][p] == c['eva'][p]
+    np.testing.assert_array_equal(a['samples']['dcf'], c['samples']['dcf'])
+    assert monte_carlo(INPUTS, n=50_000, seed=43)['dcf']['p50'] != a['dcf']['p50']
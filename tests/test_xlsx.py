@@ -0,0 +1,52 @@
+import io
+import datetime
+import contextlib
+import pandas as pd
+import pytest
+
+openpyxl = pytest.importorskip('openpyxl')
+from test_loader import get_xlsx_data, normalize_dataframe, statement_items_to_frame, _xlsx_sheet_items
+
+INCOME = [('Total Revenue', [5120.4, 4608.4]), ('Cost Of Revenue', [3011.9, 2800.0]), ('Net Income', [611.7, 540.2]), ('Basic EPS', [2.31, 2.05])]
+BALANCE = [('Total Assets', [7420.6, 7011.0]), ('Stockholders Equity', [3305.9, 3120.4]), ('Total Debt', [2100.0, 2250.5])]
+
+@pytest.fixture
+def workbook(tmp_path):
+    wb = openpyxl.Workbook(); wb.remove(wb.active)
+    ledger = wb.create_sheet('Ledger') # dates in every row, but no statement: skipped
+    ledger.append(['Entry', 'Posted', 'Amount'])
+    for r in range(100): ledger.append([r, datetime.date(2024, 1, 1) + datetime.timedelta(days=r), 10.0 * r])
+    inc = wb.create_sheet('Income Statement')
+    inc.append(['ACME Group plc']); inc.append(['(in millions)']); inc.append([])
+    inc.append(['', 'FY2024', 'FY2023'])
+    for i, (label, vals) in enumerate(INCOME):
+        if i == 2: inc.append([]) # blank row inside the statement
+        inc.append([label, *vals])
+    other = wb.create_sheet('Sheet3') # unnamed: accepted for its known line items
+    other.append(['in millions']); other.append([None, 2024, 2023])
+    for label, vals in BALANCE: other.append([label, *vals])
+    path = tmp_path / 'book.xlsx'; wb.save(path)
+    return str(path)
+
+def expected():
+    items = {label: {2024: v24 * (1 if 'EPS' in label else 1e6), 2023: v23 * (1 if 'EPS' in label else 1e6)}
+             for label, (v24, v23) in INCOME + BALANCE}
+    return normalize_dataframe(statement_items_to_frame(items), 'xlsx')
+
+def eager(path):
+    """The pre-streaming read: every sheet fully materialized, then the same statement detection."""
+    items = {}
+    for name, sheet in pd.read_excel(path, sheet_name=None, header=None, engine='openpyxl').items():
+        rows = [tuple(None if pd.isna(c) else c for c in row) for row in sheet.itertuples(index=False)]
+        for label, vals in _xlsx_sheet_items(rows, name).items(): items.setdefault(label, vals)
+    return normalize_dataframe(statement_items_to_frame(items), 'xlsx')
+
+def test_streamed_workbook_matches_the_eager_read(workbook):
+    with contextlib.redirect_stdout(io.StringIO()): df = normalize_dataframe(get_xlsx_data(workbook), 'xlsx')
+    pd.testing.assert_frame_equal(df, expected(), check_like=True)
+    pd.testing.assert_frame_equal(df, eager(workbook), check_like=True)
+    assert df['Year'].tolist() == [2024, 2023] and df.loc[0, 'Revenue'] == pytest.approx(5120.4e6)
+
+def test_sheet_without_a_year_header_is_dropped():
+    rows = [('Notes',), *[(f"note {i}", 'text') for i in range(40)]]
+    assert _xlsx_sheet_items(iter(rows), 'Income Statement') == {}